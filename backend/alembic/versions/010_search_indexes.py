@@ -0,0 +1,45 @@
+"""Trigram search indexes
+
+Adds pg_trgm GIN indexes on the display-name columns of every entity
+that /api/v1/search covers, so `ILIKE '%q%'` and `similarity()` no longer
+fall back to sequential scans. Full-text search goes through the
+search_index table (011) rather than per-entity tsvector columns.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-05-12 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, indexed expression) for trigram lookups on display names
+TRIGRAM_INDEXES = [
+    ("ix_organizations_name_trgm", "organizations", "name"),
+    ("ix_configurations_name_trgm", "configurations", "name"),
+    ("ix_passwords_name_trgm", "passwords", "name"),
+    ("ix_documents_title_trgm", "documents", "title"),
+    ("ix_domains_domain_name_trgm", "domains", "domain_name"),
+    ("ix_contacts_full_name_trgm", "contacts", "(first_name || ' ' || last_name)"),
+    ("ix_contacts_email_trgm", "contacts", "email"),
+    ("ix_locations_name_trgm", "locations", "name"),
+    ("ix_ssl_certificates_common_name_trgm", "ssl_certificates", "common_name"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for name, table, expr in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} USING gin ({expr} gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    for name, _table, _expr in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
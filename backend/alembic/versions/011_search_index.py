@@ -0,0 +1,54 @@
+"""Unified search_index table
+
+A single denormalized table kept current by app.services.search_index,
+so global search is one indexed lookup regardless of how many entity
+types exist. The trigram indexes on the source tables (010) are for the
+list endpoints' `search=` filters.
+
+The table is backfilled on first startup (or via `python -m app.cli
+search-rebuild`) because titles/bodies are extracted in Python.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-05-14 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'search_index',
+        sa.Column('entity_type', sa.String(50), primary_key=True),
+        sa.Column('entity_id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('organization_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column(
+            'search_vector',
+            TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(body, '')), 'B')",
+                persisted=True,
+            ),
+        ),
+        sa.Column('archived', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_search_index_organization_id', 'search_index', ['organization_id'])
+    op.execute("CREATE INDEX ix_search_index_search_vector ON search_index USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_search_index_title_trgm ON search_index USING gin (title gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.drop_table('search_index')
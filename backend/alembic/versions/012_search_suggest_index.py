@@ -0,0 +1,29 @@
+"""Prefix index for /search/suggest
+
+A btree over (entity_type, lower(title)) with text_pattern_ops lets the
+typeahead endpoint do an index range scan + LIMIT per entity type.
+Archived rows are never suggested, so they are left out of the index.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-05-15 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX ix_search_index_type_title_prefix ON search_index "
+        "(entity_type, lower(title) text_pattern_ops) WHERE NOT archived"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_search_index_type_title_prefix")
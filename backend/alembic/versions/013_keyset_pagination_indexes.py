@@ -0,0 +1,68 @@
+"""Composite indexes for keyset pagination
+
+List endpoints page with ``WHERE (sort_key, id) > (:last_sort, :last_id)
+ORDER BY sort_key, id``. Each index below ends in the list's sort key and
+id (after any equality filter the endpoint takes), so a page is a single
+index range scan at any depth. Descending lists use the same indexes
+scanned backwards. Archivable tables only list live rows, so those
+indexes are partial.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-05-16 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> list sort key, for the org-scoped, archivable asset tables
+ORG_SCOPED = {
+    "configurations": "name",
+    "passwords": "name",
+    "documents": "updated_at",
+    "contacts": "last_name",
+    "locations": "name",
+    "domains": "domain_name",
+    "ssl_certificates": "common_name",
+    "flexible_assets": "name",
+    "checklists": "name",
+    "runbooks": "name",
+}
+
+# (index name, table, columns, live rows only)
+INDEXES = [
+    ("ix_organizations_keyset", "organizations", ["name", "id"], True),
+    ("ix_flexible_assets_type_keyset", "flexible_assets", ["asset_type_id", "name", "id"], True),
+    ("ix_webhooks_keyset", "webhooks", ["name", "id"], False),
+    ("ix_audit_logs_keyset", "audit_logs", ["created_at", "id"], False),
+    ("ix_audit_logs_entity_keyset", "audit_logs", ["entity_type", "entity_id", "created_at", "id"], False),
+    ("ix_flags_keyset", "flags", ["created_at", "id"], False),
+    ("ix_flags_entity_keyset", "flags", ["entity_type", "entity_id", "created_at", "id"], False),
+    ("ix_relationships_keyset", "relationships", ["created_at", "id"], False),
+    ("ix_relationships_source_keyset", "relationships", ["source_type", "source_id", "created_at", "id"], False),
+    ("ix_relationships_target_keyset", "relationships", ["target_type", "target_id", "created_at", "id"], False),
+]
+for _table, _key in ORG_SCOPED.items():
+    INDEXES.append((f"ix_{_table}_keyset", _table, [_key, "id"], True))
+    INDEXES.append((f"ix_{_table}_org_keyset", _table, ["organization_id", _key, "id"], True))
+
+
+def upgrade() -> None:
+    for name, table, columns, live_only in INDEXES:
+        op.create_index(
+            name, table, columns,
+            postgresql_where=sa.text("archived_at IS NULL") if live_only else None,
+        )
+
+
+def downgrade() -> None:
+    for name, table, _columns, _live_only in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""document_versions.content_size
+
+Size of each version's content, so the history listing can show it
+without reading the content itself.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-05-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_versions', sa.Column('content_size', sa.Integer(), nullable=True))
+    op.execute("UPDATE document_versions SET content_size = octet_length(content::text) WHERE content IS NOT NULL")
+    # Listing and single-version lookups are by (document_id, version).
+    op.create_index(
+        'ix_document_versions_document_version', 'document_versions', ['document_id', 'version'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_versions_document_version', table_name='document_versions')
+    op.drop_column('document_versions', 'content_size')
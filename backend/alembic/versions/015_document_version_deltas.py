@@ -0,0 +1,96 @@
+"""Delta-encoded document version history
+
+Adds document_versions.delta and compacts existing history: per document,
+the newest version and every KEYFRAME_INTERVAL-th version keep their full
+content, every other version is replaced by a reverse diff-match-patch
+delta against the next newer version (see app.services.document_versions).
+A version whose delta does not round-trip exactly is left as a full copy.
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-05-18 00:00:00.000000
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from diff_match_patch import diff_match_patch
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must match the DOCUMENT_VERSION_KEYFRAME_INTERVAL default at the time of writing.
+KEYFRAME_INTERVAL = 20
+
+versions = sa.table(
+    'document_versions',
+    sa.column('id', UUID(as_uuid=True)),
+    sa.column('document_id', UUID(as_uuid=True)),
+    sa.column('version', sa.Integer),
+    sa.column('content', JSONB),
+    sa.column('delta', sa.Text),
+)
+
+
+def _serialize(content) -> str:
+    return json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _documents_with_history(bind) -> list:
+    return bind.execute(
+        sa.select(versions.c.document_id).group_by(versions.c.document_id).having(sa.func.count() > 1)
+    ).scalars().all()
+
+
+def upgrade() -> None:
+    op.add_column('document_versions', sa.Column('delta', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    dmp = diff_match_patch()
+    for document_id in _documents_with_history(bind):
+        rows = bind.execute(
+            sa.select(versions.c.id, versions.c.version, versions.c.content)
+            .where(versions.c.document_id == document_id)
+            .order_by(versions.c.version.desc())
+        ).all()
+        newer = _serialize(rows[0].content)
+        for row in rows[1:]:
+            older = _serialize(row.content)
+            if row.version % KEYFRAME_INTERVAL != 0:
+                delta = dmp.patch_toText(dmp.patch_make(newer, older))
+                text, applied = dmp.patch_apply(dmp.patch_fromText(delta), newer)
+                if all(applied) and text == older:
+                    bind.execute(
+                        versions.update()
+                        .where(versions.c.id == row.id)
+                        .values(content=None, delta=delta)
+                    )
+            newer = older
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    dmp = diff_match_patch()
+    for document_id in _documents_with_history(bind):
+        rows = bind.execute(
+            sa.select(versions.c.id, versions.c.content, versions.c.delta)
+            .where(versions.c.document_id == document_id)
+            .order_by(versions.c.version.desc())
+        ).all()
+        text = None
+        for row in rows:
+            if row.delta is None:
+                text = _serialize(row.content)
+                continue
+            text, _applied = dmp.patch_apply(dmp.patch_fromText(row.delta), text)
+            bind.execute(
+                versions.update().where(versions.c.id == row.id).values(content=json.loads(text))
+            )
+
+    op.drop_column('document_versions', 'delta')
@@ -0,0 +1,29 @@
+"""attachments.file_size to bigint, add attachments.sha256
+
+int4 overflows at 2 GiB, which is well within what gets uploaded (ISOs,
+VM images). The hash is computed while the upload streams to disk.
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-05-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '016'
+down_revision: Union[str, None] = '015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('attachments', 'file_size', type_=sa.BigInteger(), existing_nullable=True)
+    op.add_column('attachments', sa.Column('sha256', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('attachments', 'sha256')
+    op.alter_column('attachments', 'file_size', type_=sa.Integer(), existing_nullable=True)
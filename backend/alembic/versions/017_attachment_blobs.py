@@ -0,0 +1,36 @@
+"""Content-addressed attachment blobs
+
+One row per distinct stored file, keyed by SHA-256, with the number of
+attachments referencing it. Existing files stay where they are until
+`python -m app.cli attachments-gc` moves them into the store.
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-05-20 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '017'
+down_revision: Union[str, None] = '016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attachment_blobs',
+        sa.Column('sha256', sa.String(64), primary_key=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_attachments_sha256', 'attachments', ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attachments_sha256', table_name='attachments')
+    op.drop_table('attachment_blobs')
@@ -0,0 +1,53 @@
+"""Hashed password share-link tokens
+
+Share links now store the SHA-256 of their token instead of the token
+itself, so a leaked table cannot be replayed, and remember who created
+them. Lookups go through the unique index on token_hash.
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-05-21 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+revision: str = '018'
+down_revision: Union[str, None] = '017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('password_share_links', sa.Column('token_hash', sa.String(64), nullable=True))
+    op.execute("UPDATE password_share_links SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    op.alter_column('password_share_links', 'token_hash', nullable=False)
+    op.create_index('ix_password_share_links_token_hash', 'password_share_links', ['token_hash'], unique=True)
+    op.drop_column('password_share_links', 'token')
+
+    op.add_column(
+        'password_share_links',
+        sa.Column('created_by', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+    )
+    op.alter_column('password_share_links', 'view_count', server_default='0')
+    op.alter_column('password_share_links', 'is_active', server_default=sa.true())
+    op.create_index('ix_password_share_links_expires_at', 'password_share_links', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_password_share_links_expires_at', table_name='password_share_links')
+    op.alter_column('password_share_links', 'is_active', server_default=None)
+    op.alter_column('password_share_links', 'view_count', server_default=None)
+    op.drop_column('password_share_links', 'created_by')
+
+    # The original tokens are gone; the hashes keep the column unique and
+    # no longer match any link that was handed out.
+    op.add_column('password_share_links', sa.Column('token', sa.String(255), nullable=True))
+    op.execute("UPDATE password_share_links SET token = token_hash")
+    op.alter_column('password_share_links', 'token', nullable=False)
+    op.create_index('ix_password_share_links_token', 'password_share_links', ['token'], unique=True)
+    op.drop_index('ix_password_share_links_token_hash', table_name='password_share_links')
+    op.drop_column('password_share_links', 'token_hash')
@@ -0,0 +1,130 @@
+"""Monthly partitions for audit_logs and a daily rollup
+
+audit_logs becomes a table range-partitioned by month on created_at
+(primary key (id, created_at), as Postgres requires the partition key in
+it), with partitions from the oldest row's month through PARTITIONS_AHEAD
+months ahead plus a default partition. Existing rows are copied over.
+app.services.audit_retention keeps creating partitions ahead and drops
+those past the retention period.
+
+audit_log_daily_counts holds per-day (UTC) counts by entity type and
+action, backfilled here, so reports no longer count the raw log.
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-05-22 00:00:00.000000
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '019'
+down_revision: Union[str, None] = '018'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must match AUDIT_LOG_PARTITIONS_AHEAD's default at the time of writing.
+PARTITIONS_AHEAD = 3
+
+COLUMNS = "id, entity_type, entity_id, action, changes, user_id, ip_address, created_at"
+
+INDEXES = [
+    ("ix_audit_logs_entity_type", ["entity_type"]),
+    ("ix_audit_logs_entity_id", ["entity_id"]),
+    ("ix_audit_logs_keyset", ["created_at", "id"]),
+    ("ix_audit_logs_entity_keyset", ["entity_type", "entity_id", "created_at", "id"]),
+]
+
+
+def _add_months(d: date, n: int) -> date:
+    months = d.year * 12 + d.month - 1 + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _drop_indexes() -> None:
+    for name, _columns in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, 'audit_logs', columns)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_old")
+    op.execute("ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_pkey TO audit_logs_old_pkey")
+    _drop_indexes()
+
+    op.execute(f"""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            entity_type VARCHAR(100) NOT NULL,
+            entity_id UUID NOT NULL,
+            action VARCHAR(50) NOT NULL,
+            changes JSONB,
+            user_id UUID,
+            ip_address VARCHAR(45),
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_old")).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = (oldest.astimezone(timezone.utc).date() if oldest else today).replace(day=1)
+    last = _add_months(today.replace(day=1), PARTITIONS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year:04d}m{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_old")
+    op.execute("DROP TABLE audit_logs_old")
+    _create_indexes()
+
+    op.create_table(
+        'audit_log_daily_counts',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('entity_type', sa.String(100), primary_key=True),
+        sa.Column('action', sa.String(50), primary_key=True),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+    )
+    # Complete days only; today is counted from the raw log.
+    op.execute("""
+        INSERT INTO audit_log_daily_counts (day, entity_type, action, count)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, entity_type, action, count(*)
+        FROM audit_logs
+        WHERE created_at < date_trunc('day', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('audit_log_daily_counts')
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    _drop_indexes()
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+            entity_type VARCHAR(100) NOT NULL,
+            entity_id UUID NOT NULL,
+            action VARCHAR(50) NOT NULL,
+            changes JSONB,
+            user_id UUID,
+            ip_address VARCHAR(45),
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned")
+    _create_indexes()
@@ -0,0 +1,58 @@
+"""Webhook outbox and delivery log
+
+webhook_outbox receives entity-change events in the same transaction as
+the change; the dispatcher fans them out into webhook_deliveries, which
+also serves as the delivery log.
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-05-23 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+revision: str = '020'
+down_revision: Union[str, None] = '019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_outbox',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('event', sa.String(100), nullable=False),
+        sa.Column('payload', JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        'webhook_deliveries',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('webhook_id', UUID(as_uuid=True), sa.ForeignKey('webhooks.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('event', sa.String(100), nullable=False),
+        sa.Column('payload', JSONB(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_status_code', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    # The dispatcher's work queue: only pending rows, in due order.
+    op.create_index(
+        'ix_webhook_deliveries_due', 'webhook_deliveries', ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_index('ix_webhook_deliveries_webhook_keyset', 'webhook_deliveries', ['webhook_id', 'created_at', 'id'])
+    op.create_index('ix_webhook_deliveries_created_at', 'webhook_deliveries', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('webhook_deliveries')
+    op.drop_table('webhook_outbox')
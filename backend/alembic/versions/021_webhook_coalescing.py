@@ -0,0 +1,41 @@
+"""Webhook event coalescing and batching
+
+webhook_deliveries.coalesce_key identifies the entity an event is about,
+so later events for it can be merged into a delivery that has not been
+attempted yet; webhooks.batch_events sends a subscriber's due deliveries
+as one POST.
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-05-24 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '021'
+down_revision: Union[str, None] = '020'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('webhooks', sa.Column('batch_events', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('webhook_deliveries', sa.Column('coalesce_key', sa.String(200), nullable=True))
+    op.add_column(
+        'webhook_deliveries', sa.Column('coalesced', sa.Integer(), nullable=False, server_default='0'),
+    )
+    # Deliveries that later events may still be merged into.
+    op.create_index(
+        'ix_webhook_deliveries_coalesce', 'webhook_deliveries', ['webhook_id', 'coalesce_key'],
+        postgresql_where=sa.text("status = 'pending' AND attempts = 0 AND coalesce_key IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_deliveries_coalesce', table_name='webhook_deliveries')
+    op.drop_column('webhook_deliveries', 'coalesced')
+    op.drop_column('webhook_deliveries', 'coalesce_key')
+    op.drop_column('webhooks', 'batch_events')
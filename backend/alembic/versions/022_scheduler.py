@@ -0,0 +1,41 @@
+"""Scheduled job run history
+
+scheduled_job_runs records every run of a scheduled job.
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-05-25 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+revision: str = '022'
+down_revision: Union[str, None] = '021'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduled_job_runs',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('job_id', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('trigger', sa.String(20), nullable=False, server_default='schedule'),
+        sa.Column('worker', sa.String(255), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('result', JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_scheduled_job_runs_job_keyset', 'scheduled_job_runs', ['job_id', 'started_at', 'id'])
+    op.create_index('ix_scheduled_job_runs_started_at', 'scheduled_job_runs', ['started_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_table('scheduled_job_runs')
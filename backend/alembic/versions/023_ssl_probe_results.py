@@ -0,0 +1,67 @@
+"""SSL probe history
+
+Append-only ssl_probe_results: one row per distinct consecutive probe
+outcome of a certificate (repeats only bump last_seen_at/seen_count).
+`changed` marks a row whose certificate differs from the previous one
+successfully probed, with `previous_id` pointing at that one.
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-05-26 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+revision: str = '023'
+down_revision: Union[str, None] = '022'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ssl_probe_results',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column(
+            'certificate_id', UUID(as_uuid=True), sa.ForeignKey('ssl_certificates.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('probed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('seen_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('host', sa.String(255), nullable=False),
+        sa.Column('port', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(64), nullable=True),
+        sa.Column('serial_number', sa.String(255), nullable=True),
+        sa.Column('subject_cn', sa.String(255), nullable=True),
+        sa.Column('issuer', sa.String(255), nullable=True),
+        sa.Column('not_before', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('not_after', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('key_algorithm', sa.String(100), nullable=True),
+        sa.Column('key_size', sa.Integer(), nullable=True),
+        sa.Column('signature_algorithm', sa.String(100), nullable=True),
+        sa.Column('tls_version', sa.String(20), nullable=True),
+        sa.Column('cipher', sa.String(100), nullable=True),
+        sa.Column('latency_ms', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('changed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column(
+            'previous_id', UUID(as_uuid=True), sa.ForeignKey('ssl_probe_results.id', ondelete='SET NULL'),
+            nullable=True,
+        ),
+    )
+    # A certificate's timeline, and its latest (successful) row
+    op.create_index('ix_ssl_probe_results_cert_keyset', 'ssl_probe_results', ['certificate_id', 'probed_at', 'id'])
+    # Fleet-wide "changed since"
+    op.create_index(
+        'ix_ssl_probe_results_changed', 'ssl_probe_results', ['probed_at', 'id'],
+        postgresql_where=sa.text('changed'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ssl_probe_results')
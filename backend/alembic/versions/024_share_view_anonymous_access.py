@@ -0,0 +1,27 @@
+"""Password access log entries without a user
+
+A share link opened after its creator's account was deleted has no user
+to attribute the view to; it is still logged, with a NULL user_id.
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-05-27 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '024'
+down_revision: Union[str, None] = '023'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('password_access_log', 'user_id', nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM password_access_log WHERE user_id IS NULL")
+    op.alter_column('password_access_log', 'user_id', nullable=False)
@@ -1,8 +1,11 @@
+import asyncio
 import os
 import uuid
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,10 +14,60 @@ from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.attachment import Attachment
 from app.models.user import User
+from app.services import attachment_storage, upload_sessions
 
 router = APIRouter(prefix="/attachments", tags=["attachments"])
 
 
+class AttachByHash(BaseModel):
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    file_name: str = Field(..., min_length=1, max_length=500)
+    content_type: str | None = Field(None, max_length=200)
+    attachable_type: str = Field(..., max_length=100)
+    attachable_id: uuid.UUID
+
+
+class UploadSessionCreate(BaseModel):
+    file_name: str = Field(..., min_length=1, max_length=500)
+    content_type: str | None = Field(None, max_length=200)
+    size: int = Field(..., gt=0)
+    attachable_type: str = Field(..., max_length=100)
+    attachable_id: uuid.UUID
+    # Optional: verified on completion
+    sha256: str | None = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadSessionResponse(BaseModel):
+    id: uuid.UUID
+    file_name: str
+    size: int
+    chunk_size: int
+    max_chunk_size: int
+    received: list[tuple[int, int]]
+    bytes_received: int
+    expires_at: datetime
+
+
+def _session_response(meta, received, expires_at) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=meta.id, file_name=meta.file_name, size=meta.size,
+        chunk_size=settings.ATTACHMENT_UPLOAD_MAX_CHUNK_BYTES // 8,
+        max_chunk_size=settings.ATTACHMENT_UPLOAD_MAX_CHUNK_BYTES,
+        received=received, bytes_received=sum(end - start for start, end in received),
+        expires_at=expires_at,
+    )
+
+
+async def _session_for(session_id: uuid.UUID, user: User):
+    try:
+        meta, received, expires_at = await upload_sessions.status(session_id)
+    except upload_sessions.SessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if meta.user_id != str(user.id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return meta, received, expires_at
+
+
 @router.get("")
 async def list_attachments(
     attachable_type: str = Query(...),
@@ -38,39 +91,104 @@ async def upload_attachment(
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
-    upload_dir = os.path.join(settings.UPLOAD_DIR, attachable_type, attachable_id)
-    os.makedirs(upload_dir, exist_ok=True)
-
-    file_id = str(uuid.uuid4())
-    ext = os.path.splitext(file.filename or "")[1]
-    file_path = os.path.join(upload_dir, f"{file_id}{ext}")
-
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    try:
+        staged = await attachment_storage.stage_stream(file.file)
+    except attachment_storage.UploadTooLarge:
+        raise HTTPException(
+            status_code=413, detail=f"File exceeds the {settings.ATTACHMENT_MAX_BYTES // 1024 ** 2} MB upload limit",
+        )
+    try:
+        file_path = await attachment_storage.store(db, staged)
+    except BaseException:
+        await attachment_storage.discard(staged)
+        raise
 
     att = Attachment(
         attachable_type=attachable_type,
         attachable_id=uuid.UUID(attachable_id),
         file_name=file.filename or "unnamed",
         file_path=file_path,
-        file_size=len(content),
+        file_size=staged.size,
+        sha256=staged.sha256,
         content_type=file.content_type,
     )
     db.add(att)
     await db.flush()
     await db.refresh(att)
 
-    return {"id": str(att.id), "file_name": att.file_name, "file_size": att.file_size}
+    return {"id": str(att.id), "file_name": att.file_name, "file_size": att.file_size, "sha256": att.sha256}
+
+
+@router.post("/by-hash", status_code=201)
+async def attach_by_hash(
+    body: AttachByHash,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Attach content that is already stored, without uploading it again.
+    404 means the client has to fall back to a normal upload."""
+    blob = await attachment_storage.reference(db, body.sha256.lower())
+    if not blob:
+        raise HTTPException(status_code=404, detail="Content not stored")
+    att = Attachment(
+        attachable_type=body.attachable_type,
+        attachable_id=body.attachable_id,
+        file_name=body.file_name,
+        file_path=attachment_storage.blob_path(blob.sha256),
+        file_size=blob.size,
+        sha256=blob.sha256,
+        content_type=body.content_type,
+    )
+    db.add(att)
+    await db.flush()
+    await db.refresh(att)
+
+    return {"id": str(att.id), "file_name": att.file_name, "file_size": att.file_size, "sha256": att.sha256}
+
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
 
-@router.get("/{att_id}/download")
-async def download_attachment(att_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+
+@router.api_route("/{att_id}/download", methods=["GET", "HEAD"])
+async def download_attachment(
+    att_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
     result = await db.execute(select(Attachment).where(Attachment.id == att_id))
     att = result.scalar_one_or_none()
     if not att:
         raise HTTPException(status_code=404, detail="Attachment not found")
-    return FileResponse(att.file_path, filename=att.file_name, media_type=att.content_type)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, att.file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Attachment file missing")
+
+    headers = {}
+    if attachment_storage.in_store(att):
+        # Blob content never changes for a given attachment: the hash is a
+        # strong validator and the response can be cached indefinitely.
+        headers["ETag"] = f'"{att.sha256}"'
+        headers["Cache-Control"] = "private, max-age=31536000, immutable"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    else:
+        headers["Cache-Control"] = "private, no-cache"
+
+    # FileResponse serves Range requests (single -> 206, several ->
+    # multipart/byteranges), honours If-Range against the ETag above and
+    # uses the server's zero-copy pathsend extension for full responses.
+    return FileResponse(
+        att.file_path, filename=att.file_name, media_type=att.content_type,
+        headers=headers, stat_result=stat_result,
+    )
 
 
 @router.delete("/{att_id}", status_code=204)
@@ -79,6 +197,98 @@ async def delete_attachment(att_id: uuid.UUID, db: AsyncSession = Depends(get_db
     att = result.scalar_one_or_none()
     if not att:
         raise HTTPException(status_code=404, detail="Attachment not found")
-    if os.path.exists(att.file_path):
-        os.remove(att.file_path)
     await db.delete(att)
+    if not attachment_storage.in_store(att):
+        await attachment_storage.remove(att.file_path)
+        return
+    await attachment_storage.release(db, att.sha256)
+    await db.commit()
+    await attachment_storage.collect(db, att.sha256)
+
+
+# --- Resumable uploads ---
+# POST /uploads -> PUT /uploads/{id}?offset=N (raw bytes, any order, in
+# parallel) -> POST /uploads/{id}/complete. GET /uploads/{id} reports the
+# received byte ranges so a client can resume after a failure.
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(body: UploadSessionCreate, user: User = Depends(get_current_user)):
+    if body.size > settings.ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"File exceeds the {settings.ATTACHMENT_MAX_BYTES // 1024 ** 2} MB upload limit",
+        )
+    meta = await upload_sessions.create(
+        file_name=body.file_name, content_type=body.content_type, size=body.size,
+        attachable_type=body.attachable_type, attachable_id=body.attachable_id,
+        sha256=body.sha256, user_id=user.id,
+    )
+    return _session_response(meta, [], upload_sessions.expires_from_now())
+
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(session_id: uuid.UUID, user: User = Depends(get_current_user)):
+    return _session_response(*await _session_for(session_id, user))
+
+
+@router.put("/uploads/{session_id}", status_code=204)
+async def put_upload_chunk(
+    session_id: uuid.UUID,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    user: User = Depends(get_current_user),
+):
+    await _session_for(session_id, user)
+    try:
+        await upload_sessions.write_chunk(session_id, offset, request.stream())
+    except upload_sessions.SessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.SessionBusy:
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+    except upload_sessions.InvalidChunk as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/uploads/{session_id}/complete", status_code=201)
+async def complete_upload_session(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    await _session_for(session_id, user)
+    try:
+        meta, staged = await upload_sessions.begin_finalize(session_id)
+    except upload_sessions.SessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.SessionBusy:
+        raise HTTPException(status_code=409, detail="Upload is already being completed or still receiving a chunk")
+    except upload_sessions.InvalidChunk as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        file_path = await attachment_storage.store(db, staged, keep_source=True)
+        att = Attachment(
+            attachable_type=meta.attachable_type,
+            attachable_id=uuid.UUID(meta.attachable_id),
+            file_name=meta.file_name,
+            file_path=file_path,
+            file_size=staged.size,
+            sha256=staged.sha256,
+            content_type=meta.content_type,
+        )
+        db.add(att)
+        await db.flush()
+        await db.refresh(att)
+        await db.commit()
+    except BaseException:
+        await upload_sessions.abort_finalize(session_id)
+        raise
+    await upload_sessions.cleanup(session_id)
+
+    return {"id": str(att.id), "file_name": att.file_name, "file_size": att.file_size, "sha256": att.sha256}
+
+
+@router.delete("/uploads/{session_id}", status_code=204)
+async def abort_upload_session(session_id: uuid.UUID, user: User = Depends(get_current_user)):
+    await _session_for(session_id, user)
+    await upload_sessions.cleanup(session_id)
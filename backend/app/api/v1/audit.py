@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.audit_log import AuditLog
 from app.models.user import User
 
@@ -29,11 +30,13 @@ class AuditLogResponse(BaseModel):
 
 @router.get("", response_model=list[AuditLogResponse])
 async def list_audit_logs(
+    response: Response,
     entity_type: str | None = Query(None),
     entity_id: uuid.UUID | None = Query(None),
     action: str | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
@@ -44,11 +47,7 @@ async def list_audit_logs(
         query = query.where(AuditLog.entity_id == entity_id)
     if action:
         query = query.where(AuditLog.action == action)
-    items = (
-        await db.execute(
-            query.order_by(AuditLog.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-    ).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=AuditLog.created_at, id_key=AuditLog.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.checklist import Checklist, ChecklistItem
 from app.models.user import User
 
@@ -71,23 +72,21 @@ class ChecklistResponse(BaseModel):
 
 @router.get("", response_model=list[ChecklistResponse])
 async def list_checklists(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(Checklist).where(Checklist.archived_at.is_(None))
     if organization_id:
         query = query.where(Checklist.organization_id == organization_id)
-    items = (
-        await db.execute(
-            query.order_by(Checklist.name)
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-    ).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Checklist.name, id_key=Checklist.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=ChecklistResponse, status_code=status.HTTP_201_CREATED)
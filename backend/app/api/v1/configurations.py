@@ -1,11 +1,12 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.configuration import Configuration
 from app.models.user import User
 from app.schemas.configuration import ConfigurationCreate, ConfigurationUpdate, ConfigurationResponse
@@ -15,9 +16,11 @@ router = APIRouter(prefix="/configurations", tags=["configurations"])
 
 @router.get("", response_model=list[ConfigurationResponse])
 async def list_configurations(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     search: str = Query("", max_length=255),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
@@ -27,8 +30,10 @@ async def list_configurations(
         query = query.where(Configuration.organization_id == organization_id)
     if search:
         query = query.where(Configuration.name.ilike(f"%{search}%"))
-    items = (await db.execute(query.order_by(Configuration.name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Configuration.name, id_key=Configuration.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=ConfigurationResponse, status_code=status.HTTP_201_CREATED)
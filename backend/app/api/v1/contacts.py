@@ -1,11 +1,12 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.contact import Contact
 from app.models.user import User
 from app.schemas.contact import ContactCreate, ContactUpdate, ContactResponse
@@ -15,17 +16,21 @@ router = APIRouter(prefix="/contacts", tags=["contacts"])
 
 @router.get("", response_model=list[ContactResponse])
 async def list_contacts(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(Contact).where(Contact.archived_at.is_(None))
     if organization_id:
         query = query.where(Contact.organization_id == organization_id)
-    items = (await db.execute(query.order_by(Contact.last_name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Contact.last_name, id_key=Contact.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
@@ -1,18 +1,21 @@
+import asyncio
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.document import Document
 from app.models.document_version import DocumentVersion
 from app.models.document_template import DocumentTemplate
 from app.models.document_folder import DocumentFolder
 from app.models.user import User
+from app.services import document_versions
 from app.schemas.document import (
-    DocumentCreate, DocumentUpdate, DocumentResponse, DocumentVersionResponse,
+    DocumentCreate, DocumentUpdate, DocumentResponse, DocumentVersionResponse, DocumentVersionSummary, DocumentDiffResponse,
     DocumentFolderCreate, DocumentFolderResponse, DocumentTemplateCreate, DocumentTemplateResponse,
 )
 
@@ -67,10 +70,12 @@ async def create_template(body: DocumentTemplateCreate, db: AsyncSession = Depen
 
 @router.get("", response_model=list[DocumentResponse])
 async def list_documents(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     folder_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     search: str = Query("", max_length=255),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
@@ -82,8 +87,10 @@ async def list_documents(
         query = query.where(Document.folder_id == folder_id)
     if search:
         query = query.where(Document.title.ilike(f"%{search}%"))
-    items = (await db.execute(query.order_by(Document.updated_at.desc()).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Document.updated_at, id_key=Document.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
@@ -91,7 +98,10 @@ async def create_document(body: DocumentCreate, db: AsyncSession = Depends(get_d
     doc = Document(**body.model_dump(), version=1)
     db.add(doc)
     await db.flush()
-    version = DocumentVersion(document_id=doc.id, version=1, content=doc.content, change_summary="Initial version")
+    version = DocumentVersion(
+        document_id=doc.id, version=1, content=doc.content,
+        content_size=document_versions.content_size(doc.content), change_summary="Initial version",
+    )
     db.add(version)
     await db.flush()
     await db.refresh(doc)
@@ -109,18 +119,16 @@ async def get_document(doc_id: uuid.UUID, db: AsyncSession = Depends(get_db), _:
 
 @router.put("/{doc_id}", response_model=DocumentResponse)
 async def update_document(doc_id: uuid.UUID, body: DocumentUpdate, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
-    result = await db.execute(select(Document).where(Document.id == doc_id))
+    # Row lock: concurrent saves would otherwise race on the version chain.
+    result = await db.execute(select(Document).where(Document.id == doc_id).with_for_update())
     doc = result.scalar_one_or_none()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
     if body.content is not None and body.content != doc.content:
-        doc.version += 1
-        version = DocumentVersion(
-            document_id=doc.id, version=doc.version,
-            content=body.content, change_summary=body.change_summary or f"Version {doc.version}",
+        await document_versions.record_version(
+            db, doc, body.content, body.change_summary or f"Version {doc.version + 1}",
         )
-        db.add(version)
         doc.content = body.content
 
     if body.title is not None:
@@ -142,9 +150,41 @@ async def delete_document(doc_id: uuid.UUID, db: AsyncSession = Depends(get_db),
     await db.delete(doc)
 
 
-@router.get("/{doc_id}/versions", response_model=list[DocumentVersionResponse])
+@router.get("/{doc_id}/versions", response_model=list[DocumentVersionSummary])
 async def list_versions(doc_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+    # `content` is deferred on the model, so this never reads the blobs.
     result = await db.execute(
         select(DocumentVersion).where(DocumentVersion.document_id == doc_id).order_by(DocumentVersion.version.desc())
     )
     return result.scalars().all()
+
+
+async def _materialize(db: AsyncSession, doc_id: uuid.UUID, version: int) -> DocumentVersion:
+    try:
+        item = await document_versions.materialize(db, doc_id, version)
+    except document_versions.VersionCorruptError:
+        raise HTTPException(
+            status_code=409, detail=f"Version {version} cannot be reconstructed: its stored history is corrupt",
+        )
+    if not item:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return item
+
+
+@router.get("/{doc_id}/versions/{version}", response_model=DocumentVersionResponse)
+async def get_version(doc_id: uuid.UUID, version: int, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+    return await _materialize(db, doc_id, version)
+
+
+@router.get("/{doc_id}/diff", response_model=DocumentDiffResponse)
+async def diff_versions(
+    doc_id: uuid.UUID,
+    from_version: int = Query(..., ge=1),
+    to_version: int = Query(..., ge=1),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    old = await _materialize(db, doc_id, from_version)
+    new = await _materialize(db, doc_id, to_version)
+    ops = await asyncio.to_thread(document_versions.diff, old.content, new.content)
+    return DocumentDiffResponse(from_version=from_version, to_version=to_version, ops=ops)
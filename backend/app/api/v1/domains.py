@@ -1,34 +1,38 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.domain import Domain
 from app.models.user import User
-from datetime import datetime, timezone
 
 from app.schemas.domain import DomainCreate, DomainUpdate, DomainResponse, DomainProbeResponse
-from app.services.domain_probe import probe_domain
+from app.services.domain_probe import apply_probe, probe_domain
 
 router = APIRouter(prefix="/domains", tags=["domains"])
 
 
 @router.get("", response_model=list[DomainResponse])
 async def list_domains(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(Domain).where(Domain.archived_at.is_(None))
     if organization_id:
         query = query.where(Domain.organization_id == organization_id)
-    items = (await db.execute(query.order_by(Domain.domain_name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Domain.domain_name, id_key=Domain.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=DomainResponse, status_code=status.HTTP_201_CREATED)
@@ -89,14 +93,7 @@ async def probe_domain_endpoint(
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"RDAP probe failed: {e}")
 
-    if info["registrar"]:
-        item.registrar = info["registrar"]
-    if info["registration_date"]:
-        item.registration_date = info["registration_date"]
-    if info["expiration_date"]:
-        item.expiration_date = info["expiration_date"]
-    item.whois_data = info["raw"]
-    item.last_probed_at = datetime.now(timezone.utc)
+    apply_probe(item, info)
 
     await db.flush()
     await db.refresh(item)
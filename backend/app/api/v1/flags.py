@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.flag import Flag
 from app.models.user import User
 
@@ -38,11 +39,13 @@ class FlagResponse(BaseModel):
 
 @router.get("", response_model=list[FlagResponse])
 async def list_flags(
+    response: Response,
     entity_type: str | None = Query(None),
     entity_id: uuid.UUID | None = Query(None),
     flag_type: str | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
@@ -53,14 +56,10 @@ async def list_flags(
         query = query.where(Flag.entity_id == entity_id)
     if flag_type:
         query = query.where(Flag.flag_type == flag_type)
-    items = (
-        await db.execute(
-            query.order_by(Flag.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-    ).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Flag.created_at, id_key=Flag.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=FlagResponse, status_code=status.HTTP_201_CREATED)
@@ -1,11 +1,12 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.flexible_asset import FlexibleAsset
 from app.models.user import User
 from app.schemas.flexible_asset import FlexibleAssetCreate, FlexibleAssetUpdate, FlexibleAssetResponse
@@ -15,10 +16,12 @@ router = APIRouter(prefix="/flexible-assets", tags=["flexible-assets"])
 
 @router.get("", response_model=list[FlexibleAssetResponse])
 async def list_assets(
+    response: Response,
     asset_type_id: uuid.UUID | None = Query(None),
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
@@ -27,8 +30,10 @@ async def list_assets(
         query = query.where(FlexibleAsset.asset_type_id == asset_type_id)
     if organization_id:
         query = query.where(FlexibleAsset.organization_id == organization_id)
-    items = (await db.execute(query.order_by(FlexibleAsset.name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=FlexibleAsset.name, id_key=FlexibleAsset.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=FlexibleAssetResponse, status_code=status.HTTP_201_CREATED)
@@ -1,11 +1,12 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.location import Location
 from app.models.user import User
 from app.schemas.location import LocationCreate, LocationUpdate, LocationResponse
@@ -15,17 +16,21 @@ router = APIRouter(prefix="/locations", tags=["locations"])
 
 @router.get("", response_model=list[LocationResponse])
 async def list_locations(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(Location).where(Location.archived_at.is_(None))
     if organization_id:
         query = query.where(Location.organization_id == organization_id)
-    items = (await db.execute(query.order_by(Location.name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Location.name, id_key=Location.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=LocationResponse, status_code=status.HTTP_201_CREATED)
@@ -1,12 +1,15 @@
+import re
 import uuid
 import math
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate
 from app.models.organization import Organization
 from app.models.user import User
 from app.schemas.organization import (
@@ -15,14 +18,17 @@ from app.schemas.organization import (
     OrganizationResponse,
     OrganizationListResponse,
 )
+from app.services import attachment_export
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
 
 @router.get("", response_model=OrganizationListResponse)
 async def list_organizations(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     search: str = Query("", max_length=255),
     parent_id: uuid.UUID | None = Query(None),
     db: AsyncSession = Depends(get_db),
@@ -39,9 +45,15 @@ async def list_organizations(
         count_query = count_query.where(Organization.parent_id == parent_id)
 
     total = (await db.execute(count_query)).scalar() or 0
-    items = (await db.execute(query.order_by(Organization.name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
+    items = await paginate(
+        db, query, response, sort_key=Organization.name, id_key=Organization.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
-    return OrganizationListResponse(items=items, total=total, page=page, page_size=page_size)
+    return OrganizationListResponse(
+        items=items, total=total, page=page, page_size=page_size,
+        next_cursor=response.headers.get(NEXT_CURSOR_HEADER),
+    )
 
 
 @router.post("", response_model=OrganizationResponse, status_code=status.HTTP_201_CREATED)
@@ -102,3 +114,27 @@ async def delete_organization(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
 
     await db.delete(org)
+
+
+@router.get("/{org_id}/attachments.zip")
+async def export_attachments_zip(org_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+    return await _export_attachments(db, org_id, "zip")
+
+
+@router.get("/{org_id}/attachments.tar")
+async def export_attachments_tar(org_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+    return await _export_attachments(db, org_id, "tar")
+
+
+async def _export_attachments(db: AsyncSession, org_id: uuid.UUID, fmt: str) -> StreamingResponse:
+    org = (await db.execute(select(Organization).where(Organization.id == org_id))).scalar_one_or_none()
+    if not org:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
+    # Rows are read now: the session is gone once the response starts streaming.
+    items = await attachment_export.list_items(db, org_id)
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", org.name).strip("-") or "organization"
+    return StreamingResponse(
+        attachment_export.stream_archive(items, fmt),
+        media_type=attachment_export.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{slug}-attachments.{fmt}"'},
+    )
@@ -1,21 +1,30 @@
+import asyncio
+import re
 import uuid
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.core.encryption import encrypt, decrypt
+from app.models.organization import Organization
 from app.models.password import Password
 from app.models.password_category import PasswordCategory
 from app.models.password_audit import PasswordAccessLog
+from app.models.password_share import PasswordShareLink
 from app.models.user import User
 from app.schemas.password import (
     PasswordCreate, PasswordUpdate, PasswordResponse, PasswordRevealResponse,
     PasswordAccessLogResponse, PasswordCategoryCreate, PasswordCategoryResponse,
+    PasswordBatchRevealRequest, PasswordBatchRevealResponse, PasswordRevealItem, PasswordExportRequest,
+    PasswordShareLinkCreate, PasswordShareLinkResponse, PasswordShareLinkCreated,
 )
-from app.services.password_service import log_access
+from app.services import share_links
+from app.services.password_service import ExportRow, build_export, decrypt_many, log_access, log_access_many
 
 router = APIRouter(prefix="/passwords", tags=["passwords"])
 
@@ -56,10 +65,12 @@ async def delete_category(cat_id: uuid.UUID, db: AsyncSession = Depends(get_db),
 
 @router.get("", response_model=list[PasswordResponse])
 async def list_passwords(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     category_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     search: str = Query("", max_length=255),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
@@ -71,8 +82,10 @@ async def list_passwords(
         query = query.where(Password.category_id == category_id)
     if search:
         query = query.where(Password.name.ilike(f"%{search}%"))
-    items = (await db.execute(query.order_by(Password.name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Password.name, id_key=Password.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=PasswordResponse, status_code=status.HTTP_201_CREATED)
@@ -88,6 +101,54 @@ async def create_password(body: PasswordCreate, request: Request, db: AsyncSessi
     return pw
 
 
+@router.post("/reveal", response_model=PasswordBatchRevealResponse)
+async def reveal_passwords(
+    body: PasswordBatchRevealRequest, request: Request, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user),
+):
+    ids = list(dict.fromkeys(body.ids))
+    rows = await db.execute(select(Password.id, Password.password_encrypted).where(Password.id.in_(ids)))
+    encrypted = dict(rows.all())
+    revealed = [pid for pid in ids if pid in encrypted and encrypted[pid]]
+    await log_access_many(db, revealed, user.id, "reveal", request.client.host if request.client else None)
+    plain = decrypt_many(encrypted)
+    return PasswordBatchRevealResponse(
+        passwords=[PasswordRevealItem(id=pid, password=plain[pid]) for pid in ids if pid in plain],
+        not_found=[pid for pid in ids if pid not in plain],
+    )
+
+
+@router.post("/export")
+async def export_passwords(
+    body: PasswordExportRequest, request: Request, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user),
+):
+    org = (await db.execute(select(Organization).where(Organization.id == body.organization_id))).scalar_one_or_none()
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    result = await db.execute(
+        select(
+            Password.id, PasswordCategory.name, Password.name, Password.username, Password.password_encrypted,
+            Password.url, Password.notes, Password.updated_at, Password.created_at,
+        )
+        .outerjoin(PasswordCategory, Password.category_id == PasswordCategory.id)
+        .where(Password.organization_id == org.id, Password.archived_at.is_(None))
+        .order_by(PasswordCategory.name.nulls_first(), Password.name)
+    )
+    ids, rows = [], []
+    for pid, category, *fields in result.all():
+        ids.append(pid)
+        rows.append(ExportRow(f"{org.name}/{category}" if category else org.name, *fields))
+    await log_access_many(db, ids, user.id, "export", request.client.host if request.client else None)
+
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", org.name).strip("-") or "organization"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    data = await asyncio.to_thread(build_export, rows, body.passphrase, f"{slug}-passwords.csv")
+    return Response(
+        data,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{slug}-passwords-{stamp}.zip"', "Cache-Control": "no-store"},
+    )
+
+
 @router.get("/{item_id}", response_model=PasswordResponse)
 async def get_password(item_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
     result = await db.execute(select(Password).where(Password.id == item_id))
@@ -145,3 +206,51 @@ async def get_audit_log(item_id: uuid.UUID, db: AsyncSession = Depends(get_db),
         .limit(100)
     )
     return result.scalars().all()
+
+
+# --- Share links ---
+
+@router.post("/{item_id}/share-links", response_model=PasswordShareLinkCreated, status_code=status.HTTP_201_CREATED)
+async def create_share_link(
+    item_id: uuid.UUID, body: PasswordShareLinkCreate, request: Request,
+    db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user),
+):
+    item = (await db.execute(select(Password.id).where(Password.id == item_id))).scalar_one_or_none()
+    if not item:
+        raise HTTPException(status_code=404, detail="Password not found")
+    token, token_hash = share_links.new_token()
+    link = PasswordShareLink(
+        password_id=item_id, token_hash=token_hash, max_views=body.max_views, created_by=user.id,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=body.expires_in_hours) if body.expires_in_hours else None,
+    )
+    db.add(link)
+    await db.flush()
+    await db.refresh(link)
+    await log_access(db, item_id, user.id, "share", request.client.host if request.client else None)
+    return PasswordShareLinkCreated(**PasswordShareLinkResponse.model_validate(link).model_dump(), token=token)
+
+
+@router.get("/{item_id}/share-links", response_model=list[PasswordShareLinkResponse])
+async def list_share_links(item_id: uuid.UUID, db: AsyncSession = Depends(get_db), _: User = Depends(get_current_user)):
+    result = await db.execute(
+        select(PasswordShareLink)
+        .where(PasswordShareLink.password_id == item_id)
+        .order_by(PasswordShareLink.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+@router.delete("/{item_id}/share-links/{link_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_share_link(
+    item_id: uuid.UUID, link_id: uuid.UUID, request: Request,
+    db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user),
+):
+    result = await db.execute(
+        select(PasswordShareLink).where(PasswordShareLink.id == link_id, PasswordShareLink.password_id == item_id)
+    )
+    link = result.scalar_one_or_none()
+    if not link:
+        raise HTTPException(status_code=404, detail="Share link not found")
+    link.is_active = False
+    await db.flush()
+    await log_access(db, item_id, user.id, "share_revoke", request.client.host if request.client else None)
@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import select, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.relationship import Relationship
 from app.models.user import User
 
@@ -41,12 +42,14 @@ class RelationshipResponse(BaseModel):
 
 @router.get("", response_model=list[RelationshipResponse])
 async def list_relationships(
+    response: Response,
     source_type: str | None = Query(None),
     source_id: uuid.UUID | None = Query(None),
     target_type: str | None = Query(None),
     target_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
@@ -59,14 +62,10 @@ async def list_relationships(
         query = query.where(Relationship.target_type == target_type)
     if target_id:
         query = query.where(Relationship.target_id == target_id)
-    items = (
-        await db.execute(
-            query.order_by(Relationship.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-    ).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Relationship.created_at, id_key=Relationship.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
 
 
 @router.post("", response_model=RelationshipResponse, status_code=status.HTTP_201_CREATED)
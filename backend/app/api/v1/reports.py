@@ -17,6 +17,7 @@ from app.models.checklist import Checklist
 from app.models.runbook import Runbook
 from app.models.audit_log import AuditLog
 from app.models.user import User
+from app.services.audit_retention import activity_totals
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -41,9 +42,16 @@ class ActivityEntry(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ActivityCount(BaseModel):
+    entity_type: str
+    action: str
+    count: int
+
+
 class ActivityReport(BaseModel):
     entries: list[ActivityEntry]
     total: int
+    counts: list[ActivityCount] = []
 
 
 @router.get("/coverage", response_model=CoverageReport)
@@ -97,7 +105,9 @@ async def activity_report(
         for e in entries_raw
     ]
 
-    count_result = await db.execute(select(func.count()).select_from(AuditLog))
-    total = count_result.scalar() or 0
-
-    return ActivityReport(entries=entries, total=total)
+    totals = await activity_totals(db)
+    counts = [
+        ActivityCount(entity_type=entity_type, action=action, count=n)
+        for (entity_type, action), n in sorted(totals.items(), key=lambda item: -item[1])
+    ]
+    return ActivityReport(entries=entries, total=sum(totals.values()), counts=counts)
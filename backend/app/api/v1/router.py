@@ -26,6 +26,8 @@ from app.api.v1.meshcentral import router as mesh_router
 from app.api.v1.systems import router as systems_router
 from app.api.v1.dns import router as dns_router
 from app.api.v1.registrars import router as registrars_router
+from app.api.v1.share import router as share_router
+from app.api.v1.scheduler import router as scheduler_router
 
 api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth_router)
@@ -54,3 +56,5 @@ api_router.include_router(mesh_router)
 api_router.include_router(systems_router)
 api_router.include_router(dns_router)
 api_router.include_router(registrars_router)
+api_router.include_router(share_router)
+api_router.include_router(scheduler_router)
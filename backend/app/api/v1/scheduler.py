@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.models.user import User
+from app.services import scheduler
+
+router = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+
+# --- Schemas ---
+
+class ScheduledJobRunResponse(BaseModel):
+    id: uuid.UUID
+    job_id: str
+    status: str
+    trigger: str
+    worker: str | None = None
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_ms: int | None = None
+    result: dict | None = None
+    error: str | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class ScheduledJobResponse(BaseModel):
+    id: str
+    description: str
+    interval_minutes: int
+    enabled: bool
+    next_run_at: datetime | None = None
+    last_run: ScheduledJobRunResponse | None = None
+
+
+# --- Endpoints ---
+
+@router.get("/jobs", response_model=list[ScheduledJobResponse])
+async def list_jobs(
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    result = await db.execute(
+        select(ScheduledJobRun)
+        .distinct(ScheduledJobRun.job_id)
+        .order_by(ScheduledJobRun.job_id, ScheduledJobRun.started_at.desc())
+    )
+    last_runs = {run.job_id: run for run in result.scalars()}
+    next_runs = scheduler.next_run_times()
+    return [
+        ScheduledJobResponse(
+            id=job_id,
+            description=job.description,
+            interval_minutes=scheduler.interval_minutes(job_id),
+            enabled=scheduler.interval_minutes(job_id) > 0,
+            next_run_at=next_runs.get(job_id),
+            last_run=last_runs.get(job_id),
+        )
+        for job_id, job in scheduler.JOBS.items()
+    ]
+
+
+@router.post("/jobs/{job_id}/run", status_code=status.HTTP_202_ACCEPTED)
+async def run_job(
+    job_id: str,
+    _: User = Depends(get_current_user),
+):
+    """Start a run now. It is skipped if the job is already running; see
+    GET /scheduler/runs for the outcome."""
+    if job_id not in scheduler.JOBS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    scheduler.trigger(job_id)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/runs", response_model=list[ScheduledJobRunResponse])
+async def list_runs(
+    response: Response,
+    job_id: str | None = Query(None),
+    run_status: str | None = Query(None, alias="status", pattern="^(running|succeeded|failed)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    query = select(ScheduledJobRun)
+    if job_id:
+        query = query.where(ScheduledJobRun.job_id == job_id)
+    if run_status:
+        query = query.where(ScheduledJobRun.status == run_status)
+    return await paginate(
+        db, query, response, sort_key=ScheduledJobRun.started_at, id_key=ScheduledJobRun.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
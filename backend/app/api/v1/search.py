@@ -1,29 +1,35 @@
+import html
+import re
 import uuid
 
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
-from sqlalchemy import select, union_all, literal_column, cast, String
+from sqlalchemy import select, union_all, literal, cast, null, func, or_, text, Float, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
-from app.models.organization import Organization
-from app.models.configuration import Configuration
-from app.models.password import Password
-from app.models.document import Document
-from app.models.domain import Domain
-from app.models.contact import Contact
-from app.models.location import Location
-from app.models.ssl_certificate import SSLCertificate
+from app.models.search_index import SearchIndexEntry
 from app.models.user import User
+from app.services import search_index
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# ts_headline delimiters; control characters are stripped from indexed text,
+# so they can be swapped for markup after escaping the excerpt.
+_SEL_START, _SEL_STOP = "\x02", "\x03"
+_HEADLINE_OPTIONS = f"StartSel={_SEL_START}, StopSel={_SEL_STOP}, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter= … "
+
 
 class SearchResult(BaseModel):
     entity_type: str
     entity_id: uuid.UUID
     name: str
+    # HTML-escaped excerpt of the matching body text, hits wrapped in <mark>
+    snippet: str | None = None
 
     model_config = {"from_attributes": True}
 
@@ -31,6 +37,28 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     results: list[SearchResult]
     total: int
+    counts: dict[str, int] = {}
+
+
+class SuggestResponse(BaseModel):
+    q: str
+    results: list[SearchResult]
+
+
+def _render_snippet(raw: str | None) -> str | None:
+    if not raw or _SEL_START not in raw:
+        return None
+    return html.escape(raw).replace(_SEL_START, "<mark>").replace(_SEL_STOP, "</mark>")
+
+
+def prefix_tsquery(q: str) -> str | None:
+    """Turn free text into a safe `to_tsquery` string where every token is a
+    prefix match (``"exch serv"`` -> ``"exch:* & serv:*"``), so partially
+    typed words still hit the index. Returns None when nothing is left."""
+    tokens = _TOKEN_RE.findall(q.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{t}:*" for t in tokens)
 
 
 @router.get("", response_model=SearchResponse)
@@ -38,110 +66,150 @@ async def global_search(
     q: str = Query("", min_length=1, max_length=255),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    organization_id: uuid.UUID | None = Query(None),
+    entity_type: str | None = Query(None, max_length=50),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     pattern = f"%{q}%"
-
-    # Build individual queries for each entity type
-    org_q = (
+    tsquery_text = prefix_tsquery(q)
+    idx = SearchIndexEntry
+
+    # Served by the GIN index on search_vector and/or the trigram index on
+    # title; rank combines both signals.
+    match = idx.title.ilike(pattern)
+    rank = func.similarity(idx.title, q)
+    tsq = None
+    if tsquery_text:
+        tsq = func.to_tsquery("simple", tsquery_text)
+        match = or_(idx.search_vector.op("@@")(tsq), match)
+        rank = rank + func.ts_rank(idx.search_vector, tsq)
+
+    hits_q = (
         select(
-            literal_column("'organization'").label("entity_type"),
-            Organization.id.label("entity_id"),
-            Organization.name.label("name"),
+            idx.entity_type,
+            idx.entity_id,
+            idx.title.label("name"),
+            idx.body,
+            cast(rank, Float).label("rank"),
         )
-        .where(Organization.name.ilike(pattern))
-        .where(Organization.archived_at.is_(None))
+        .where(match)
+        .where(idx.archived.is_(False))
     )
-
-    config_q = (
-        select(
-            literal_column("'configuration'").label("entity_type"),
-            Configuration.id.label("entity_id"),
-            Configuration.name.label("name"),
-        )
-        .where(Configuration.name.ilike(pattern))
-        .where(Configuration.archived_at.is_(None))
+    if organization_id:
+        hits_q = hits_q.where(idx.organization_id == organization_id)
+    if entity_type:
+        hits_q = hits_q.where(idx.entity_type == entity_type)
+    hits = hits_q.cte("hits")
+
+    # One round trip: the requested page of ranked hits, followed by one
+    # count row per entity type, so the total never needs a second scan.
+    # Snippets are only built for the rows on the page.
+    page_rows = (
+        select(hits)
+        .order_by(hits.c.rank.desc(), hits.c.name)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .subquery()
     )
-
-    password_q = (
+    combined = union_all(
         select(
-            literal_column("'password'").label("entity_type"),
-            Password.id.label("entity_id"),
-            Password.name.label("name"),
-        )
-        .where(Password.name.ilike(pattern))
-        .where(Password.archived_at.is_(None))
-    )
-
-    document_q = (
+            literal("hit").label("kind"),
+            page_rows.c.entity_type,
+            page_rows.c.entity_id,
+            page_rows.c.name,
+            page_rows.c.rank,
+            (
+                func.ts_headline("simple", page_rows.c.body, tsq, _HEADLINE_OPTIONS)
+                if tsq is not None else cast(null(), Text)
+            ).label("snippet"),
+            cast(null(), Integer).label("n"),
+        ),
         select(
-            literal_column("'document'").label("entity_type"),
-            Document.id.label("entity_id"),
-            Document.title.label("name"),
-        )
-        .where(Document.title.ilike(pattern))
-        .where(Document.archived_at.is_(None))
-    )
-
-    domain_q = (
-        select(
-            literal_column("'domain'").label("entity_type"),
-            Domain.id.label("entity_id"),
-            Domain.domain_name.label("name"),
-        )
-        .where(Domain.domain_name.ilike(pattern))
-        .where(Domain.archived_at.is_(None))
-    )
-
-    contact_q = (
-        select(
-            literal_column("'contact'").label("entity_type"),
-            Contact.id.label("entity_id"),
-            Contact.first_name.label("name"),
-        )
-        .where(
-            (Contact.first_name.ilike(pattern)) | (Contact.last_name.ilike(pattern)) | (Contact.email.ilike(pattern))
-        )
-        .where(Contact.archived_at.is_(None))
-    )
-
-    location_q = (
-        select(
-            literal_column("'location'").label("entity_type"),
-            Location.id.label("entity_id"),
-            Location.name.label("name"),
-        )
-        .where(Location.name.ilike(pattern))
-        .where(Location.archived_at.is_(None))
-    )
-
-    ssl_q = (
-        select(
-            literal_column("'ssl_certificate'").label("entity_type"),
-            SSLCertificate.id.label("entity_id"),
-            SSLCertificate.common_name.label("name"),
-        )
-        .where(SSLCertificate.common_name.ilike(pattern))
-        .where(SSLCertificate.archived_at.is_(None))
-    )
-
-    combined = union_all(org_q, config_q, password_q, document_q, domain_q, contact_q, location_q, ssl_q).subquery()
-
-    # Count total
-    from sqlalchemy import func
-    count_result = await db.execute(select(func.count()).select_from(combined))
-    total = count_result.scalar() or 0
-
-    # Paginated results
-    result = await db.execute(
-        select(combined).offset((page - 1) * page_size).limit(page_size)
-    )
-    rows = result.all()
-
-    results = [
-        SearchResult(entity_type=row.entity_type, entity_id=row.entity_id, name=row.name)
-        for row in rows
-    ]
-
-    return SearchResponse(results=results, total=total)
+            literal("count").label("kind"),
+            hits.c.entity_type,
+            cast(null(), UUID(as_uuid=True)),
+            cast(null(), String),
+            cast(null(), Float),
+            cast(null(), Text),
+            func.count().label("n"),
+        ).group_by(hits.c.entity_type),
+    ).subquery()
+
+    rows = (
+        await db.execute(select(combined).order_by(combined.c.kind.desc(), combined.c.rank.desc(), combined.c.name))
+    ).all()
+
+    results: list[SearchResult] = []
+    counts: dict[str, int] = {}
+    for row in rows:
+        if row.kind == "hit":
+            results.append(SearchResult(
+                entity_type=row.entity_type,
+                entity_id=row.entity_id,
+                name=row.name,
+                snippet=_render_snippet(row.snippet),
+            ))
+        else:
+            counts[row.entity_type] = row.n
+
+    return SearchResponse(results=results, total=sum(counts.values()), counts=counts)
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with `prefix`."""
+    last = ord(prefix[-1])
+    if last >= 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(last + 1)
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(5, ge=1, le=20),
+    organization_id: uuid.UUID | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Typeahead: up to `limit` title-prefix matches per entity type, no counts."""
+    prefix = q.strip().lower()
+    if not prefix:
+        return SuggestResponse(q=q, results=[])
+    key = (prefix, organization_id, limit)
+    cached = {t: search_index.suggest_cache[t].get(key) for t in search_index.ENTITY_TYPES}
+    missing = [t for t, hit in cached.items() if hit is None]
+
+    if missing:
+        idx = SearchIndexEntry
+        title = func.lower(idx.title)
+        upper = _prefix_upper_bound(prefix)
+        # Written to match ix_search_index_type_title_prefix exactly: `NOT
+        # archived` implies its partial-index predicate, the range operators
+        # and ORDER BY ... USING ~<~ are its text_pattern_ops operator class
+        # (so the index is used even under a generic prepared-statement
+        # plan), and each part stops after `limit` index entries.
+        parts = []
+        for entity_type in missing:
+            part = (
+                select(idx.entity_type, idx.entity_id, idx.title.label("name"))
+                .where(idx.entity_type == entity_type)
+                .where(~idx.archived)
+                .where(title.op("~>=~")(prefix))
+            )
+            if upper is not None:
+                part = part.where(title.op("~<~")(upper))
+            if organization_id:
+                part = part.where(idx.organization_id == organization_id)
+            part = part.order_by(text("lower(search_index.title) USING ~<~")).limit(limit).subquery()
+            parts.append(select(part))
+
+        found: dict[str, list[SearchResult]] = {t: [] for t in missing}
+        for r in (await db.execute(union_all(*parts))).all():
+            found[r.entity_type].append(SearchResult(entity_type=r.entity_type, entity_id=r.entity_id, name=r.name))
+        for entity_type, results in found.items():
+            search_index.suggest_cache[entity_type].set(key, results)
+            cached[entity_type] = results
+
+    results = [r for entity_type_results in cached.values() for r in entity_type_results]
+    return SuggestResponse(q=q, results=results)
@@ -0,0 +1,38 @@
+"""Public endpoint for opening password share links; the token is the
+only credential."""
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.encryption import decrypt
+from app.models.password import Password
+from app.schemas.password import SharedPasswordResponse
+from app.services import share_links
+from app.services.password_service import log_access
+
+router = APIRouter(prefix="/share", tags=["share"])
+
+
+# POST, so link previews and prefetchers cannot use up a view.
+@router.post("/{token}", response_model=SharedPasswordResponse)
+async def open_share_link(
+    request: Request, token: str = Path(min_length=16, max_length=128), db: AsyncSession = Depends(get_db),
+):
+    link = await share_links.consume(db, token)
+    if not link:
+        raise HTTPException(status_code=404, detail="Share link not found or expired")
+    item = (await db.execute(select(Password).where(Password.id == link.password_id))).scalar_one()
+    if item.archived_at is not None:
+        # Raising rolls back the view counted above.
+        raise HTTPException(status_code=404, detail="Share link not found or expired")
+    await log_access(db, item.id, link.created_by, "share_view", request.client.host if request.client else None)
+    return SharedPasswordResponse(
+        name=item.name,
+        url=item.url,
+        username=item.username,
+        password=decrypt(item.password_encrypted) if item.password_encrypted else "",
+        views_remaining=link.max_views - link.view_count if link.max_views is not None else None,
+        expires_at=link.expires_at,
+    )
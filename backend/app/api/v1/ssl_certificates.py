@@ -1,12 +1,17 @@
+import time
 import uuid
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.config import settings
+from app.core.database import async_session, get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.ssl_certificate import SSLCertificate
+from app.models.ssl_probe_result import SSLProbeResult
 from app.models.user import User
 from app.schemas.ssl_certificate import (
     SSLCertificateCreate,
@@ -14,26 +19,87 @@ from app.schemas.ssl_certificate import (
     SSLCertificateResponse,
     SSLProbeRequest,
     SSLProbeResponse,
+    SSLProbeResultResponse,
+    SSLCertificateChangeResponse,
 )
-from app.services.ssl_probe import probe_host, derive_host_from_common_name
-from datetime import datetime, timezone
+from app.services import scheduler, ssl_history
+from app.services.ssl_probe import apply_probe, probe_host, derive_host_from_common_name
 
 router = APIRouter(prefix="/ssl-certificates", tags=["ssl-certificates"])
 
 
 @router.get("", response_model=list[SSLCertificateResponse])
 async def list_ssl_certificates(
+    response: Response,
     organization_id: uuid.UUID | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(SSLCertificate).where(SSLCertificate.archived_at.is_(None))
     if organization_id:
         query = query.where(SSLCertificate.organization_id == organization_id)
-    items = (await db.execute(query.order_by(SSLCertificate.common_name).offset((page - 1) * page_size).limit(page_size))).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=SSLCertificate.common_name, id_key=SSLCertificate.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
+
+
+@router.get("/changes", response_model=list[SSLCertificateChangeResponse])
+async def list_ssl_certificate_changes(
+    response: Response,
+    days: int = Query(30, ge=1, le=366),
+    organization_id: uuid.UUID | None = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Certificates whose live cert was replaced in the last `days` days,
+    newest first, each with the cert it replaced."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    query = select(SSLProbeResult).where(SSLProbeResult.changed.is_(True), SSLProbeResult.probed_at >= since)
+    if organization_id:
+        query = query.join(SSLCertificate, SSLCertificate.id == SSLProbeResult.certificate_id).where(
+            SSLCertificate.organization_id == organization_id
+        )
+    changes = await paginate(
+        db, query, response, sort_key=SSLProbeResult.probed_at, id_key=SSLProbeResult.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
+    if not changes:
+        return []
+    previous = {
+        r.id: r for r in (await db.execute(
+            select(SSLProbeResult).where(SSLProbeResult.id.in_({c.previous_id for c in changes if c.previous_id}))
+        )).scalars()
+    }
+    certs = {
+        c.id: c for c in (await db.execute(
+            select(SSLCertificate).where(SSLCertificate.id.in_({c.certificate_id for c in changes}))
+        )).scalars()
+    }
+    out = []
+    for change in changes:
+        cert = certs[change.certificate_id]
+        before = previous.get(change.previous_id)
+        out.append(SSLCertificateChangeResponse(
+            certificate_id=cert.id,
+            organization_id=cert.organization_id,
+            common_name=cert.common_name,
+            changed_at=change.probed_at,
+            current=SSLProbeResultResponse.model_validate(change),
+            previous=SSLProbeResultResponse.model_validate(before) if before else None,
+            issuer_changed=before is not None and before.issuer != change.issuer,
+            key_downgraded=(
+                before is not None and before.key_size is not None and change.key_size is not None
+                and change.key_size < before.key_size
+            ),
+        ))
+    return out
 
 
 @router.post("", response_model=SSLCertificateResponse, status_code=status.HTTP_201_CREATED)
@@ -76,6 +142,35 @@ async def delete_ssl_certificate(item_id: uuid.UUID, db: AsyncSession = Depends(
     await db.delete(item)
 
 
+@router.get("/{item_id}/probe-history", response_model=list[SSLProbeResultResponse])
+async def get_ssl_certificate_probe_history(
+    item_id: uuid.UUID,
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """The certificate's timeline of distinct probe outcomes, newest first."""
+    if await db.get(SSLCertificate, item_id) is None:
+        raise HTTPException(status_code=404, detail="SSL Certificate not found")
+    query = select(SSLProbeResult).where(SSLProbeResult.certificate_id == item_id)
+    return await paginate(
+        db, query, response, sort_key=SSLProbeResult.probed_at, id_key=SSLProbeResult.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
+
+
+@router.post("/probe", status_code=status.HTTP_202_ACCEPTED)
+async def probe_ssl_certificates(_: User = Depends(get_current_user)):
+    """Start a run of the ``ssl_probe`` scheduled job, which re-probes every
+    unarchived certificate. It is skipped if a sweep is already running;
+    see GET /scheduler/runs for the outcome."""
+    scheduler.trigger("ssl_probe")
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
 @router.post("/{item_id}/probe", response_model=SSLProbeResponse)
 async def probe_ssl_certificate(
     item_id: uuid.UUID,
@@ -96,23 +191,21 @@ async def probe_ssl_certificate(
     if not host:
         raise HTTPException(status_code=400, detail="No host to probe — set the certificate's host or pass one explicitly")
 
+    started = time.monotonic()
     try:
-        info = await probe_host(host, port)
+        info = await probe_host(host, port, settings.SSL_PROBE_TIMEOUT_SECONDS)
     except Exception as e:
+        # The request's transaction is rolled back, so record the failure on its own.
+        async with async_session() as history_db:
+            await ssl_history.record(history_db, [ssl_history.Observation(
+                item.id, host, port, error=str(e) or type(e).__name__,
+                latency_ms=int((time.monotonic() - started) * 1000),
+            )])
+            await history_db.commit()
         raise HTTPException(status_code=502, detail=f"TLS probe failed: {e}")
 
-    item.host = info["host"]
-    item.port = info["port"]
-    item.subject_cn = info["subject_cn"]
-    item.issuer = info["issuer"]
-    item.serial_number = info["serial_number"]
-    item.signature_algorithm = info["signature_algorithm"]
-    item.key_algorithm = info["key_algorithm"]
-    item.key_size = info["key_size"]
-    item.sans = info["sans"] or None
-    item.issued_date = info["issued_date"]
-    item.expiration_date = info["expiration_date"]
-    item.last_probed_at = datetime.now(timezone.utc)
+    apply_probe(item, info)
+    await ssl_history.record(db, [ssl_history.Observation(item.id, host, port, info=info, latency_ms=info["latency_ms"])])
 
     await db.flush()
     await db.refresh(item)
@@ -1,15 +1,18 @@
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import paginate
 from app.models.webhook import Webhook
+from app.models.webhook_delivery import WebhookDelivery
 from app.models.user import User
+from app.services import webhook_dispatcher
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
@@ -22,6 +25,7 @@ class WebhookCreate(BaseModel):
     events: list | None = None
     is_active: bool = True
     secret: str | None = None
+    batch_events: bool = False
 
 
 class WebhookUpdate(BaseModel):
@@ -30,6 +34,7 @@ class WebhookUpdate(BaseModel):
     events: list | None = None
     is_active: bool | None = None
     secret: str | None = None
+    batch_events: bool | None = None
 
 
 class WebhookResponse(BaseModel):
@@ -39,33 +44,79 @@ class WebhookResponse(BaseModel):
     events: list | None = None
     is_active: bool
     secret: str | None = None
+    batch_events: bool = False
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
     model_config = {"from_attributes": True}
 
 
+class WebhookDeliveryResponse(BaseModel):
+    id: uuid.UUID
+    webhook_id: uuid.UUID
+    event: str
+    payload: dict
+    coalesced: int = 0
+    status: str
+    attempts: int
+    next_attempt_at: datetime | None = None
+    last_status_code: int | None = None
+    last_error: str | None = None
+    duration_ms: int | None = None
+    created_at: datetime
+    delivered_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class WebhookBreakerState(BaseModel):
+    url: str
+    state: str  # open | half_open | closed (still counting failures)
+    failures: int
+    reopens_in_seconds: float
+
+
+class WebhookMetricsResponse(BaseModel):
+    outbox_depth: int
+    oldest_outbox_event_seconds: float | None = None
+    pending_deliveries: int
+    due_deliveries: int
+    dispatch_lag_seconds: float
+    delivery_lag_avg_seconds: float | None = None
+    delivery_lag_max_seconds: float | None = None
+    counters: dict[str, int]
+    breakers: list[WebhookBreakerState]
+
+
 # --- Endpoints ---
 
 @router.get("", response_model=list[WebhookResponse])
 async def list_webhooks(
+    response: Response,
     is_active: bool | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
     query = select(Webhook)
     if is_active is not None:
         query = query.where(Webhook.is_active == is_active)
-    items = (
-        await db.execute(
-            query.order_by(Webhook.name)
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-    ).scalars().all()
-    return items
+    return await paginate(
+        db, query, response, sort_key=Webhook.name, id_key=Webhook.id,
+        cursor=cursor, page=page, page_size=page_size,
+    )
+
+
+@router.get("/metrics", response_model=WebhookMetricsResponse)
+async def webhook_metrics(
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Queue depth and lag, plus this worker's circuit breakers, counters
+    and delivery lag since it started."""
+    return await webhook_dispatcher.metrics(db)
 
 
 @router.post("", response_model=WebhookResponse, status_code=status.HTTP_201_CREATED)
@@ -123,3 +174,47 @@ async def delete_webhook(
     if not item:
         raise HTTPException(status_code=404, detail="Webhook not found")
     await db.delete(item)
+
+
+@router.get("/{item_id}/deliveries", response_model=list[WebhookDeliveryResponse])
+async def list_webhook_deliveries(
+    item_id: uuid.UUID,
+    response: Response,
+    delivery_status: str | None = Query(None, alias="status", pattern="^(pending|succeeded|failed)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=512),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    if await db.get(Webhook, item_id) is None:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    query = select(WebhookDelivery).where(WebhookDelivery.webhook_id == item_id)
+    if delivery_status is not None:
+        query = query.where(WebhookDelivery.status == delivery_status)
+    return await paginate(
+        db, query, response, sort_key=WebhookDelivery.created_at, id_key=WebhookDelivery.id, descending=True,
+        cursor=cursor, page=page, page_size=page_size,
+    )
+
+
+@router.post("/{item_id}/deliveries/{delivery_id}/retry", response_model=WebhookDeliveryResponse)
+async def retry_webhook_delivery(
+    item_id: uuid.UUID,
+    delivery_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    result = await db.execute(
+        select(WebhookDelivery).where(WebhookDelivery.id == delivery_id, WebhookDelivery.webhook_id == item_id)
+    )
+    item = result.scalar_one_or_none()
+    if not item:
+        raise HTTPException(status_code=404, detail="Webhook delivery not found")
+    if item.status == "failed":
+        item.status = "pending"
+        item.attempts = 0
+        item.next_attempt_at = func.now()
+        await db.flush()
+        await db.refresh(item)
+    return item
@@ -0,0 +1,122 @@
+"""Maintenance commands.
+
+    python -m app.cli search-rebuild
+    python -m app.cli attachments-gc [--verify]
+    python -m app.cli rotate-encryption-key
+    python -m app.cli share-links-sweep
+    python -m app.cli audit-maintain
+    python -m app.cli ssl-sweep [--organization ID]
+"""
+
+import argparse
+import asyncio
+import logging
+import uuid
+
+from app.core.database import async_session
+from app.services import attachment_storage, audit, audit_retention, key_rotation, search_index, share_links, ssl_sweep, upload_sessions, webhook_events
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def _search_rebuild(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        counts = await search_index.rebuild(db)
+    for entity_type, n in counts.items():
+        print(f"{entity_type:20s} {n}")
+
+
+async def _attachments_gc(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        report = await attachment_storage.gc(db, verify=args.verify)
+    expired = await upload_sessions.expire()
+    print(f"adopted into store   {report.adopted}")
+    print(f"ref counts fixed     {report.recounted}")
+    print(f"blobs removed        {report.collected}")
+    print(f"orphan files removed {report.orphan_files}")
+    print(f"stale temp removed   {report.stale_temp_files}")
+    print(f"expired uploads      {expired}")
+    if args.verify:
+        print(f"blobs verified       {report.verified}")
+    for line in report.missing:
+        print(f"MISSING  {line}")
+    for line in report.corrupt:
+        print(f"CORRUPT  {line}")
+    if report.missing or report.corrupt:
+        raise SystemExit(1)
+
+
+async def _rotate_encryption_key(args: argparse.Namespace) -> None:
+    def progress(target: str, scanned: int, rotated: int) -> None:
+        print(f"{target:20s} scanned {scanned:8d}  re-encrypted {rotated:8d}", flush=True)
+
+    async with async_session() as db:
+        report = await key_rotation.rotate(db, progress)
+    print(f"all secrets now under key {report.key_id!r}" if not report.failed else "finished with failures")
+    for line in report.failed:
+        print(f"FAILED  {line}")
+    if report.failed:
+        raise SystemExit(1)
+
+
+async def _share_links_sweep(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        removed = await share_links.sweep(db)
+        await db.commit()
+    print(f"share links removed  {removed}")
+
+
+async def _audit_maintain(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        report = await audit_retention.maintain(db)
+    for name in report.created:
+        print(f"created  {name}")
+    for name in report.dropped:
+        print(f"dropped  {name}")
+    print(f"days rolled up       {report.days_rolled_up}")
+
+
+async def _ssl_sweep(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        report = await ssl_sweep.sweep(db, args.organization)
+    print(f"probed               {report.probed}")
+    print(f"failed               {report.failed}")
+    print(f"skipped (no host)    {report.skipped}")
+    print(f"took                 {report.duration_ms / 1000:.1f}s")
+    for line in report.errors:
+        print(f"FAILED  {line}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("search-rebuild", help="Re-derive the search_index table from the source tables")
+    p.set_defaults(func=_search_rebuild)
+
+    p = sub.add_parser("attachments-gc", help="Reconcile the attachment blob store with the database")
+    p.add_argument("--verify", action="store_true", help="Re-hash every stored blob")
+    p.set_defaults(func=_attachments_gc)
+
+    p = sub.add_parser("rotate-encryption-key", help="Re-encrypt stored secrets under the primary ENCRYPTION_KEYS key")
+    p.set_defaults(func=_rotate_encryption_key)
+
+    p = sub.add_parser("share-links-sweep", help="Delete expired, revoked and used-up password share links")
+    p.set_defaults(func=_share_links_sweep)
+
+    p = sub.add_parser("audit-maintain", help="Create upcoming audit_logs partitions, drop expired ones, roll up daily counts")
+    p.set_defaults(func=_audit_maintain)
+
+    p = sub.add_parser("ssl-sweep", help="Re-probe every unarchived SSL certificate concurrently")
+    p.add_argument("--organization", type=uuid.UUID, help="Only this organization's certificates")
+    p.set_defaults(func=_ssl_sweep)
+
+    args = parser.parse_args(argv)
+    search_index.install()
+    audit.install()
+    webhook_events.install()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Request body size limits enforced before the body is read.
+
+FastAPI parses a multipart body, spooling its files to disk, before the
+endpoint runs, so a size check in the endpoint only fires after the
+whole upload has been received. For the routes given to
+`BodySizeLimitMiddleware` the ``Content-Length`` header is checked up
+front, and a body sent without one (or longer than it claims) is cut off
+once it passes the limit. Either way the client gets a 413.
+"""
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: dict[tuple[str, str], tuple[int, str]]):
+        # (method, path) -> (max body bytes, 413 detail)
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get((scope["method"], scope["path"])) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        max_bytes, detail = limit
+
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > max_bytes:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Re-raised as is by FastAPI's body parsing.
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,26 +1,112 @@
+"""AES-GCM encryption of stored secrets, with a keyring for key rotation.
+
+Ciphertexts are ``b"DV" + len(key_id) + key_id + nonce + ciphertext``.
+New data is always encrypted with the primary (first) key of
+ENCRYPTION_KEYS; any key still in the ring can decrypt. Ciphertexts
+written before key ids existed are bare ``nonce + ciphertext`` under
+ENCRYPTION_KEY. A legacy nonce can start with the prefix by chance, so a
+prefixed value that fails authentication is retried as legacy.
+
+`app.services.key_rotation` re-encrypts stored values under the primary key.
+"""
+
 import base64
 import os
+from functools import lru_cache
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from app.config import settings
 
+_MAGIC = b"DV"
+_NONCE_BYTES = 12
+
+
+class UnknownKeyError(Exception):
+    """The ciphertext names a key id that is not in the keyring."""
+
+
+@lru_cache(maxsize=8)
+def _cipher(encoded_key: str) -> AESGCM:
+    # AESGCM objects are immutable and safe to share between threads.
+    return AESGCM(base64.b64decode(encoded_key))
+
+
+@lru_cache(maxsize=4)
+def _parse_keyring(spec: str, legacy_key: str) -> tuple[str, dict[str, AESGCM]]:
+    ring: dict[str, AESGCM] = {}
+    primary = None
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        key_id, sep, encoded = entry.partition(":")
+        if not sep or not key_id or len(key_id.encode()) > 255:
+            raise ValueError(f"Invalid ENCRYPTION_KEYS entry {key_id!r}: expected '<id>:<base64 key>'")
+        ring[key_id] = _cipher(encoded)
+        primary = primary or key_id
+    if primary is None:
+        # No keyring configured: ENCRYPTION_KEY under the id "0".
+        primary = "0"
+        ring[primary] = _cipher(legacy_key)
+    return primary, ring
 
-def _get_key() -> bytes:
-    return base64.b64decode(settings.ENCRYPTION_KEY)
+
+def _keyring() -> tuple[str, dict[str, AESGCM]]:
+    return _parse_keyring(settings.ENCRYPTION_KEYS, settings.ENCRYPTION_KEY)
+
+
+def primary_key_id() -> str:
+    return _keyring()[0]
+
+
+def _split(data: bytes) -> tuple[str, bytes] | None:
+    if not data.startswith(_MAGIC) or len(data) < 3:
+        return None
+    end = 3 + data[2]
+    try:
+        return data[3:end].decode(), data[end:]
+    except UnicodeDecodeError:
+        return None
+
+
+def _decrypt(data: bytes) -> tuple[str | None, str]:
+    """(key id used, plaintext); the key id is None for legacy ciphertexts."""
+    primary, ring = _keyring()
+    parts = _split(data)
+    error: Exception | None = None
+    if parts is not None:
+        key_id, rest = parts
+        cipher = ring.get(key_id)
+        if cipher is None:
+            error = UnknownKeyError(key_id)
+        else:
+            try:
+                return key_id, cipher.decrypt(rest[:_NONCE_BYTES], rest[_NONCE_BYTES:], None).decode("utf-8")
+            except InvalidTag as e:
+                error = e
+    try:
+        legacy = _cipher(settings.ENCRYPTION_KEY)
+        return None, legacy.decrypt(data[:_NONCE_BYTES], data[_NONCE_BYTES:], None).decode("utf-8")
+    except InvalidTag:
+        if error is not None:
+            raise error
+        raise
 
 
 def encrypt(plaintext: str) -> bytes:
-    key = _get_key()
-    nonce = os.urandom(12)
-    aesgcm = AESGCM(key)
-    ciphertext = aesgcm.encrypt(nonce, plaintext.encode("utf-8"), None)
-    return nonce + ciphertext
+    key_id, ring = _keyring()
+    nonce = os.urandom(_NONCE_BYTES)
+    ciphertext = ring[key_id].encrypt(nonce, plaintext.encode("utf-8"), None)
+    kid = key_id.encode()
+    return _MAGIC + bytes([len(kid)]) + kid + nonce + ciphertext
 
 
 def decrypt(data: bytes) -> str:
-    key = _get_key()
-    nonce = data[:12]
-    ciphertext = data[12:]
-    aesgcm = AESGCM(key)
-    return aesgcm.decrypt(nonce, ciphertext, None).decode("utf-8")
+    return _decrypt(data)[1]
+
+
+def reencrypt(data: bytes) -> bytes | None:
+    """`data` re-encrypted under the primary key, or None if it already is."""
+    key_id, plaintext = _decrypt(data)
+    if key_id == primary_key_id():
+        return None
+    return encrypt(plaintext)
@@ -0,0 +1,87 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+List endpoints return a bare JSON array, so the cursor for the next page
+travels in the ``X-Next-Cursor`` response header. It is an opaque token
+encoding the ``(sort_key, id)`` of the last row; passing it back as
+``?cursor=`` continues with ``WHERE (sort_key, id) > (...)``, which is an
+index range scan however deep the client has paged. ``page`` still works
+(as OFFSET) for older clients and is ignored when a cursor is given.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _load(value, column: InstrumentedAttribute):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if not isinstance(value, python_type):
+        raise ValueError(f"expected {python_type.__name__}")
+    return value
+
+
+def encode_cursor(row, keys: tuple[InstrumentedAttribute, ...]) -> str:
+    payload = json.dumps([_dump(getattr(row, key.key)) for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, keys: tuple[InstrumentedAttribute, ...]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong arity")
+        return tuple(_load(v, key) for v, key in zip(values, keys))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    response: Response,
+    *,
+    sort_key: InstrumentedAttribute,
+    id_key: InstrumentedAttribute,
+    descending: bool = False,
+    cursor: str | None = None,
+    page: int = 1,
+    page_size: int = 25,
+) -> list:
+    """Run `query` for one page ordered by ``(sort_key, id_key)``.
+
+    Sets the next-page cursor header when the page is full, in either mode,
+    so offset clients can switch to cursors at any point.
+    """
+    keys = (sort_key, id_key)
+    if cursor:
+        row, last = tuple_(*keys), tuple_(*decode_cursor(cursor, keys))
+        query = query.where(row < last if descending else row > last)
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+
+    order = [key.desc() for key in keys] if descending else list(keys)
+    items = (await db.execute(query.order_by(*order).limit(page_size))).scalars().all()
+    if len(items) == page_size:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1], keys)
+    return items
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
@@ -5,6 +7,11 @@ from jose import JWTError, jwt
 
 from app.config import settings
 
+# bcrypt costs ~250 ms of CPU per call. It runs in its own small pool so a
+# burst of logins queues here instead of blocking the event loop or using
+# up the default executor that file I/O goes through.
+_kdf_executor = ThreadPoolExecutor(max_workers=settings.KDF_MAX_WORKERS, thread_name_prefix="kdf")
+
 
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
@@ -14,6 +21,14 @@ def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_kdf_executor, hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_kdf_executor, verify_password, plain, hashed)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import logging
 import subprocess
 import os
@@ -7,13 +9,25 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.core.database import async_session
 from app.services.auth_service import seed_user
+from app.services import (
+    access_log_buffer, audit, audit_retention, scheduler, search_index, user_cache, webhook_dispatcher,
+    webhook_events,
+)
 from app.api.v1.router import api_router
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+search_index.install()
+user_cache.install()
+access_log_buffer.install()
+audit.install()
+webhook_events.install()
+
 
 def run_migrations():
     logger.info("Running database migrations...")
@@ -27,19 +41,51 @@ async def lifespan(app: FastAPI):
     run_migrations()
     async with async_session() as db:
         await seed_user(db)
+    async with async_session() as db:
+        await search_index.rebuild_if_empty(db)
+    try:
+        async with async_session() as db:
+            await audit_retention.maintain(db)
+    except Exception:
+        # Retried by the audit_maintenance job; not worth refusing to start.
+        logger.exception("Audit log maintenance failed")
+    access_log_buffer.start()
+    webhook_dispatcher.start()
+    if settings.SCHEDULER_ENABLED:
+        await scheduler.start()
+    listener = asyncio.create_task(user_cache.listen()) if settings.USER_CACHE_NOTIFY else None
     logger.info("Application started.")
     yield
+    if listener is not None:
+        listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await listener
+    await scheduler.stop()
+    await webhook_dispatcher.stop()
+    await access_log_buffer.stop()
     logger.info("Application shutdown.")
 
 
 app = FastAPI(title="DocuVault API", version="1.0.0", lifespan=lifespan)
 
+# Inside CORS so that a 413 still carries the CORS headers.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        # The file plus a little for the form fields and part headers
+        ("POST", "/api/v1/attachments"): (
+            settings.ATTACHMENT_MAX_BYTES + 1024 ** 2,
+            f"File exceeds the {settings.ATTACHMENT_MAX_BYTES // 1024 ** 2} MB upload limit",
+        ),
+    },
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS.split(","),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(api_router)
@@ -8,6 +8,7 @@ from app.models.password import Password
 from app.models.password_audit import PasswordAccessLog
 from app.models.domain import Domain
 from app.models.ssl_certificate import SSLCertificate
+from app.models.ssl_probe_result import SSLProbeResult
 from app.models.flexible_asset_type import FlexibleAssetType
 from app.models.flexible_asset_section import FlexibleAssetSection
 from app.models.flexible_asset_field import FlexibleAssetField
@@ -17,27 +18,34 @@ from app.models.document import Document
 from app.models.document_version import DocumentVersion
 from app.models.document_template import DocumentTemplate
 from app.models.attachment import Attachment
+from app.models.attachment_blob import AttachmentBlob
 from app.models.relationship import Relationship
 from app.models.audit_log import AuditLog
+from app.models.audit_log_daily_count import AuditLogDailyCount
 from app.models.field_change_log import FieldChangeLog
 from app.models.checklist import Checklist, ChecklistItem
 from app.models.runbook import Runbook, RunbookStep
 from app.models.flag import Flag
 from app.models.webhook import Webhook
+from app.models.webhook_event import WebhookOutboxEvent
+from app.models.webhook_delivery import WebhookDelivery
 from app.models.password_share import PasswordShareLink
 from app.models.sidebar_item import SidebarItem
 from app.models.app_settings import AppSettings
 from app.models.ip_whitelist import IPWhitelist
 from app.models.system import System, SystemChatMessage
+from app.models.search_index import SearchIndexEntry
+from app.models.scheduled_job_run import ScheduledJobRun
 
 __all__ = [
     "User", "Organization", "Location", "Contact", "Configuration",
-    "PasswordCategory", "Password", "PasswordAccessLog", "Domain", "SSLCertificate",
+    "PasswordCategory", "Password", "PasswordAccessLog", "Domain", "SSLCertificate", "SSLProbeResult",
     "FlexibleAssetType", "FlexibleAssetSection", "FlexibleAssetField", "FlexibleAsset",
-    "DocumentFolder", "Document", "DocumentVersion", "DocumentTemplate", "Attachment",
-    "Relationship", "AuditLog", "FieldChangeLog",
+    "DocumentFolder", "Document", "DocumentVersion", "DocumentTemplate", "Attachment", "AttachmentBlob",
+    "Relationship", "AuditLog", "AuditLogDailyCount", "FieldChangeLog",
     "Checklist", "ChecklistItem", "Runbook", "RunbookStep",
-    "Flag", "Webhook", "PasswordShareLink",
+    "Flag", "Webhook", "WebhookOutboxEvent", "WebhookDelivery", "PasswordShareLink",
     "SidebarItem", "AppSettings", "IPWhitelist",
     "System", "SystemChatMessage",
+    "SearchIndexEntry", "ScheduledJobRun",
 ]
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import String, BigInteger, Integer, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AttachmentBlob(Base):
+    """One stored file, shared by every Attachment with the same content."""
+
+    __tablename__ = "attachment_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Number of attachments rows pointing at this blob; 0 = awaiting removal
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -9,6 +9,8 @@ from app.models.base import Base
 
 
 class AuditLog(Base):
+    """Partitioned by month on created_at (see app.services.audit_retention)."""
+
     __tablename__ = "audit_logs"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -18,4 +20,5 @@ class AuditLog(Base):
     changes: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
     ip_address: Mapped[str | None] = mapped_column(String(45), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Part of the primary key: Postgres requires the partition key in it
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
@@ -0,0 +1,17 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AuditLogDailyCount(Base):
+    """Audit log rows per UTC day, entity type and action, for reports."""
+
+    __tablename__ = "audit_log_daily_counts"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    entity_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    action: Mapped[str] = mapped_column(String(50), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
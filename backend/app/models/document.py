@@ -19,4 +19,9 @@ class Document(TimestampMixin, Base):
 
     organization = relationship("Organization", backref="documents", lazy="selectin")
     folder = relationship("DocumentFolder", backref="documents", lazy="selectin")
-    versions = relationship("DocumentVersion", back_populates="document", lazy="selectin", order_by="DocumentVersion.version.desc()")
+    # History can be hundreds of rows of full content: never load it implicitly,
+    # query DocumentVersion instead. Rows go with the document via ON DELETE CASCADE.
+    versions = relationship(
+        "DocumentVersion", back_populates="document", lazy="raise", passive_deletes=True,
+        order_by="DocumentVersion.version.desc()",
+    )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Integer, ForeignKey, DateTime, func
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Text, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,7 +14,12 @@ class DocumentVersion(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     version: Mapped[int] = mapped_column(Integer, nullable=False)
-    content: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Full content for the newest version and keyframes; older versions
+    # hold a reverse `delta` instead (see app.services.document_versions).
+    content: Mapped[dict | None] = mapped_column(JSONB, nullable=True, deferred=True)
+    delta: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # Serialized size of `content` in bytes, for history listings
+    content_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     change_summary: Mapped[str | None] = mapped_column(String(500), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class SSLProbeResult(Base):
+    """One distinct outcome of probing a certificate's host.
+
+    Append-only; an identical consecutive outcome (same fingerprint, or
+    same error) only moves `last_seen_at` and bumps `seen_count`.
+    """
+
+    __tablename__ = "ssl_probe_results"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    certificate_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("ssl_certificates.id", ondelete="CASCADE"), nullable=False)
+    probed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    seen_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    host: Mapped[str] = mapped_column(String(255), nullable=False)
+    port: Mapped[int] = mapped_column(Integer, nullable=False)
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)  # SHA-256 of the DER, hex
+    serial_number: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    subject_cn: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    issuer: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    not_before: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    not_after: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    key_algorithm: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    key_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    signature_algorithm: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    tls_version: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    cipher: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # A different certificate than the last successful probe, which is `previous_id`
+    changed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    previous_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("ssl_probe_results.id", ondelete="SET NULL"), nullable=True)
@@ -15,3 +15,5 @@ class Webhook(TimestampMixin, Base):
     events: Mapped[list | None] = mapped_column(JSONB, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     secret: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Send due deliveries as one POST instead of one request each
+    batch_events: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
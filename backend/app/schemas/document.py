@@ -43,6 +43,16 @@ class DocumentResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class DocumentVersionSummary(BaseModel):
+    id: uuid.UUID
+    document_id: uuid.UUID
+    version: int
+    change_summary: str | None
+    content_size: int | None
+    created_at: datetime
+    model_config = {"from_attributes": True}
+
+
 class DocumentVersionResponse(BaseModel):
     id: uuid.UUID
     document_id: uuid.UUID
@@ -53,6 +63,17 @@ class DocumentVersionResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class DocumentDiffOp(BaseModel):
+    op: str  # "equal" | "insert" | "delete"
+    text: str
+
+
+class DocumentDiffResponse(BaseModel):
+    from_version: int
+    to_version: int
+    ops: list[DocumentDiffOp]
+
+
 class DocumentTemplateCreate(BaseModel):
     name: str
     content: dict | None = None
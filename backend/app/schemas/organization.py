@@ -45,3 +45,5 @@ class OrganizationListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    # Keyset cursor for the following page (also sent as X-Next-Cursor)
+    next_cursor: str | None = None
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PasswordCategoryCreate(BaseModel):
@@ -55,12 +55,62 @@ class PasswordRevealResponse(BaseModel):
     password: str
 
 
+class PasswordBatchRevealRequest(BaseModel):
+    ids: list[uuid.UUID] = Field(min_length=1, max_length=200)
+
+
+class PasswordRevealItem(BaseModel):
+    id: uuid.UUID
+    password: str
+
+
+class PasswordBatchRevealResponse(BaseModel):
+    passwords: list[PasswordRevealItem]
+    not_found: list[uuid.UUID]
+
+
+class PasswordExportRequest(BaseModel):
+    organization_id: uuid.UUID
+    passphrase: str = Field(min_length=12, max_length=256)  # protects the zip
+
+
 class PasswordAccessLogResponse(BaseModel):
     id: uuid.UUID
     password_id: uuid.UUID
-    user_id: uuid.UUID
+    user_id: uuid.UUID | None
     action: str
     ip_address: str | None
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class PasswordShareLinkCreate(BaseModel):
+    expires_in_hours: int | None = Field(24, ge=1, le=24 * 30)  # None: never expires
+    max_views: int | None = Field(1, ge=1, le=1000)  # None: unlimited
+
+
+class PasswordShareLinkResponse(BaseModel):
+    id: uuid.UUID
+    password_id: uuid.UUID
+    expires_at: datetime | None
+    max_views: int | None
+    view_count: int
+    is_active: bool
+    created_by: uuid.UUID | None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class PasswordShareLinkCreated(PasswordShareLinkResponse):
+    token: str  # shown once; only its hash is stored
+
+
+class SharedPasswordResponse(BaseModel):
+    name: str
+    url: str | None
+    username: str | None
+    password: str
+    views_remaining: int | None
+    expires_at: datetime | None
@@ -58,3 +58,40 @@ class SSLProbeResponse(BaseModel):
     cipher: str | None
     is_expired: bool
     days_until_expiry: int
+
+
+class SSLProbeResultResponse(BaseModel):
+    id: uuid.UUID
+    certificate_id: uuid.UUID
+    probed_at: datetime
+    last_seen_at: datetime
+    seen_count: int
+    host: str
+    port: int
+    fingerprint: str | None = None
+    serial_number: str | None = None
+    subject_cn: str | None = None
+    issuer: str | None = None
+    not_before: datetime | None = None
+    not_after: datetime | None = None
+    key_algorithm: str | None = None
+    key_size: int | None = None
+    signature_algorithm: str | None = None
+    tls_version: str | None = None
+    cipher: str | None = None
+    latency_ms: int | None = None
+    error: str | None = None
+    changed: bool
+
+    model_config = {"from_attributes": True}
+
+
+class SSLCertificateChangeResponse(BaseModel):
+    certificate_id: uuid.UUID
+    organization_id: uuid.UUID
+    common_name: str
+    changed_at: datetime
+    current: SSLProbeResultResponse
+    previous: SSLProbeResultResponse | None = None
+    issuer_changed: bool
+    key_downgraded: bool
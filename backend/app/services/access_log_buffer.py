@@ -0,0 +1,155 @@
+"""Buffered, batched writes of `PasswordAccessLog` rows.
+
+`enqueue()` parks rows on the request's session; an ``after_commit`` hook
+hands them to an in-process buffer (so a rolled back request logs
+nothing, as before), and a background task bulk-inserts the buffer every
+PASSWORD_ACCESS_LOG_FLUSH_MS or as soon as PASSWORD_ACCESS_LOG_BATCH rows
+are waiting. Each row's `created_at` is taken when it is enqueued.
+
+The trade-off: a row sits in memory for up to one flush interval after
+its request committed, and is lost if the process dies in that window.
+`stop()` flushes everything on a clean shutdown, and reveals/exports are
+written inside the request's own transaction while
+PASSWORD_ACCESS_LOG_SYNC_REVEAL is on (the default). Until `start()` has
+run (CLI, scripts) every row is written synchronously.
+
+Rows whose password was deleted before the flush (the "delete" entry
+itself, notably) are skipped; the ON DELETE CASCADE would remove them
+anyway.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import DateTime, String, column, event, exists, insert, select, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.database import async_session
+from app.models.password import Password
+from app.models.password_audit import PasswordAccessLog
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "password_access_log_pending"
+_COLUMNS = ("id", "password_id", "user_id", "action", "ip_address", "created_at")
+# Rows per INSERT; 6 bind parameters each.
+_CHUNK = 1000
+
+_buffer: list[tuple] = []
+_wakeup: asyncio.Event | None = None
+_task: asyncio.Task | None = None
+
+
+def running() -> bool:
+    return _task is not None and not _task.done()
+
+
+def enqueue(
+    session: Session, password_ids: list[uuid.UUID], user_id: uuid.UUID | None, action: str, ip_address: str | None,
+) -> None:
+    now = datetime.now(timezone.utc)
+    session.info.setdefault(_PENDING_KEY, []).extend(
+        (uuid.uuid4(), pid, user_id, action, ip_address, now) for pid in password_ids
+    )
+
+
+def _after_commit(session: Session) -> None:
+    rows = session.info.pop(_PENDING_KEY, None)
+    if not rows:
+        return
+    _buffer.extend(rows)
+    if _wakeup is not None and len(_buffer) >= settings.PASSWORD_ACCESS_LOG_BATCH:
+        _wakeup.set()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def install() -> None:
+    """Register the session hooks. Idempotent."""
+    for name, fn in (("after_commit", _after_commit), ("after_rollback", _after_rollback)):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
+
+
+def _insert(rows: list[tuple]) -> Any:
+    v = values(
+        column("id", UUID(as_uuid=True)),
+        column("password_id", UUID(as_uuid=True)),
+        column("user_id", UUID(as_uuid=True)),
+        column("action", String),
+        column("ip_address", String),
+        column("created_at", DateTime(timezone=True)),
+        name="v",
+    ).data(rows)
+    return insert(PasswordAccessLog).from_select(
+        list(_COLUMNS), select(v).where(exists().where(Password.id == v.c.password_id))
+    )
+
+
+async def flush() -> int:
+    """Write everything buffered so far; returns the number of rows taken."""
+    if not _buffer:
+        return 0
+    rows = _buffer[:]
+    del _buffer[:len(rows)]
+    try:
+        async with async_session() as db:
+            for i in range(0, len(rows), _CHUNK):
+                await db.execute(_insert(rows[i:i + _CHUNK]))
+            await db.commit()
+    except Exception:
+        # Put them back for the next attempt, newest first to go if the
+        # database stays away long enough to hit the cap.
+        _buffer[:0] = rows
+        overflow = len(_buffer) - settings.PASSWORD_ACCESS_LOG_BUFFER_MAX
+        if overflow > 0:
+            del _buffer[-overflow:]
+            logger.error("Password access log buffer full: dropped %d rows", overflow)
+        raise
+    return len(rows)
+
+
+async def _run() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.PASSWORD_ACCESS_LOG_FLUSH_MS / 1000)
+        except TimeoutError:
+            pass
+        _wakeup.clear()
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Writing buffered password access log rows failed; will retry")
+
+
+def start() -> None:
+    global _task, _wakeup
+    if running():
+        return
+    _wakeup = asyncio.Event()
+    _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    """Stop the writer task and flush what is left."""
+    global _task, _wakeup
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = _wakeup = None
+    try:
+        await flush()
+    except Exception:
+        logger.exception("Final flush of %d password access log rows failed", len(_buffer))
@@ -0,0 +1,233 @@
+"""Streaming zip/tar export of an organization's attachments.
+
+The archive is produced by `zipfile`/`tarfile` in a writer thread writing
+into a small bounded queue that the response drains, so memory stays at
+a few chunks regardless of archive size and nothing is staged on disk.
+Zip entries are stored uncompressed (most attachments are already
+compressed) with ZIP64 headers, so members and archives over 4 GiB work.
+
+A ``manifest.json`` built from the Attachment rows is written as the last
+member, after the files, so it can also flag rows whose file is missing.
+"""
+
+import asyncio
+import io
+import json
+import os
+import re
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.attachment import Attachment
+from app.services.search_index import ENTITY_TYPES
+
+FORMATS = {"zip": "application/zip", "tar": "application/x-tar"}
+
+# Chunks of ATTACHMENT_CHUNK_BYTES in flight between the writer thread and
+# the response.
+_QUEUE_DEPTH = 4
+_UNSAFE_NAME_RE = re.compile(r"[\x00-\x1f/\\]")
+
+
+@dataclass(frozen=True)
+class ExportItem:
+    id: uuid.UUID
+    attachable_type: str
+    attachable_id: uuid.UUID
+    file_name: str
+    file_path: str
+    file_size: int | None
+    sha256: str | None
+    content_type: str | None
+    created_at: datetime
+
+    @property
+    def arcname(self) -> str:
+        name = _UNSAFE_NAME_RE.sub("_", self.file_name).strip(". ") or "unnamed"
+        return f"{self.attachable_type}/{self.attachable_id}/{self.id}-{name}"
+
+
+async def list_items(db: AsyncSession, organization_id: uuid.UUID) -> list[ExportItem]:
+    """Every attachment on the organization itself or on one of its assets."""
+    owned = [and_(Attachment.attachable_type == "organization", Attachment.attachable_id == organization_id)]
+    for entity_type, model in ENTITY_TYPES.items():
+        if entity_type != "organization" and hasattr(model, "organization_id"):
+            owned.append(and_(
+                Attachment.attachable_type == entity_type,
+                Attachment.attachable_id.in_(select(model.id).where(model.organization_id == organization_id)),
+            ))
+    rows = await db.execute(
+        select(
+            Attachment.id, Attachment.attachable_type, Attachment.attachable_id, Attachment.file_name,
+            Attachment.file_path, Attachment.file_size, Attachment.sha256, Attachment.content_type,
+            Attachment.created_at,
+        )
+        .where(or_(*owned))
+        .order_by(Attachment.attachable_type, Attachment.attachable_id, Attachment.created_at)
+    )
+    return [ExportItem(*row) for row in rows.all()]
+
+
+class _Closed(Exception):
+    pass
+
+
+_END = object()
+
+
+class _QueueWriter:
+    """File-like sink handing bytes to the event loop, blocking the writer
+    thread while the queue is full (i.e. while the client is slow)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, closed: threading.Event):
+        self._loop = loop
+        self._queue = queue
+        self._closed = closed
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        if self._closed.is_set():
+            raise _Closed()
+        self._buffer += data
+        self._position += len(data)
+        if len(self._buffer) >= settings.ATTACHMENT_CHUNK_BYTES:
+            self.flush()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _put(self, item) -> None:
+        future = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return
+            except TimeoutError:
+                if self._closed.is_set():
+                    future.cancel()
+                    raise _Closed()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        if not self._closed.is_set():
+            if error is None:
+                self.flush()
+            self._put(error or _END)
+
+
+def _manifest(items: list[ExportItem], missing: set[uuid.UUID]) -> bytes:
+    entries = [
+        {
+            "id": str(item.id),
+            "path": item.arcname,
+            "file_name": item.file_name,
+            "file_size": item.file_size,
+            "sha256": item.sha256,
+            "content_type": item.content_type,
+            "attachable_type": item.attachable_type,
+            "attachable_id": str(item.attachable_id),
+            "created_at": item.created_at.isoformat() if item.created_at else None,
+            "missing": item.id in missing,
+        }
+        for item in items
+    ]
+    return json.dumps({"attachments": entries}, indent=2).encode()
+
+
+def _copy(path: str, out) -> None:
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.ATTACHMENT_CHUNK_BYTES):
+            out.write(chunk)
+
+
+def _write_zip(items: list[ExportItem], sink: _QueueWriter) -> None:
+    missing: set[uuid.UUID] = set()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for item in items:
+            if not os.path.exists(item.file_path):
+                missing.add(item.id)
+                continue
+            info = zipfile.ZipInfo(item.arcname, date_time=item.created_at.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=True) as member:
+                _copy(item.file_path, member)
+        zf.writestr("manifest.json", _manifest(items, missing))
+
+
+def _write_tar(items: list[ExportItem], sink: _QueueWriter) -> None:
+    missing: set[uuid.UUID] = set()
+    with tarfile.open(fileobj=sink, mode="w|", format=tarfile.PAX_FORMAT) as tf:
+        for item in items:
+            try:
+                f = open(item.file_path, "rb")
+            except FileNotFoundError:
+                missing.add(item.id)
+                continue
+            with f:
+                info = tarfile.TarInfo(item.arcname)
+                info.size = os.fstat(f.fileno()).st_size
+                info.mtime = item.created_at.timestamp() if item.created_at else time.time()
+                tf.addfile(info, f)
+        manifest = _manifest(items, missing)
+        info = tarfile.TarInfo("manifest.json")
+        info.size = len(manifest)
+        info.mtime = time.time()
+        tf.addfile(info, io.BytesIO(manifest))
+
+
+async def stream_archive(items: list[ExportItem], fmt: str) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_DEPTH)
+    closed = threading.Event()
+    sink = _QueueWriter(loop, queue, closed)
+    write = _write_zip if fmt == "zip" else _write_tar
+
+    done = loop.create_future()
+
+    def produce() -> None:
+        try:
+            write(items, sink)
+            sink.finish()
+        except _Closed:
+            pass
+        except BaseException as e:  # surfaced to the response below
+            try:
+                sink.finish(e)
+            except _Closed:
+                pass
+        finally:
+            loop.call_soon_threadsafe(done.set_result, None)
+
+    # A dedicated thread: an export can run for a long time and must not
+    # hold a slot in the default executor that asyncio.to_thread relies on.
+    threading.Thread(target=produce, name="attachment-export", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Client went away (or we are done): stop the writer thread.
+        closed.set()
+        while not queue.empty():
+            queue.get_nowait()
+        await done
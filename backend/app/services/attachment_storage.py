@@ -0,0 +1,377 @@
+"""Content-addressed storage for attachment files.
+
+Uploads are copied in fixed-size chunks, in a worker thread, into a temp
+file under ``UPLOAD_DIR/.tmp``; the SHA-256 and size are computed as the
+bytes go by and the size limit is enforced mid-stream. Memory per upload
+is one chunk.
+
+Each distinct file is then stored once, at ``UPLOAD_DIR/blobs/ab/cd/<sha256>``,
+and tracked by an `attachment_blobs` row whose `ref_count` is the number
+of Attachment rows using it. `store()` takes the blob row's lock via an
+upsert before touching the file, so for any one hash only one request at
+a time decides whether to move its temp file into place or discard it as
+a duplicate.
+
+Deleting an attachment `release()`s its blob in the request transaction;
+after that commits, `collect()` removes the row and unlinks the file in a
+second short transaction, but only if the count is still zero — a
+concurrent upload of the same content either re-referenced the row first
+or waits on its lock and puts the file back afterwards.
+
+`gc()` (``python -m app.cli attachments-gc``) moves attachments from the
+old per-entity layout into the store and reconciles disk with the DB.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.attachment import Attachment
+from app.models.attachment_blob import AttachmentBlob
+
+logger = logging.getLogger(__name__)
+
+# Files younger than this may belong to an upload that has not committed yet.
+_GC_GRACE_SECONDS = 3600
+_TMP_MAX_AGE_SECONDS = 24 * 3600
+_GC_BATCH = 500
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded ATTACHMENT_MAX_BYTES."""
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    path: str
+    size: int
+    sha256: str
+
+
+def temp_dir() -> str:
+    # Inside UPLOAD_DIR so the final rename never crosses filesystems.
+    path = os.path.join(settings.UPLOAD_DIR, ".tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def blobs_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "blobs")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(blobs_dir(), sha256[:2], sha256[2:4], sha256)
+
+
+def in_store(att: Attachment) -> bool:
+    """False for attachments still in the pre-dedup per-entity layout."""
+    return bool(att.sha256) and att.file_path == blob_path(att.sha256)
+
+
+def _copy_to_temp(src: BinaryIO, max_bytes: int, chunk_size: int) -> StoredFile:
+    fd, tmp_path = tempfile.mkstemp(dir=temp_dir(), suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := src.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return StoredFile(tmp_path, size, digest.hexdigest())
+
+
+def _hash_file(path: str) -> StoredFile:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.ATTACHMENT_CHUNK_BYTES):
+            size += len(chunk)
+            digest.update(chunk)
+    return StoredFile(path, size, digest.hexdigest())
+
+
+def _place(src_path: str, final_path: str) -> None:
+    if os.path.exists(final_path):
+        # Same content is already stored.
+        os.remove(src_path)
+        return
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(src_path, final_path)
+
+
+def _link(src_path: str, final_path: str) -> None:
+    # Keep the original until the DB points at the copy.
+    if os.path.exists(final_path):
+        return
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    tmp_path = os.path.join(temp_dir(), os.path.basename(final_path) + ".adopt")
+    try:
+        os.link(src_path, tmp_path)
+    except OSError:
+        shutil.copy2(src_path, tmp_path)
+    os.replace(tmp_path, final_path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def stage_stream(src: BinaryIO) -> StoredFile:
+    """Copy `src` to a temp file; returns its path, size and hash."""
+    return await asyncio.to_thread(
+        _copy_to_temp, src, settings.ATTACHMENT_MAX_BYTES, settings.ATTACHMENT_CHUNK_BYTES,
+    )
+
+
+async def discard(staged: StoredFile) -> None:
+    await asyncio.to_thread(_remove, staged.path)
+
+
+async def _add_reference(db: AsyncSession, stored: StoredFile) -> None:
+    # Upsert: also takes the row lock that serializes work on this hash.
+    stmt = insert(AttachmentBlob).values(sha256=stored.sha256, size=stored.size, ref_count=1)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[AttachmentBlob.sha256],
+            set_={"ref_count": AttachmentBlob.ref_count + 1},
+        )
+    )
+
+
+async def store(db: AsyncSession, staged: StoredFile, *, keep_source: bool = False) -> str:
+    """Take one reference on the blob for `staged` and move the temp file
+    into the store (or drop it if the content is already there). Returns
+    the blob path for Attachment.file_path.
+
+    With `keep_source` the file is linked (or copied) into the store and
+    left in place, for callers that remove it only after committing.
+    """
+    await _add_reference(db, staged)
+    path = blob_path(staged.sha256)
+    await asyncio.to_thread(_link if keep_source else _place, staged.path, path)
+    return path
+
+
+async def reference(db: AsyncSession, sha256: str) -> AttachmentBlob | None:
+    """Take one more reference on an already stored blob, without any
+    upload. None if the content is not in the store."""
+    blob = (
+        await db.execute(
+            update(AttachmentBlob)
+            .where(AttachmentBlob.sha256 == sha256)
+            .values(ref_count=AttachmentBlob.ref_count + 1)
+            .returning(AttachmentBlob)
+        )
+    ).scalar_one_or_none()
+    if blob is None or not await asyncio.to_thread(os.path.exists, blob_path(sha256)):
+        return None
+    return blob
+
+
+async def release(db: AsyncSession, sha256: str) -> None:
+    await db.execute(
+        update(AttachmentBlob)
+        .where(AttachmentBlob.sha256 == sha256)
+        .values(ref_count=func.greatest(AttachmentBlob.ref_count - 1, 0))
+    )
+
+
+async def collect(db: AsyncSession, sha256: str) -> bool:
+    """Remove the blob if nothing references it any more. Commits."""
+    removed = (
+        await db.execute(
+            delete(AttachmentBlob)
+            .where(AttachmentBlob.sha256 == sha256, AttachmentBlob.ref_count <= 0)
+            .returning(AttachmentBlob.sha256)
+        )
+    ).scalar_one_or_none()
+    if removed:
+        # Unlink while still holding the row lock, then commit.
+        await asyncio.to_thread(_remove, blob_path(sha256))
+    await db.commit()
+    return bool(removed)
+
+
+async def remove(path: str) -> None:
+    await asyncio.to_thread(_remove, path)
+
+
+# --- GC / verify ---
+
+
+@dataclass
+class GCReport:
+    adopted: int = 0
+    recounted: int = 0
+    collected: int = 0
+    orphan_files: int = 0
+    stale_temp_files: int = 0
+    verified: int = 0
+    missing: list[str] = field(default_factory=list)
+    corrupt: list[str] = field(default_factory=list)
+
+
+async def _adopt_legacy(db: AsyncSession, report: GCReport) -> None:
+    prefix = blobs_dir() + os.sep
+    last_id = None
+    while True:
+        q = select(Attachment).where(~Attachment.file_path.startswith(prefix)).order_by(Attachment.id).limit(_GC_BATCH)
+        if last_id is not None:
+            q = q.where(Attachment.id > last_id)
+        batch = (await db.execute(q)).scalars().all()
+        if not batch:
+            break
+        originals = []
+        for att in batch:
+            if not await asyncio.to_thread(os.path.exists, att.file_path):
+                blob = await reference(db, att.sha256) if att.sha256 else None
+                if blob is None:
+                    report.missing.append(f"attachment {att.id}: {att.file_path}")
+                    continue
+            else:
+                found = await asyncio.to_thread(_hash_file, att.file_path)
+                await _add_reference(db, found)
+                await asyncio.to_thread(_link, att.file_path, blob_path(found.sha256))
+                originals.append(att.file_path)
+                att.sha256, att.file_size = found.sha256, found.size
+            att.file_path = blob_path(att.sha256)
+            report.adopted += 1
+        last_id = batch[-1].id
+        await db.commit()
+        for path in originals:
+            await asyncio.to_thread(_remove, path)
+
+
+async def _recount(db: AsyncSession, report: GCReport) -> list[str]:
+    """Fix ref counts that drifted (crashes between commit and collect,
+    manual DB edits). Each blob is locked while it is counted."""
+    prefix = blobs_dir() + os.sep
+    zero: list[str] = []
+    last = ""
+    while True:
+        shas = (
+            await db.execute(
+                select(AttachmentBlob.sha256).where(AttachmentBlob.sha256 > last)
+                .order_by(AttachmentBlob.sha256).limit(_GC_BATCH)
+            )
+        ).scalars().all()
+        if not shas:
+            break
+        for sha in shas:
+            blob = (
+                await db.execute(select(AttachmentBlob).where(AttachmentBlob.sha256 == sha).with_for_update())
+            ).scalar_one_or_none()
+            if blob is None:
+                continue
+            n = (
+                await db.execute(
+                    select(func.count()).select_from(Attachment)
+                    .where(Attachment.sha256 == sha, Attachment.file_path.startswith(prefix))
+                )
+            ).scalar()
+            if n != blob.ref_count:
+                blob.ref_count = n
+                report.recounted += 1
+            if n == 0:
+                zero.append(sha)
+            await db.commit()
+        last = shas[-1]
+    return zero
+
+
+def _walk_old_files(root: str, min_age: float) -> list[str]:
+    cutoff = time.time() - min_age
+    found = []
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    found.append(path)
+            except FileNotFoundError:
+                pass
+    return found
+
+
+async def _remove_orphans(db: AsyncSession, report: GCReport) -> None:
+    candidates = await asyncio.to_thread(_walk_old_files, blobs_dir(), _GC_GRACE_SECONDS)
+    for i in range(0, len(candidates), _GC_BATCH):
+        chunk = {os.path.basename(p): p for p in candidates[i:i + _GC_BATCH]}
+        known = set(
+            (await db.execute(select(AttachmentBlob.sha256).where(AttachmentBlob.sha256.in_(chunk)))).scalars()
+        )
+        for sha, path in chunk.items():
+            if sha not in known:
+                await asyncio.to_thread(_remove, path)
+                report.orphan_files += 1
+    await db.rollback()
+
+    stale = await asyncio.to_thread(_walk_old_files, temp_dir(), _TMP_MAX_AGE_SECONDS)
+    for path in stale:
+        await asyncio.to_thread(_remove, path)
+    report.stale_temp_files = len(stale)
+
+
+async def _verify(db: AsyncSession, report: GCReport) -> None:
+    last = ""
+    while True:
+        blobs = (
+            await db.execute(
+                select(AttachmentBlob.sha256, AttachmentBlob.size).where(AttachmentBlob.sha256 > last)
+                .order_by(AttachmentBlob.sha256).limit(_GC_BATCH)
+            )
+        ).all()
+        if not blobs:
+            break
+        for sha, size in blobs:
+            path = blob_path(sha)
+            try:
+                found = await asyncio.to_thread(_hash_file, path)
+            except FileNotFoundError:
+                report.missing.append(f"blob {sha}")
+                continue
+            if found.sha256 != sha or found.size != size:
+                report.corrupt.append(f"blob {sha}")
+            report.verified += 1
+        last = blobs[-1].sha256
+    await db.rollback()
+
+
+async def gc(db: AsyncSession, *, verify: bool = False) -> GCReport:
+    """Reconcile the blob store with the DB. Safe to run while serving."""
+    report = GCReport()
+    await _adopt_legacy(db, report)
+    for sha in await _recount(db, report):
+        if await collect(db, sha):
+            report.collected += 1
+    await _remove_orphans(db, report)
+    if verify:
+        await _verify(db, report)
+    logger.info(
+        "Attachment GC: adopted=%d recounted=%d collected=%d orphans=%d temp=%d missing=%d corrupt=%d",
+        report.adopted, report.recounted, report.collected, report.orphan_files,
+        report.stale_temp_files, len(report.missing), len(report.corrupt),
+    )
+    return report
@@ -0,0 +1,239 @@
+"""Writes `AuditLog` and `FieldChangeLog` rows for ORM changes.
+
+A session-level ``after_flush`` hook (like app.services.search_index)
+turns every model created, updated or deleted by the flush into one
+`AuditLog` row, with a per-field diff in `changes`, and every changed
+field of an update into a `FieldChangeLog` row. Both tables get one
+multi-row INSERT per flush on the flush's own connection, so the audit
+trail commits or rolls back with the change itself.
+
+Which fields are tracked is per model: by default every column except
+the bookkeeping ones and those refreshed by probes and syncs (probe and
+sync timestamps, MeshCentral agent state, WHOIS data, view counters),
+overridable per entity type with AUDIT_FIELDS (an empty list turns
+auditing off for that type). An update that touches no
+tracked field is not logged. Secrets, binary and JSON values are never
+copied into the log, only marked as changed, and long text is truncated
+to AUDIT_MAX_VALUE_LENGTH.
+
+The acting user and client IP come from `set_actor()`, which
+`get_current_user` calls for every authenticated request. Bulk
+``UPDATE``/``DELETE`` statements bypass the ORM and are not audited;
+code issuing them should write its own entries with `record()`.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import JSON, LargeBinary, event, inspect, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.attachment_blob import AttachmentBlob
+from app.models.audit_log import AuditLog
+from app.models.audit_log_daily_count import AuditLogDailyCount
+from app.models.document_version import DocumentVersion
+from app.models.field_change_log import FieldChangeLog
+from app.models.password_audit import PasswordAccessLog
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.models.search_index import SearchIndexEntry
+from app.models.ssl_probe_result import SSLProbeResult
+from app.models.system import SystemChatMessage
+from app.models.webhook_delivery import WebhookDelivery
+from app.models.webhook_event import WebhookOutboxEvent
+
+_ACTOR_KEY = "audit_actor"
+NOT_RECORDED = "[not recorded]"
+
+# Logs, derived data and append-only history: never audited.
+_EXCLUDED_MODELS = (
+    AuditLog, AuditLogDailyCount, FieldChangeLog, PasswordAccessLog, SearchIndexEntry, DocumentVersion, AttachmentBlob,
+    SystemChatMessage, WebhookOutboxEvent, WebhookDelivery, ScheduledJobRun, SSLProbeResult,
+)
+_SKIPPED_FIELDS = {"id", "created_at", "updated_at"}
+# Rewritten by background probes and syncs: tracking them would log (and
+# send webhooks for) every run. An update touching only these is not logged.
+_VOLATILE_FIELDS = {"mesh_agent_connected", "mesh_extra", "whois_data", "view_count"}
+_VOLATILE_SUFFIXES = ("_probed_at", "_sync_at", "_synced_at", "_seen_at", "_checked_at")
+_SECRET_FIELDS = {"password_hash", "password_encrypted", "totp_secret", "secret", "token_hash"}
+# Rows per INSERT, well under asyncpg's bind-parameter limit.
+_BATCH = 1000
+
+
+@dataclass(frozen=True)
+class _Spec:
+    entity_type: str
+    fields: tuple[str, ...]
+    # Fields whose values are not copied into the log.
+    opaque: frozenset[str]
+
+
+def entity_type_name(cls: type) -> str:
+    """``SSLCertificate`` -> ``ssl_certificate``"""
+    name = re.sub(r"(?<=[A-Z])(?=[A-Z][a-z])|(?<=[a-z0-9])(?=[A-Z])", "_", cls.__name__)
+    return name.lower()
+
+
+@lru_cache(maxsize=None)
+def _spec(cls: type) -> _Spec | None:
+    if issubclass(cls, _EXCLUDED_MODELS):
+        return None
+    entity_type = entity_type_name(cls)
+    columns = {attr.key: attr.columns[0] for attr in inspect(cls).column_attrs}
+    if entity_type in settings.AUDIT_FIELDS:
+        fields = tuple(f for f in settings.AUDIT_FIELDS[entity_type] if f in columns)
+    else:
+        fields = tuple(
+            k for k in columns
+            if k not in _SKIPPED_FIELDS and k not in _VOLATILE_FIELDS and not k.endswith(_VOLATILE_SUFFIXES)
+        )
+    if not fields:
+        return None
+    opaque = frozenset(
+        k for k in fields
+        if k in _SECRET_FIELDS or isinstance(columns[k].type, (LargeBinary, JSON))
+    )
+    return _Spec(entity_type, fields, opaque)
+
+
+def set_actor(session: Session, user_id: uuid.UUID | None, ip_address: str | None) -> None:
+    session.info[_ACTOR_KEY] = (user_id, ip_address)
+
+
+def _value(spec: _Spec, key: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if key in spec.opaque:
+        return NOT_RECORDED
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and len(value) > settings.AUDIT_MAX_VALUE_LENGTH:
+        return value[:settings.AUDIT_MAX_VALUE_LENGTH] + "…"
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)[:settings.AUDIT_MAX_VALUE_LENGTH]
+
+
+def _text(value: Any) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _snapshot(spec: _Spec, obj: Any, side: str) -> dict[str, Any]:
+    state = inspect(obj)
+    out = {}
+    for key in spec.fields:
+        value = state.dict.get(key)
+        if value is not None:
+            out[key] = {side: _value(spec, key, value)}
+    return out
+
+
+def _diff(spec: _Spec, obj: Any) -> dict[str, dict[str, Any]]:
+    state = inspect(obj)
+    out = {}
+    for key in spec.fields:
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if old == new:
+            continue
+        out[key] = {"old": _value(spec, key, old), "new": _value(spec, key, new)}
+    return out
+
+
+@dataclass(frozen=True)
+class Change:
+    entity_type: str
+    entity_id: uuid.UUID
+    action: str  # create | update | delete
+    changes: dict[str, dict[str, Any]]
+
+
+def collect(session: Session) -> list[Change]:
+    """What the flush in progress does to audited models. Only valid
+    inside ``after_flush``; also used by app.services.webhook_events."""
+    out = []
+    for obj in session.new:
+        if (spec := _spec(type(obj))) is not None:
+            out.append(Change(spec.entity_type, obj.id, "create", _snapshot(spec, obj, "new")))
+    for obj in session.dirty:
+        if obj in session.deleted or (spec := _spec(type(obj))) is None:
+            continue
+        if changes := _diff(spec, obj):
+            out.append(Change(spec.entity_type, obj.id, "update", changes))
+    for obj in session.deleted:
+        if (spec := _spec(type(obj))) is not None:
+            out.append(Change(spec.entity_type, obj.id, "delete", _snapshot(spec, obj, "old")))
+    return out
+
+
+def actor(session: Session) -> tuple[uuid.UUID | None, str | None]:
+    return session.info.get(_ACTOR_KEY, (None, None))
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:
+    if not settings.AUDIT_ENABLED:
+        return
+    changes = collect(session)
+    if not changes:
+        return
+    user_id, ip_address = actor(session)
+    logs = [
+        {
+            "id": uuid.uuid4(), "entity_type": c.entity_type, "entity_id": c.entity_id, "action": c.action,
+            "changes": c.changes or None, "user_id": user_id, "ip_address": ip_address,
+        }
+        for c in changes
+    ]
+    field_changes = [
+        {
+            "id": uuid.uuid4(), "entity_type": c.entity_type, "entity_id": c.entity_id, "field_name": key,
+            "old_value": _text(change["old"]), "new_value": _text(change["new"]),
+        }
+        for c in changes if c.action == "update"
+        for key, change in c.changes.items()
+    ]
+    conn = session.connection()
+    for table, rows in ((AuditLog.__table__, logs), (FieldChangeLog.__table__, field_changes)):
+        for i in range(0, len(rows), _BATCH):
+            conn.execute(insert(table).values(rows[i:i + _BATCH]))
+
+
+async def record(
+    db: AsyncSession, entity_type: str, entity_ids: list[uuid.UUID], action: str, changes: dict[str, Any] | None,
+) -> None:
+    """Log `action` on each of `entity_ids` in `db`'s transaction, for
+    changes made with bulk statements."""
+    if not settings.AUDIT_ENABLED or not entity_ids:
+        return
+    user_id, ip_address = actor(db.sync_session)
+    rows = [
+        {
+            "id": uuid.uuid4(), "entity_type": entity_type, "entity_id": entity_id, "action": action,
+            "changes": changes, "user_id": user_id, "ip_address": ip_address,
+        }
+        for entity_id in entity_ids
+    ]
+    for i in range(0, len(rows), _BATCH):
+        await db.execute(insert(AuditLog.__table__).values(rows[i:i + _BATCH]))
+
+
+def install() -> None:
+    """Register the session hook. Idempotent."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
@@ -0,0 +1,181 @@
+"""Maintenance of the month-partitioned `audit_logs` table.
+
+- `ensure_partitions()` creates the monthly partitions for the current
+  month and AUDIT_LOG_PARTITIONS_AHEAD months ahead, so inserts never land
+  in the catch-all ``audit_logs_default`` partition. Rows that did land
+  there (maintenance not run for months) get their month's partition
+  too: Postgres refuses to create a partition whose range has rows in
+  the default one, so the default partition is detached, the rows moved
+  and the partition reattached, all in one transaction. Those months can
+  then expire like any other;
+- `drop_expired()` drops whole partitions that ended more than
+  AUDIT_LOG_RETENTION_MONTHS ago (0 keeps everything);
+- `rollup()` refreshes `audit_log_daily_counts` for every complete UTC
+  day since the last rolled-up one.
+
+`maintain()` runs all three and is safe to run on any number of workers
+at once: it holds a transaction-level advisory lock.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.audit_log import AuditLog
+from app.models.audit_log_daily_count import AuditLogDailyCount
+
+logger = logging.getLogger(__name__)
+
+_LOCK_KEY = "audit_logs_maintenance"
+_DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_RE = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+@dataclass
+class MaintenanceReport:
+    created: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    days_rolled_up: int = 0
+
+
+def _add_months(d: date, n: int) -> date:
+    months = d.year * 12 + d.month - 1 + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"audit_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, timezone.utc)
+
+
+async def _partitions(db: AsyncSession) -> dict[str, date]:
+    rows = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_logs'"
+    ))
+    out = {}
+    for (name,) in rows:
+        m = _PARTITION_RE.match(name)
+        if m:
+            out[name] = date(int(m.group(1)), int(m.group(2)), 1)
+    return out
+
+
+async def _stranded_months(db: AsyncSession) -> set[date]:
+    """Months with rows in the default partition."""
+    rows = await db.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {_DEFAULT_PARTITION}"
+    ))
+    return {month for (month,) in rows}
+
+
+async def ensure_partitions(db: AsyncSession, report: MaintenanceReport) -> None:
+    existing = await _partitions(db)
+    stranded = await _stranded_months(db)
+    months = {_add_months(_today().replace(day=1), n) for n in range(settings.AUDIT_LOG_PARTITIONS_AHEAD + 1)}
+    missing = sorted(month for month in months | stranded if _partition_name(month) not in existing)
+    if not missing:
+        return
+
+    detached = bool(stranded)
+    if detached:
+        await db.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {_DEFAULT_PARTITION}"))
+    for month in missing:
+        name = _partition_name(month)
+        start, end = _midnight(month).isoformat(), _midnight(_add_months(month, 1)).isoformat()
+        await db.execute(text(
+            f"CREATE TABLE {name} PARTITION OF audit_logs FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        if month in stranded:
+            moved = await db.execute(text(
+                f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} "
+                f"WHERE created_at >= '{start}' AND created_at < '{end}' RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ))
+            logger.warning("Moved %d audit_logs rows from %s into %s", moved.rowcount, _DEFAULT_PARTITION, name)
+        report.created.append(name)
+    if detached:
+        await db.execute(text(f"ALTER TABLE audit_logs ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT"))
+
+
+async def drop_expired(db: AsyncSession, report: MaintenanceReport) -> None:
+    if settings.AUDIT_LOG_RETENTION_MONTHS <= 0:
+        return
+    cutoff = _add_months(_today().replace(day=1), -settings.AUDIT_LOG_RETENTION_MONTHS)
+    for name, month in sorted((await _partitions(db)).items(), key=lambda item: item[1]):
+        if _add_months(month, 1) <= cutoff:
+            await db.execute(text(f"DROP TABLE {name}"))
+            report.dropped.append(name)
+
+
+async def rollup(db: AsyncSession, report: MaintenanceReport) -> None:
+    """Recount the last rolled-up day (it may have been partial) through
+    yesterday."""
+    last = (await db.execute(select(func.max(AuditLogDailyCount.day)))).scalar()
+    if last is None:
+        oldest = (await db.execute(select(func.min(AuditLog.created_at)))).scalar()
+        if oldest is None:
+            return
+        last = oldest.astimezone(timezone.utc).date()
+    today = _today()
+    if last >= today:
+        return
+    # A literal, not a bind parameter, so the GROUP BY matches the select list
+    day = func.date(func.timezone(literal_column("'UTC'"), AuditLog.created_at))
+    counts = (
+        select(day, AuditLog.entity_type, AuditLog.action, func.count())
+        .where(AuditLog.created_at >= _midnight(last), AuditLog.created_at < _midnight(today))
+        .group_by(day, AuditLog.entity_type, AuditLog.action)
+    )
+    stmt = insert(AuditLogDailyCount).from_select(["day", "entity_type", "action", "count"], counts)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["day", "entity_type", "action"], set_={"count": stmt.excluded["count"]},
+    ))
+    report.days_rolled_up = (today - last).days
+
+
+async def maintain(db: AsyncSession) -> MaintenanceReport:
+    report = MaintenanceReport()
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(_LOCK_KEY))))
+    await ensure_partitions(db, report)
+    await drop_expired(db, report)
+    await rollup(db, report)
+    await db.commit()
+    if report.created or report.dropped:
+        logger.info("audit_logs partitions created %s, dropped %s", report.created, report.dropped)
+    return report
+
+
+async def activity_totals(db: AsyncSession) -> dict[tuple[str, str], int]:
+    """All-time (entity_type, action) counts: the rollup plus whatever the
+    raw log holds after the last rolled-up day."""
+    totals: dict[tuple[str, str], int] = {}
+    rows = await db.execute(
+        select(AuditLogDailyCount.entity_type, AuditLogDailyCount.action, func.sum(AuditLogDailyCount.count))
+        .group_by(AuditLogDailyCount.entity_type, AuditLogDailyCount.action)
+    )
+    for entity_type, action, n in rows:
+        totals[(entity_type, action)] = int(n)
+    last = (await db.execute(select(func.max(AuditLogDailyCount.day)))).scalar()
+    recent = select(AuditLog.entity_type, AuditLog.action, func.count()).group_by(AuditLog.entity_type, AuditLog.action)
+    if last is not None:
+        recent = recent.where(AuditLog.created_at >= _midnight(last + timedelta(days=1)))
+    for entity_type, action, n in await db.execute(recent):
+        totals[(entity_type, action)] = totals.get((entity_type, action), 0) + n
+    return totals
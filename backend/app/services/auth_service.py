@@ -4,7 +4,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ async def seed_user(db: AsyncSession) -> None:
     user = User(
         username=settings.SEED_USERNAME,
         email=f"{settings.SEED_USERNAME}@docuvault.local",
-        password_hash=hash_password(settings.SEED_PASSWORD),
+        password_hash=await hash_password_async(settings.SEED_PASSWORD),
         full_name="Andrei Trimbitas",
         is_active=True,
     )
@@ -32,7 +32,7 @@ async def seed_user(db: AsyncSession) -> None:
 async def authenticate(db: AsyncSession, username: str, password: str) -> User | None:
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password_async(password, user.password_hash):
         return None
     if not user.is_active:
         return None
@@ -0,0 +1,153 @@
+"""Delta-compressed document version history.
+
+The newest version of a document always keeps its full `content` (rows
+with a NULL `delta` are full copies). When a new version is saved, the
+previous newest row is rewritten as a reverse delta: a diff-match-patch
+patch that turns the newer version's serialized content back into its own. Every `DOCUMENT_VERSION_KEYFRAME_INTERVAL`-th
+version keeps its full content as a keyframe, so materializing any version
+applies at most that many patches, walking down from the nearest keyframe
+(or the newest version) above it.
+
+Content is serialized as canonical JSON (sorted keys, no whitespace) so
+the patches are stable. Diffing runs in a worker thread: diff-match-patch
+is pure Python and can take up to its timeout on large documents.
+"""
+
+import asyncio
+import json
+import uuid
+from typing import Any
+
+from diff_match_patch import diff_match_patch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.config import settings
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.services.text_extraction import rich_text_to_plain
+
+
+class VersionCorruptError(Exception):
+    """A stored delta no longer applies cleanly to its base."""
+
+
+def serialize(content: dict | None) -> str:
+    return json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def content_size(content: dict | None) -> int | None:
+    if content is None:
+        return None
+    return len(serialize(content).encode())
+
+
+def is_keyframe(version: int) -> bool:
+    return version % settings.DOCUMENT_VERSION_KEYFRAME_INTERVAL == 0
+
+
+def make_delta(newer: str, older: str) -> str | None:
+    """Patch text turning `newer` into `older`, or None if the round trip
+    would not reproduce `older` exactly (the caller then keeps full content)."""
+    dmp = diff_match_patch()
+    patches = dmp.patch_make(newer, older)
+    delta = dmp.patch_toText(patches)
+    try:
+        if apply_delta(delta, newer) != older:
+            return None
+    except VersionCorruptError:
+        return None
+    return delta
+
+
+def apply_delta(delta: str, newer: str) -> str:
+    dmp = diff_match_patch()
+    text, applied = dmp.patch_apply(dmp.patch_fromText(delta), newer)
+    if not all(applied):
+        raise VersionCorruptError("delta did not apply cleanly")
+    return text
+
+
+def _compact(newer_content: dict | None, older_content: dict | None) -> str | None:
+    return make_delta(serialize(newer_content), serialize(older_content))
+
+
+async def record_version(
+    db: AsyncSession, doc: Document, content: dict | None, change_summary: str
+) -> DocumentVersion:
+    """Append a new version holding `content` and delta-encode the previous
+    newest version against it. The caller must hold a lock on `doc`."""
+    previous = (
+        await db.execute(
+            select(DocumentVersion)
+            .options(undefer(DocumentVersion.content), undefer(DocumentVersion.delta))
+            .where(DocumentVersion.document_id == doc.id)
+            .order_by(DocumentVersion.version.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    if previous is not None and previous.delta is None and not is_keyframe(previous.version):
+        delta = await asyncio.to_thread(_compact, content, previous.content)
+        if delta is not None:
+            previous.delta = delta
+            previous.content = None
+
+    doc.version += 1
+    version = DocumentVersion(
+        document_id=doc.id, version=doc.version, content=content,
+        content_size=content_size(content), change_summary=change_summary,
+    )
+    db.add(version)
+    return version
+
+
+async def materialize(db: AsyncSession, document_id: uuid.UUID, version: int) -> DocumentVersion | None:
+    """Return the `version` row with `content` reconstructed.
+
+    The returned row is expunged from the session so the rebuilt content
+    is never flushed back over the stored delta.
+    """
+    base = (
+        await db.execute(
+            select(func.min(DocumentVersion.version))
+            .where(DocumentVersion.document_id == document_id)
+            .where(DocumentVersion.version >= version)
+            .where(DocumentVersion.delta.is_(None))
+        )
+    ).scalar()
+    if base is None:
+        return None
+    rows = (
+        await db.execute(
+            select(DocumentVersion)
+            .options(undefer(DocumentVersion.content), undefer(DocumentVersion.delta))
+            .where(DocumentVersion.document_id == document_id)
+            .where(DocumentVersion.version.between(version, base))
+            .order_by(DocumentVersion.version.desc())
+        )
+    ).scalars().all()
+    if not rows or rows[-1].version != version:
+        return None
+
+    def rebuild() -> dict | None:
+        text = serialize(rows[0].content)
+        for row in rows[1:]:
+            text = apply_delta(row.delta, text)
+        return json.loads(text)
+
+    target = rows[-1]
+    content = target.content if len(rows) == 1 else await asyncio.to_thread(rebuild)
+    for row in rows:
+        db.expunge(row)
+    target.content = content
+    return target
+
+
+def diff(old: Any, new: Any) -> list[dict[str, str]]:
+    """Human-readable diff between two versions' plain text."""
+    dmp = diff_match_patch()
+    diffs = dmp.diff_main(rich_text_to_plain(old), rich_text_to_plain(new))
+    dmp.diff_cleanupSemantic(diffs)
+    ops = {dmp.DIFF_DELETE: "delete", dmp.DIFF_INSERT: "insert", dmp.DIFF_EQUAL: "equal"}
+    return [{"op": ops[op], "text": text} for op, text in diffs]
@@ -9,7 +9,7 @@ free-form WHOIS text needed).
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 
 import httpx
@@ -73,3 +73,16 @@ async def probe_domain(domain_name: str, timeout: float = 10.0) -> dict[str, Any
         "nameservers": [ns.get("ldhName") for ns in raw.get("nameservers") or [] if ns.get("ldhName")],
         "raw": raw,
     }
+
+
+def apply_probe(domain: Any, info: dict[str, Any]) -> None:
+    """Overwrite a Domain's registrar and dates with an RDAP result (fields
+    RDAP left out are kept)."""
+    if info["registrar"]:
+        domain.registrar = info["registrar"]
+    if info["registration_date"]:
+        domain.registration_date = info["registration_date"]
+    if info["expiration_date"]:
+        domain.expiration_date = info["expiration_date"]
+    domain.whois_data = info["raw"]
+    domain.last_probed_at = datetime.now(timezone.utc)
@@ -0,0 +1,96 @@
+"""The scheduled jobs run by app.services.scheduler.
+
+Each opens its own sessions and returns a JSON-able summary, which is
+stored with the run in `scheduled_job_runs`. An exception marks the run
+failed.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict
+from typing import Any
+
+from sqlalchemy import select
+
+from app.core.database import async_session
+from app.models.domain import Domain
+from app.services import (
+    attachment_storage, audit_retention, domain_probe, registrar_service, share_links, ssl_sweep,
+    upload_sessions, webhook_dispatcher,
+)
+from app.services.meshcentral_service import sync_meshcentral
+
+logger = logging.getLogger(__name__)
+
+# Commit probe results every this many rows
+_COMMIT_EVERY = 50
+# Errors kept in a run's summary
+_MAX_ERRORS = 50
+
+
+async def ssl_probe_sweep() -> dict[str, Any]:
+    async with async_session() as db:
+        return asdict(await ssl_sweep.sweep(db))
+
+
+async def domain_probe_sweep() -> dict[str, Any]:
+    """Refresh registrar and dates of every unarchived domain from RDAP."""
+    probed = 0
+    errors: list[str] = []
+    async with async_session() as db:
+        domains = (await db.execute(select(Domain).where(Domain.archived_at.is_(None)))).scalars().all()
+        for n, domain in enumerate(domains, 1):
+            try:
+                info = await domain_probe.probe_domain(domain.domain_name)
+            except Exception as e:
+                errors.append(f"{domain.domain_name}: {e}")
+                continue
+            domain_probe.apply_probe(domain, info)
+            probed += 1
+            if n % _COMMIT_EVERY == 0:
+                await db.commit()
+        await db.commit()
+    return {"probed": probed, "failed": len(errors), "errors": errors[:_MAX_ERRORS]}
+
+
+async def meshcentral_sync() -> dict[str, Any]:
+    async with async_session() as db:
+        try:
+            stats = await sync_meshcentral(db)
+        except ValueError as e:  # not configured
+            return {"skipped": str(e)}
+        await db.commit()
+    stats["errors"] = stats["errors"][:_MAX_ERRORS]
+    return stats
+
+
+async def registrar_refresh() -> dict[str, Any]:
+    """Re-fetch every configured registrar's domain list (and refresh this
+    worker's cache of it)."""
+    async with async_session() as db:
+        result = await registrar_service.list_all(db, force=True)
+    return {"configured": result["configured"], "domains": len(result["domains"]), "errors": result["errors"]}
+
+
+async def audit_maintenance() -> dict[str, Any]:
+    async with async_session() as db:
+        return asdict(await audit_retention.maintain(db))
+
+
+async def share_links_sweep() -> dict[str, Any]:
+    async with async_session() as db:
+        removed = await share_links.sweep(db)
+        await db.commit()
+    return {"removed": removed}
+
+
+async def attachments_gc() -> dict[str, Any]:
+    async with async_session() as db:
+        report = await attachment_storage.gc(db)
+    return {**asdict(report), "expired_uploads": await upload_sessions.expire()}
+
+
+async def webhook_deliveries_purge() -> dict[str, Any]:
+    async with async_session() as db:
+        return {"removed": await webhook_dispatcher.purge(db)}
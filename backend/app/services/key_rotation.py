@@ -0,0 +1,188 @@
+"""Re-encrypts stored secrets under the primary encryption key.
+
+Walks ``passwords.password_encrypted``, ``users.totp_secret`` (enabled
+TOTP only: during setup the secret is still plaintext) and the registrar
+credentials in ``app_settings``, in id order and `_BATCH` rows per
+transaction, rewriting every value that is not already under the primary
+key (see app.core.encryption). Rows are locked while they are rewritten,
+so concurrent edits are not lost, and `updated_at` is left alone.
+
+After each batch the position is checkpointed in the
+``encryption_key_rotation`` app_settings row, so an interrupted run picks
+up where it stopped; the checkpoint is dropped when a run completes or
+the primary key changes. The rewrites are bulk UPDATEs, so each batch
+also writes a ``key_rotation`` audit entry per row it re-encrypted and
+invalidates the rotated users in the user cache, in the same transaction.
+Old and new keys both decrypt throughout, so the
+app keeps serving; remove the old key from ENCRYPTION_KEYS only after a
+run has completed without failures.
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import Column, bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.encryption import primary_key_id, reencrypt
+from app.models.app_settings import AppSettings
+from app.models.password import Password
+from app.models.user import User
+from app.services import audit, registrar_service, user_cache
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "encryption_key_rotation"
+_BATCH = 500
+_DONE = "done"
+
+# (target, scanned so far, re-encrypted so far)
+Progress = Callable[[str, int, int], None]
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.b64decode(value)
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+@dataclass(frozen=True)
+class _Target:
+    name: str
+    entity_type: str
+    column: Column
+    where: tuple = ()
+    decode: Callable[[Any], bytes] = bytes
+    encode: Callable[[bytes], Any] = bytes
+    # Called with the re-encrypted ids, in the batch's transaction
+    rotated: Callable[[AsyncSession, list[uuid.UUID]], Awaitable[None]] | None = None
+
+
+_TARGETS = [
+    _Target("passwords", audit.entity_type_name(Password), Password.__table__.c.password_encrypted),
+    _Target(
+        "users.totp_secret", audit.entity_type_name(User), User.__table__.c.totp_secret,
+        where=(User.__table__.c.totp_enabled.is_(True),), decode=_b64decode, encode=_b64encode,
+        rotated=user_cache.invalidate,
+    ),
+]
+
+
+@dataclass
+class RotationReport:
+    key_id: str
+    scanned: dict[str, int] = field(default_factory=dict)
+    rotated: dict[str, int] = field(default_factory=dict)
+    failed: list[str] = field(default_factory=list)
+
+
+async def _load_checkpoint(db: AsyncSession, key_id: str) -> dict[str, Any]:
+    value = (
+        await db.execute(select(AppSettings.value).where(AppSettings.key == CHECKPOINT_KEY))
+    ).scalar_one_or_none() or {}
+    if value.get("key_id") != key_id:
+        return {"key_id": key_id}
+    return dict(value)
+
+
+async def _save_checkpoint(db: AsyncSession, checkpoint: dict[str, Any]) -> None:
+    await db.execute(
+        insert(AppSettings)
+        .values(key=CHECKPOINT_KEY, value=checkpoint)
+        .on_conflict_do_update(index_elements=[AppSettings.key], set_={"value": checkpoint, "updated_at": func.now()})
+    )
+
+
+async def _rotate_target(
+    db: AsyncSession, target: _Target, checkpoint: dict[str, Any], report: RotationReport, progress: Progress,
+) -> None:
+    table = target.column.table
+    scanned = rotated = 0
+    last = checkpoint.get(target.name)
+    if last == _DONE:
+        return
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values({target.column.name: bindparam("b_value"), "updated_at": table.c.updated_at})
+    )
+    while True:
+        query = (
+            select(table.c.id, target.column)
+            .where(target.column.is_not(None), *target.where)
+            .order_by(table.c.id)
+            .limit(_BATCH)
+            .with_for_update()
+        )
+        if last is not None:
+            query = query.where(table.c.id > uuid.UUID(last))
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        updates = []
+        for row_id, value in rows:
+            try:
+                new = reencrypt(target.decode(value))
+            except Exception as e:  # noqa: BLE001 — report and keep going
+                report.failed.append(f"{target.name} {row_id}: {type(e).__name__}")
+                continue
+            if new is not None:
+                updates.append({"b_id": row_id, "b_value": target.encode(new)})
+        if updates:
+            await db.execute(stmt, updates)
+            ids = [u["b_id"] for u in updates]
+            await audit.record(db, target.entity_type, ids, "key_rotation", {
+                target.column.name: {"old": audit.NOT_RECORDED, "new": audit.NOT_RECORDED},
+                "key_id": {"new": checkpoint["key_id"]},
+            })
+            if target.rotated is not None:
+                await target.rotated(db, ids)
+        last = str(rows[-1].id)
+        checkpoint[target.name] = last
+        await _save_checkpoint(db, checkpoint)
+        await db.commit()
+        scanned += len(rows)
+        rotated += len(updates)
+        progress(target.name, scanned, rotated)
+
+    checkpoint[target.name] = _DONE
+    await _save_checkpoint(db, checkpoint)
+    await db.commit()
+    report.scanned[target.name] = scanned
+    report.rotated[target.name] = rotated
+
+
+def _log_progress(target: str, scanned: int, rotated: int) -> None:
+    logger.info("Key rotation: %s scanned %d, re-encrypted %d", target, scanned, rotated)
+
+
+async def rotate(db: AsyncSession, progress: Progress = _log_progress) -> RotationReport:
+    """Re-encrypt everything under the primary key, resuming a previous
+    interrupted run for the same key."""
+    key_id = primary_key_id()
+    report = RotationReport(key_id=key_id)
+    checkpoint = await _load_checkpoint(db, key_id)
+    for target in _TARGETS:
+        await _rotate_target(db, target, checkpoint, report, progress)
+
+    if checkpoint.get("registrars") != _DONE:
+        scanned, rotated, failed = await registrar_service.reencrypt_credentials(db)
+        report.scanned["registrars"] = scanned
+        report.rotated["registrars"] = rotated
+        report.failed += [f"registrars {name}" for name in failed]
+        checkpoint["registrars"] = _DONE
+        await _save_checkpoint(db, checkpoint)
+        await db.commit()
+        progress("registrars", scanned, rotated)
+
+    await db.execute(delete(AppSettings).where(AppSettings.key == CHECKPOINT_KEY))
+    await db.commit()
+    return report
@@ -1,10 +1,21 @@
+import csv
+import io
 import uuid
+from dataclasses import dataclass
+from datetime import datetime
 
+import pyzipper
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.encryption import encrypt, decrypt
 from app.models.password import Password
 from app.models.password_audit import PasswordAccessLog
+from app.services import access_log_buffer
+
+# Written in the request's transaction while PASSWORD_ACCESS_LOG_SYNC_REVEAL is on.
+_SENSITIVE_ACTIONS = {"reveal", "export", "share_view"}
 
 
 async def encrypt_password(plaintext: str) -> bytes:
@@ -17,13 +28,22 @@ async def decrypt_password(password: Password) -> str:
     return decrypt(password.password_encrypted)
 
 
+def _buffered(action: str) -> bool:
+    if settings.PASSWORD_ACCESS_LOG_SYNC_REVEAL and action in _SENSITIVE_ACTIONS:
+        return False
+    return access_log_buffer.running()
+
+
 async def log_access(
     db: AsyncSession,
     password_id: uuid.UUID,
-    user_id: uuid.UUID,
+    user_id: uuid.UUID | None,
     action: str,
     ip_address: str | None = None,
 ) -> None:
+    if _buffered(action):
+        access_log_buffer.enqueue(db.sync_session, [password_id], user_id, action, ip_address)
+        return
     log = PasswordAccessLog(
         password_id=password_id,
         user_id=user_id,
@@ -32,3 +52,64 @@ async def log_access(
     )
     db.add(log)
     await db.flush()
+
+
+async def log_access_many(
+    db: AsyncSession,
+    password_ids: list[uuid.UUID],
+    user_id: uuid.UUID | None,
+    action: str,
+    ip_address: str | None = None,
+) -> None:
+    """`log_access` for many passwords in one multi-row INSERT."""
+    if not password_ids:
+        return
+    if _buffered(action):
+        access_log_buffer.enqueue(db.sync_session, password_ids, user_id, action, ip_address)
+        return
+    await db.execute(
+        insert(PasswordAccessLog).values([
+            {"id": uuid.uuid4(), "password_id": pid, "user_id": user_id, "action": action, "ip_address": ip_address}
+            for pid in password_ids
+        ])
+    )
+
+
+def decrypt_many(encrypted: dict[uuid.UUID, bytes | None]) -> dict[uuid.UUID, str]:
+    return {pid: decrypt(data) if data else "" for pid, data in encrypted.items()}
+
+
+@dataclass(frozen=True)
+class ExportRow:
+    group: str
+    title: str
+    username: str | None
+    password_encrypted: bytes | None
+    url: str | None
+    notes: str | None
+    updated_at: datetime
+    created_at: datetime
+
+
+# KeePassXC's CSV layout; KeePass and most managers can map these columns.
+EXPORT_COLUMNS = ["Group", "Title", "Username", "Password", "URL", "Notes", "Last Modified", "Created"]
+
+
+def build_export(rows: list[ExportRow], passphrase: str, csv_name: str) -> bytes:
+    """An AES-256 encrypted zip (WinZip AE-2) holding one CSV of `rows`
+    with their passwords decrypted. CPU bound: run it in a thread."""
+    text = io.StringIO()
+    writer = csv.writer(text, quoting=csv.QUOTE_ALL)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row.group, row.title, row.username or "",
+            decrypt(row.password_encrypted) if row.password_encrypted else "",
+            row.url or "", row.notes or "", row.updated_at.isoformat(), row.created_at.isoformat(),
+        ])
+    buf = io.BytesIO()
+    with pyzipper.AESZipFile(buf, "w", compression=pyzipper.ZIP_DEFLATED, encryption=pyzipper.WZ_AES) as zf:
+        zf.setpassword(passphrase.encode("utf-8"))
+        zf.setencryption(pyzipper.WZ_AES, nbits=256)
+        zf.writestr(csv_name, text.getvalue().encode("utf-8"))
+    return buf.getvalue()
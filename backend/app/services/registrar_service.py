@@ -22,7 +22,7 @@ from typing import Any
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.encryption import decrypt, encrypt
+from app.core.encryption import decrypt, encrypt, reencrypt
 from app.models.app_settings import AppSettings
 from app.services.registrars import REGISTRY, RegistrarError
 
@@ -103,6 +103,51 @@ def _is_configured(provider_key: str, stored: dict[str, str]) -> bool:
     return all(stored.get(n) for n in provider.required_field_names())
 
 
+def _reencrypt_value(value: str) -> str | None:
+    new = reencrypt(base64.b64decode(value))
+    return base64.b64encode(new).decode("ascii") if new is not None else None
+
+
+async def reencrypt_credentials(db: AsyncSession) -> tuple[int, int, list[str]]:
+    """Re-encrypt stored secrets under the primary key (see
+    app.services.key_rotation). Returns (secrets seen, re-encrypted,
+    names of those that failed to decrypt)."""
+    rows = (
+        await db.execute(
+            select(AppSettings).where(AppSettings.key.in_([SETTINGS_KEY, "ionos"])).with_for_update()
+        )
+    ).scalars().all()
+    scanned = rotated = 0
+    failed: list[str] = []
+    for row in rows:
+        value = {k: dict(v) if isinstance(v, dict) else v for k, v in (row.value or {}).items()}
+        if row.key == SETTINGS_KEY:
+            fields = [
+                (value[key], name) for key, provider in REGISTRY.items() if isinstance(value.get(key), dict)
+                for name in provider.secret_field_names()
+            ]
+        else:
+            fields = [(value, "secret_enc")]
+        changed = False
+        for holder, name in fields:
+            if not holder.get(name):
+                continue
+            scanned += 1
+            try:
+                new = _reencrypt_value(holder[name])
+            except Exception:  # noqa: BLE001
+                failed.append(f"{row.key}.{name}")
+                continue
+            if new is not None:
+                holder[name] = new
+                rotated += 1
+                changed = True
+        if changed:
+            row.value = value
+    await db.flush()
+    return scanned, rotated, failed
+
+
 # --- Public API ---
 
 async def get_status(db: AsyncSession) -> list[dict[str, Any]]:
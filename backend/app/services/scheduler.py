@@ -0,0 +1,231 @@
+"""In-process job scheduler.
+
+Every worker runs an APScheduler ``AsyncIOScheduler`` with its own
+in-memory job store; the run history in `scheduled_job_runs` is what
+the workers share. Before running, a job takes the session-level
+advisory lock ``pg_try_advisory_lock(hashtext('scheduler:<job id>'))`` on
+a connection of its own. Whichever worker or replica gets it runs the
+job, unless the history shows a run started less than an interval ago,
+in which case the worker moves its own next run to when that one is
+due. So with N uvicorn workers each job runs once per interval.
+
+Every run is recorded in `scheduled_job_runs` with its worker, duration,
+summary or traceback. A run left "running" by a worker that died is
+marked failed by the next worker to take the job's lock.
+
+The jobs and their default intervals are in `JOBS`. SCHEDULER_INTERVALS
+overrides an interval in minutes, and 0 disables the job. `start()`
+schedules each job an interval after its last run, so a restart does not
+push the next run back.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import func, insert, select, update
+
+from app.config import settings
+from app.core.database import async_session, engine
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.services import jobs
+
+logger = logging.getLogger(__name__)
+
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+_LOCK_PREFIX = "scheduler:"
+_ERROR_CHARS = 10_000
+
+
+@dataclass(frozen=True)
+class Job:
+    description: str
+    minutes: int
+    run: Callable[[], Awaitable[dict[str, Any] | None]]
+
+
+JOBS: dict[str, Job] = {
+    "ssl_probe": Job("Probe the hosts of all SSL certificates", 24 * 60, jobs.ssl_probe_sweep),
+    "domain_probe": Job("Refresh domains from RDAP", 24 * 60, jobs.domain_probe_sweep),
+    "meshcentral_sync": Job("Sync organizations and devices from MeshCentral", 60, jobs.meshcentral_sync),
+    "registrar_refresh": Job("Refresh registrar domain lists", 6 * 60, jobs.registrar_refresh),
+    "audit_maintenance": Job("Audit log partitions, retention and rollup", 24 * 60, jobs.audit_maintenance),
+    "share_links_sweep": Job("Delete expired password share links", 60, jobs.share_links_sweep),
+    "attachments_gc": Job("Attachment blob GC and expired uploads", 24 * 60, jobs.attachments_gc),
+    "webhook_deliveries_purge": Job("Delete old webhook deliveries", 24 * 60, jobs.webhook_deliveries_purge),
+}
+
+_scheduler: AsyncIOScheduler | None = None
+_manual_runs: set[asyncio.Task] = set()
+
+
+def interval_minutes(job_id: str) -> int:
+    return settings.SCHEDULER_INTERVALS.get(job_id, JOBS[job_id].minutes)
+
+
+def running() -> bool:
+    return _scheduler is not None and _scheduler.running
+
+
+async def _execute(job_id: str, job: Job, trigger: str) -> None:
+    run_id = uuid.uuid4()
+    async with async_session() as db:
+        # We hold the lock, so any other "running" row is from a dead worker.
+        await db.execute(
+            update(ScheduledJobRun)
+            .where(ScheduledJobRun.job_id == job_id, ScheduledJobRun.status == "running")
+            .values(status="failed", finished_at=func.now(), error="interrupted")
+        )
+        await db.execute(insert(ScheduledJobRun).values(
+            id=run_id, job_id=job_id, status="running", trigger=trigger, worker=WORKER,
+        ))
+        await db.commit()
+
+    status, result, error = "succeeded", None, None
+    started = time.monotonic()
+    try:
+        result = await job.run()
+    except Exception:
+        logger.exception("Scheduled job %s failed", job_id)
+        status, error = "failed", traceback.format_exc()[-_ERROR_CHARS:]
+    duration_ms = int((time.monotonic() - started) * 1000)
+
+    async with async_session() as db:
+        await db.execute(
+            update(ScheduledJobRun)
+            .where(ScheduledJobRun.id == run_id)
+            .values(status=status, finished_at=func.now(), duration_ms=duration_ms, result=result, error=error)
+        )
+        await db.commit()
+    logger.info("Scheduled job %s %s in %d ms", job_id, status, duration_ms)
+
+
+async def _last_started(job_ids: list[str]) -> dict[str, datetime]:
+    async with async_session() as db:
+        result = await db.execute(
+            select(ScheduledJobRun.job_id, func.max(ScheduledJobRun.started_at))
+            .where(ScheduledJobRun.job_id.in_(job_ids), ScheduledJobRun.trigger == "schedule")
+            .group_by(ScheduledJobRun.job_id)
+        )
+        return dict(result.all())
+
+
+def _due_after(job_id: str, last: datetime) -> datetime | None:
+    """When the run after one started at `last` is due, or None if it is
+    due now. Slightly early counts as due: this worker's own timer fires
+    a moment before the start time its previous run recorded."""
+    interval = timedelta(minutes=interval_minutes(job_id))
+    due = last + interval
+    if datetime.now(timezone.utc) >= due - min(interval / 10, timedelta(minutes=1)):
+        return None
+    return due
+
+
+async def run_job(job_id: str, trigger: str = "schedule") -> bool:
+    """Run `job_id` unless a worker is already running it or, for a
+    scheduled run, another worker has already done this interval's run;
+    returns whether it ran. The scheduler's entry point, also used for
+    manual runs."""
+    job = JOBS.get(job_id)
+    if job is None:
+        logger.warning("Unknown scheduled job %s; its schedule is dropped on the next start", job_id)
+        return False
+    lock = func.hashtext(_LOCK_PREFIX + job_id)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not (await conn.execute(select(func.pg_try_advisory_lock(lock)))).scalar():
+            logger.debug("Scheduled job %s is running elsewhere; skipped", job_id)
+            return False
+        try:
+            if trigger == "schedule":
+                last = (await _last_started([job_id])).get(job_id)
+                due = _due_after(job_id, last) if last is not None else None
+                if due is not None:
+                    logger.debug("Scheduled job %s already ran at %s; next due %s", job_id, last, due)
+                    if running() and _scheduler.get_job(job_id) is not None:
+                        _scheduler.reschedule_job(job_id, trigger=_trigger(job_id, due))
+                    return False
+            await _execute(job_id, job, trigger)
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(lock)))
+    return True
+
+
+def _first_run(job_id: str, last: datetime | None, now: datetime) -> datetime:
+    """When a worker starting at `now` first runs the job: an interval
+    after its last scheduled run (now if that is past), or an interval
+    from now if it never ran."""
+    interval = timedelta(minutes=interval_minutes(job_id))
+    if last is None:
+        return now + interval
+    return max(last + interval, now)
+
+
+def _trigger(job_id: str, first: datetime) -> IntervalTrigger:
+    return IntervalTrigger(minutes=interval_minutes(job_id), start_date=first, timezone=timezone.utc)
+
+
+async def start() -> None:
+    global _scheduler
+    if running():
+        return
+    enabled = [job_id for job_id in JOBS if interval_minutes(job_id) > 0]
+    last_started = await _last_started(enabled)
+    now = datetime.now(timezone.utc)
+    scheduler = AsyncIOScheduler(
+        # A run missed while the worker was busy happens once, late.
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": None},
+        timezone=timezone.utc,
+    )
+    for job_id in enabled:
+        interval = timedelta(minutes=interval_minutes(job_id))
+        first = _first_run(job_id, last_started.get(job_id), now)
+        # An interval trigger never fires before its start date, so an
+        # overdue job gets its run now explicitly and counts on from it.
+        scheduler.add_job(
+            run_job,
+            _trigger(job_id, first if first > now else now + interval),
+            args=[job_id],
+            id=job_id,
+            name=JOBS[job_id].description,
+            next_run_time=first,
+        )
+    scheduler.start()
+    _scheduler = scheduler
+
+
+async def stop() -> None:
+    """Stop scheduling and cancel runs in progress (their history rows are
+    marked failed by the next run of the job)."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+    for task in list(_manual_runs):
+        task.cancel()
+    await asyncio.gather(*_manual_runs, return_exceptions=True)
+
+
+def trigger(job_id: str) -> None:
+    """Run `job_id` now, in the background."""
+    task = asyncio.create_task(run_job(job_id, "manual"))
+    _manual_runs.add(task)
+    task.add_done_callback(_manual_runs.discard)
+
+
+def next_run_times() -> dict[str, datetime | None]:
+    """This worker's next run of each job."""
+    if not running():
+        return {}
+    return {job.id: job.next_run_time for job in _scheduler.get_jobs()}
@@ -0,0 +1,339 @@
+"""Maintains the denormalized `search_index` table.
+
+Every searchable model is registered in `_SPECS` with a function that
+turns a row into ``(title, body)``. A session-level ``after_flush`` hook
+collects the searchable rows touched by the flush and writes them back in
+one multi-row upsert (plus one delete), on the same connection and in the
+same transaction as the change itself. Document bodies and flexible-asset
+field values are flattened to text (app.services.text_extraction) at this
+point, so queries never touch the JSONB. `rebuild()` re-derives the whole
+table from the source tables for backfills.
+
+The same hook notes which entity types changed so that, once the
+transaction commits, their entries in the per-process `/search/suggest`
+cache are dropped.
+
+Bulk ``UPDATE``/``DELETE`` statements bypass the ORM and therefore this
+hook; code issuing them should call `reindex()` for the affected ids.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Any, Callable
+
+from sqlalchemy import delete, event, exists, inspect, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, lazyload
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.configuration import Configuration
+from app.models.contact import Contact
+from app.models.document import Document
+from app.models.domain import Domain
+from app.models.flexible_asset import FlexibleAsset
+from app.models.flexible_asset_field import FlexibleAssetField
+from app.models.location import Location
+from app.models.organization import Organization
+from app.models.password import Password
+from app.models.search_index import SearchIndexEntry
+from app.models.ssl_certificate import SSLCertificate
+from app.models.system import System
+from app.services.text_extraction import field_values_to_plain, rich_text_to_plain
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_KEY = "search_index_changed"
+
+# Rows per statement; keeps multi-row upserts well under asyncpg's 32767
+# bind-parameter limit.
+_BATCH = 1000
+
+
+def _join(*parts: Any) -> str | None:
+    text = " ".join(str(p) for p in parts if p)
+    return text or None
+
+
+@dataclass
+class _Context:
+    # asset_type_id -> field ids/names of "password" fields, never indexed
+    hidden_fields: dict[uuid.UUID, set[str]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Spec:
+    entity_type: str
+    # (get, ctx) -> (title, body); `get(name)` reads one attribute of the row
+    extract: Callable[[Callable[[str], Any], _Context], tuple[str, str | None]]
+    has_org: bool = True
+
+
+_SPECS: dict[type, _Spec] = {
+    Organization: _Spec(
+        "organization",
+        lambda g, ctx: (g("name"), _join(g("description"), g("website"), g("phone"), g("address"))),
+    ),
+    Configuration: _Spec(
+        "configuration",
+        lambda g, ctx: (
+            g("name"),
+            _join(
+                g("configuration_type"), g("hostname"), g("ip_address"), g("mac_address"),
+                g("serial_number"), g("operating_system"), g("manufacturer"), g("model"), g("notes"),
+            ),
+        ),
+    ),
+    # Never index the secret itself — only the metadata around it.
+    Password: _Spec("password", lambda g, ctx: (g("name"), _join(g("username"), g("url"), g("notes")))),
+    Document: _Spec("document", lambda g, ctx: (g("title"), rich_text_to_plain(g("content")) or None)),
+    Domain: _Spec("domain", lambda g, ctx: (g("domain_name"), _join(g("registrar"), g("notes")))),
+    Contact: _Spec(
+        "contact",
+        lambda g, ctx: (
+            _join(g("first_name"), g("last_name")) or "",
+            _join(g("title"), g("email"), g("phone"), g("mobile"), g("notes")),
+        ),
+    ),
+    Location: _Spec(
+        "location",
+        lambda g, ctx: (
+            g("name"),
+            _join(g("address_line1"), g("address_line2"), g("city"), g("state"), g("zip_code"), g("country")),
+        ),
+    ),
+    SSLCertificate: _Spec(
+        "ssl_certificate",
+        lambda g, ctx: (g("common_name"), _join(g("issuer"), g("host"), *(g("sans") or []))),
+    ),
+    FlexibleAsset: _Spec(
+        "flexible_asset",
+        lambda g, ctx: (
+            g("name"),
+            field_values_to_plain(g("field_values"), ctx.hidden_fields.get(g("asset_type_id"))) or None,
+        ),
+    ),
+    System: _Spec(
+        "system",
+        lambda g, ctx: (
+            g("name"),
+            _join(g("category"), g("short_description"), *(g("tags") or []), g("body")),
+        ),
+        has_org=False,
+    ),
+}
+
+ENTITY_TYPES: dict[str, type] = {spec.entity_type: model for model, spec in _SPECS.items()}
+
+# Hot typeahead prefixes, per entity type: (prefix, organization_id, limit) -> results
+suggest_cache: dict[str, TTLCache] = {
+    entity_type: TTLCache(settings.SEARCH_SUGGEST_CACHE_SIZE, settings.SEARCH_SUGGEST_CACHE_TTL_SECONDS)
+    for entity_type in ENTITY_TYPES
+}
+
+
+def _mark_changed(info: dict, entity_types: Any) -> None:
+    info.setdefault(_CHANGED_KEY, set()).update(entity_types)
+
+
+def _hidden_fields_query(asset_type_ids: set[uuid.UUID]):
+    return select(FlexibleAssetField.asset_type_id, FlexibleAssetField.id, FlexibleAssetField.name).where(
+        FlexibleAssetField.asset_type_id.in_(asset_type_ids),
+        FlexibleAssetField.field_type == "password",
+    )
+
+
+def _context_from_rows(rows) -> _Context:
+    ctx = _Context()
+    for asset_type_id, field_id, name in rows:
+        ctx.hidden_fields.setdefault(asset_type_id, set()).update({str(field_id), name})
+    return ctx
+
+
+def _asset_type_ids(objs, *, from_state: bool) -> set[uuid.UUID]:
+    ids = set()
+    for obj in objs:
+        if isinstance(obj, FlexibleAsset):
+            ids.add(inspect(obj).dict.get("asset_type_id") if from_state else obj.asset_type_id)
+    ids.discard(None)
+    return ids
+
+
+async def _load_context(db: AsyncSession, objs) -> _Context:
+    type_ids = _asset_type_ids(objs, from_state=False)
+    if not type_ids:
+        return _Context()
+    return _context_from_rows((await db.execute(_hidden_fields_query(type_ids))).all())
+
+
+def _entry(obj: Any, spec: _Spec, ctx: _Context, *, from_state: bool) -> dict[str, Any]:
+    if from_state:
+        # Freshly inserted rows: read what was written rather than touching
+        # unloaded attributes, which would cost a refresh SELECT per row.
+        values = inspect(obj).dict
+        get = values.get
+    else:
+        get = lambda name: getattr(obj, name)  # noqa: E731
+    title, body = spec.extract(get, ctx)
+    if isinstance(obj, Organization):
+        org_id = obj.id
+    else:
+        org_id = get("organization_id") if spec.has_org else None
+    return {
+        "entity_type": spec.entity_type,
+        "entity_id": obj.id,
+        "organization_id": org_id,
+        "title": (title or "")[:2000],
+        "body": body,
+        "archived": get("archived_at") is not None,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+
+def _upsert(rows: list[dict[str, Any]]):
+    stmt = insert(SearchIndexEntry).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[SearchIndexEntry.entity_type, SearchIndexEntry.entity_id],
+        set_={
+            "organization_id": stmt.excluded.organization_id,
+            "title": stmt.excluded.title,
+            "body": stmt.excluded.body,
+            "archived": stmt.excluded.archived,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _chunks(items: list, size: int = _BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:
+    # Within after_flush the new/dirty/deleted collections still describe
+    # what this flush just wrote.
+    upserts: dict[tuple[str, uuid.UUID], dict[str, Any]] = {}
+    removed: set[tuple[str, uuid.UUID]] = set()
+    removed_orgs: list[uuid.UUID] = []
+
+    for obj in session.deleted:
+        spec = _SPECS.get(type(obj))
+        if spec is None:
+            continue
+        removed.add((spec.entity_type, obj.id))
+        if isinstance(obj, Organization):
+            # Children go away through ON DELETE CASCADE, which the ORM never sees.
+            removed_orgs.append(obj.id)
+
+    new = session.new
+    changed = [
+        obj for obj in chain(new, session.dirty)
+        if type(obj) in _SPECS and obj not in session.deleted
+        and (obj in new or session.is_modified(obj, include_collections=False))
+    ]
+    if not (changed or removed):
+        return
+
+    # Children of a deleted organization may be of any type.
+    _mark_changed(
+        session.info,
+        ENTITY_TYPES if removed_orgs else {_SPECS[type(o)].entity_type for o in changed} | {t for t, _ in removed},
+    )
+    conn = session.connection()
+    type_ids = _asset_type_ids([o for o in changed if o in new], from_state=True)
+    type_ids |= _asset_type_ids([o for o in changed if o not in new], from_state=False)
+    ctx = _context_from_rows(conn.execute(_hidden_fields_query(type_ids)).all()) if type_ids else _Context()
+    for obj in changed:
+        spec = _SPECS[type(obj)]
+        upserts[(spec.entity_type, obj.id)] = _entry(obj, spec, ctx, from_state=obj in new)
+
+    for rows in _chunks(list(upserts.values())):
+        conn.execute(_upsert(rows))
+    for keys in _chunks(list(removed)):
+        conn.execute(
+            delete(SearchIndexEntry).where(
+                tuple_(SearchIndexEntry.entity_type, SearchIndexEntry.entity_id).in_(keys)
+            )
+        )
+    if removed_orgs:
+        conn.execute(delete(SearchIndexEntry).where(SearchIndexEntry.organization_id.in_(removed_orgs)))
+
+
+def _after_commit(session: Session) -> None:
+    for entity_type in session.info.pop(_CHANGED_KEY, ()):
+        suggest_cache[entity_type].clear()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def install() -> None:
+    """Register the session hooks. Idempotent."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
+
+
+async def reindex(db: AsyncSession, model: type, ids: list[uuid.UUID]) -> None:
+    """Refresh the index rows for `ids` after a bulk statement changed them."""
+    spec = _SPECS[model]
+    if not ids:
+        return
+    for chunk in _chunks(list(ids)):
+        objs = (await db.execute(select(model).options(lazyload("*")).where(model.id.in_(chunk)))).scalars().all()
+        ctx = await _load_context(db, objs)
+        rows = [_entry(obj, spec, ctx, from_state=False) for obj in objs]
+        if rows:
+            await db.execute(_upsert(rows))
+    _mark_changed(db.sync_session.info, {spec.entity_type})
+
+
+async def rebuild(db: AsyncSession) -> dict[str, int]:
+    """Re-derive every index row from the source tables. Safe to run while
+    the app is serving: rows are upserted, then orphans are removed."""
+    counts: dict[str, int] = {}
+    for model, spec in _SPECS.items():
+        n = 0
+        last_id: uuid.UUID | None = None
+        while True:
+            q = select(model).options(lazyload("*")).order_by(model.id).limit(_BATCH)
+            if last_id is not None:
+                q = q.where(model.id > last_id)
+            batch = (await db.execute(q)).scalars().all()
+            if not batch:
+                break
+            ctx = await _load_context(db, batch)
+            await db.execute(_upsert([_entry(obj, spec, ctx, from_state=False) for obj in batch]))
+            n += len(batch)
+            last_id = batch[-1].id
+            db.expunge_all()
+        await db.execute(
+            delete(SearchIndexEntry)
+            .where(SearchIndexEntry.entity_type == spec.entity_type)
+            .where(~exists().where(model.id == SearchIndexEntry.entity_id))
+        )
+        counts[spec.entity_type] = n
+    _mark_changed(db.sync_session.info, ENTITY_TYPES)
+    await db.commit()
+    logger.info("Search index rebuilt: %s", counts)
+    return counts
+
+
+async def rebuild_if_empty(db: AsyncSession) -> None:
+    """First-boot backfill after migration 011 created an empty table."""
+    populated = (await db.execute(select(exists().select_from(SearchIndexEntry)))).scalar()
+    if populated:
+        return
+    logger.info("search_index is empty — backfilling from source tables...")
+    await rebuild(db)
@@ -0,0 +1,59 @@
+"""Password share links.
+
+A link's token is 32 random bytes handed out once; only its SHA-256 is
+stored, so lookups are a unique-index probe and the table alone cannot be
+used to open links. Consuming a link is a single conditional
+``UPDATE ... RETURNING`` that bumps `view_count` only while the link is
+active, unexpired and under `max_views`, so concurrent viewers can never
+exceed the limit. `sweep()` deletes dead links in bulk.
+"""
+
+import hashlib
+import secrets
+
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.password_share import PasswordShareLink
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_token() -> tuple[str, str]:
+    """(token for the URL, hash to store)"""
+    token = secrets.token_urlsafe(32)
+    return token, hash_token(token)
+
+
+async def consume(db: AsyncSession, token: str) -> PasswordShareLink | None:
+    """Count one view of the link and return it, or None if the token is
+    unknown, revoked, expired or out of views."""
+    result = await db.execute(
+        update(PasswordShareLink)
+        .where(
+            PasswordShareLink.token_hash == hash_token(token),
+            PasswordShareLink.is_active.is_(True),
+            or_(PasswordShareLink.expires_at.is_(None), PasswordShareLink.expires_at > func.now()),
+            or_(PasswordShareLink.max_views.is_(None), PasswordShareLink.view_count < PasswordShareLink.max_views),
+        )
+        .values(view_count=PasswordShareLink.view_count + 1)
+        .returning(PasswordShareLink)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
+async def sweep(db: AsyncSession) -> int:
+    """Delete expired, revoked and used-up links; returns how many."""
+    result = await db.execute(
+        delete(PasswordShareLink)
+        .where(or_(
+            PasswordShareLink.expires_at <= func.now(),
+            PasswordShareLink.is_active.is_(False),
+            PasswordShareLink.view_count >= PasswordShareLink.max_views,
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
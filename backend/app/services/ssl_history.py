@@ -0,0 +1,99 @@
+"""Probe history of SSL certificates (`SSLProbeResult`).
+
+`record()` is called for every probe, single or swept, success or
+failure. A result identical to the certificate's latest one (same
+fingerprint, or same error) only moves that row's `last_seen_at` and
+bumps `seen_count`, so a stable fleet adds no rows. A new fingerprint is
+flagged `changed` when the certificate was successfully probed before,
+with `previous_id` pointing at that result, which is what the timeline
+and "changed in the last N days" endpoints read.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ssl_probe_result import SSLProbeResult
+
+# Certificates per lookup and rows per INSERT (22 bind parameters each)
+_BATCH = 1000
+_ERROR_CHARS = 1000
+_INFO_FIELDS = (
+    "fingerprint", "serial_number", "subject_cn", "issuer", "not_before", "not_after", "key_algorithm",
+    "key_size", "signature_algorithm", "tls_version", "cipher",
+)
+
+
+@dataclass(frozen=True)
+class Observation:
+    certificate_id: uuid.UUID
+    host: str
+    port: int
+    info: dict[str, Any] | None = None  # ssl_probe.probe_host() result
+    error: str | None = None
+    latency_ms: int | None = None
+
+
+_seen_again = (
+    update(SSLProbeResult.__table__)
+    .where(SSLProbeResult.__table__.c.id == bindparam("b_id"))
+    .values(
+        last_seen_at=bindparam("last_seen_at"),
+        latency_ms=bindparam("latency_ms"),
+        seen_count=SSLProbeResult.__table__.c.seen_count + 1,
+    )
+)
+
+
+async def _latest(db: AsyncSession, ids: list[uuid.UUID], *, successful: bool) -> dict[uuid.UUID, Any]:
+    query = (
+        select(SSLProbeResult.certificate_id, SSLProbeResult.id, SSLProbeResult.fingerprint, SSLProbeResult.error)
+        .distinct(SSLProbeResult.certificate_id)
+        .where(SSLProbeResult.certificate_id.in_(ids))
+        .order_by(SSLProbeResult.certificate_id, SSLProbeResult.probed_at.desc(), SSLProbeResult.id.desc())
+    )
+    if successful:
+        query = query.where(SSLProbeResult.fingerprint.is_not(None))
+    return {row.certificate_id: row for row in await db.execute(query)}
+
+
+async def record(db: AsyncSession, observations: list[Observation]) -> None:
+    for i in range(0, len(observations), _BATCH):
+        await _record(db, observations[i:i + _BATCH])
+
+
+async def _record(db: AsyncSession, observations: list[Observation]) -> None:
+    if not observations:
+        return
+    ids = list({o.certificate_id for o in observations})
+    latest = await _latest(db, ids, successful=False)
+    last_good = await _latest(db, ids, successful=True)
+    now = datetime.now(timezone.utc)
+
+    seen, new = [], []
+    for o in observations:
+        fingerprint = o.info["fingerprint"] if o.info else None
+        error = None if o.info else (o.error or "probe failed")[:_ERROR_CHARS]
+        prev = latest.get(o.certificate_id)
+        if prev is not None and prev.fingerprint == fingerprint and prev.error == error:
+            seen.append({"b_id": prev.id, "last_seen_at": now, "latency_ms": o.latency_ms})
+            continue
+        good = last_good.get(o.certificate_id)
+        changed = fingerprint is not None and good is not None and good.fingerprint != fingerprint
+        new.append({
+            "id": uuid.uuid4(), "certificate_id": o.certificate_id, "probed_at": now, "last_seen_at": now,
+            "seen_count": 1, "host": o.host, "port": o.port, "latency_ms": o.latency_ms, "error": error,
+            "changed": changed, "previous_id": good.id if changed else None,
+            **{name: (o.info or {}).get(name) for name in _INFO_FIELDS},
+        })
+
+    if seen:
+        await db.execute(_seen_again, seen)
+    if new:
+        await db.execute(insert(SSLProbeResult).values(new))
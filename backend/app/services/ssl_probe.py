@@ -2,9 +2,15 @@
 parses it with `cryptography`, and returns structured fields ready to be
 written onto an SSLCertificate row.
 
-Stays in stdlib + `cryptography` (already a dep). Probes run inside a
-thread because Python's socket.create_connection / ssl.wrap_socket are
-synchronous and we don't want to block the event loop.
+Stays in stdlib + `cryptography` (already a dep). Connections are native
+asyncio (`asyncio.open_connection` with a shared SSL context), so
+thousands of probes can be in flight without a thread each; see
+app.services.ssl_sweep for the bulk sweep. Name lookups are the
+exception: getaddrinfo blocks, so hosts are resolved on a small pool of
+their own (SSL_PROBE_RESOLVER_THREADS) and the probe connects to the
+address. A lookup that hangs past the probe's timeout keeps its thread
+until the resolver gives up, which holds back only other probes' lookups
+rather than the event loop's default executor.
 """
 
 from __future__ import annotations
@@ -12,12 +18,16 @@ from __future__ import annotations
 import asyncio
 import socket
 import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any
 
 from cryptography import x509
 from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519, ed448
-from cryptography.hazmat.primitives import hashes  # noqa: F401  (ensures hashes module loads)
+from cryptography.hazmat.primitives import hashes
+
+from app.config import settings
 
 
 def _name_attribute(name: x509.Name, oid: x509.ObjectIdentifier) -> str | None:
@@ -52,19 +62,40 @@ def _sans(cert: x509.Certificate) -> list[str]:
     return out
 
 
-def _probe_sync(host: str, port: int, timeout: float = 8.0) -> dict[str, Any]:
+def _context() -> ssl.SSLContext:
     ctx = ssl.create_default_context()
     # We want the cert even if it's expired or self-signed — the user is
     # using this to *learn* the truth, not to enforce trust.
     ctx.check_hostname = False
     ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+_CONTEXT = _context()
+_RESOLVER = ThreadPoolExecutor(settings.SSL_PROBE_RESOLVER_THREADS, thread_name_prefix="ssl-probe-dns")
+
+
+async def _resolve(host: str, port: int) -> list[str]:
+    """The host's addresses, in the order getaddrinfo prefers them."""
+    infos = await asyncio.get_running_loop().run_in_executor(
+        _RESOLVER, lambda: socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    )
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+async def _connect(host: str, port: int) -> asyncio.StreamWriter:
+    """Open a TLS connection to the first of the host's addresses that answers."""
+    error: OSError | None = None
+    for address in await _resolve(host, port):
+        try:
+            _, writer = await asyncio.open_connection(address, port, ssl=_CONTEXT, server_hostname=host)
+            return writer
+        except OSError as exc:
+            error = error or exc
+    raise error or OSError(f"{host} has no addresses")
 
-    with socket.create_connection((host, port), timeout=timeout) as sock:
-        with ctx.wrap_socket(sock, server_hostname=host) as tls:
-            der = tls.getpeercert(binary_form=True)
-            cipher = tls.cipher()
-            tls_version = tls.version()
 
+def _parse(host: str, port: int, der: bytes | None, tls_version: str | None, cipher: tuple | None) -> dict[str, Any]:
     if not der:
         raise RuntimeError("server returned no certificate")
 
@@ -83,6 +114,7 @@ def _probe_sync(host: str, port: int, timeout: float = 8.0) -> dict[str, Any]:
                   or _name_attribute(cert.issuer, x509.NameOID.ORGANIZATION_NAME),
         "issuer_org": _name_attribute(cert.issuer, x509.NameOID.ORGANIZATION_NAME),
         "serial_number": format(cert.serial_number, "x"),
+        "fingerprint": cert.fingerprint(hashes.SHA256()).hex(),
         "signature_algorithm": cert.signature_algorithm_oid._name,
         "key_algorithm": key_alg,
         "key_size": key_size,
@@ -99,8 +131,24 @@ def _probe_sync(host: str, port: int, timeout: float = 8.0) -> dict[str, Any]:
 
 
 async def probe_host(host: str, port: int = 443, timeout: float = 8.0) -> dict[str, Any]:
-    """Async wrapper — runs the blocking probe in a thread."""
-    return await asyncio.to_thread(_probe_sync, host, port, timeout)
+    """Connect, handshake and read the certificate, all within `timeout`."""
+    started = time.monotonic()
+    async with asyncio.timeout(timeout):
+        writer = await _connect(host, port)
+    try:
+        tls = writer.get_extra_info("ssl_object")
+        der = tls.getpeercert(binary_form=True)
+        cipher = tls.cipher()
+        tls_version = tls.version()
+    finally:
+        writer.close()
+        try:
+            async with asyncio.timeout(1):
+                await writer.wait_closed()
+        except (OSError, TimeoutError):
+            pass
+    latency_ms = int((time.monotonic() - started) * 1000)
+    return {**_parse(host, port, der, tls_version, cipher), "latency_ms": latency_ms}
 
 
 def derive_host_from_common_name(common_name: str) -> str:
@@ -109,3 +157,27 @@ def derive_host_from_common_name(common_name: str) -> str:
     if cn.startswith("*."):
         return cn[2:]
     return cn
+
+
+def probe_fields(info: dict[str, Any]) -> dict[str, Any]:
+    """The SSLCertificate column values a probe result sets."""
+    return {
+        "host": info["host"],
+        "port": info["port"],
+        "subject_cn": info["subject_cn"],
+        "issuer": info["issuer"],
+        "serial_number": info["serial_number"],
+        "signature_algorithm": info["signature_algorithm"],
+        "key_algorithm": info["key_algorithm"],
+        "key_size": info["key_size"],
+        "sans": info["sans"] or None,
+        "issued_date": info["issued_date"],
+        "expiration_date": info["expiration_date"],
+        "last_probed_at": datetime.now(timezone.utc),
+    }
+
+
+def apply_probe(cert: Any, info: dict[str, Any]) -> None:
+    """Overwrite an SSLCertificate's stored fields with a probe result."""
+    for key, value in probe_fields(info).items():
+        setattr(cert, key, value)
@@ -0,0 +1,142 @@
+"""Bulk re-probe of SSL certificates.
+
+`sweep()` probes every unarchived certificate (or one organization's)
+concurrently: at most SSL_SWEEP_CONCURRENCY connections in flight
+overall and SSL_SWEEP_PER_HOST_CONCURRENCY per host, each probe bounded
+by SSL_PROBE_TIMEOUT_SECONDS. No transaction is open while probing: the
+targets are read and committed first, and the results are written in a
+fresh transaction that locks the certificates and drops those archived
+or deleted meanwhile. They go in with one bulk UPDATE (an executemany)
+plus a search index refresh for the updated rows, and every outcome,
+failures included, goes into the probe history (app.services.ssl_history).
+Being a bulk statement, the UPDATE is not audited and emits no webhook
+events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.ssl_certificate import SSLCertificate
+from app.services import search_index, ssl_history
+from app.services.ssl_history import Observation
+from app.services.ssl_probe import derive_host_from_common_name, probe_fields, probe_host
+
+logger = logging.getLogger(__name__)
+
+# Errors kept in the report
+_MAX_ERRORS = 100
+# Certificates per locking SELECT
+_LOCK_BATCH = 1000
+_COLUMNS = (
+    "host", "port", "subject_cn", "issuer", "serial_number", "signature_algorithm", "key_algorithm",
+    "key_size", "sans", "issued_date", "expiration_date", "last_probed_at",
+)
+
+_update = (
+    update(SSLCertificate.__table__)
+    .where(SSLCertificate.__table__.c.id == bindparam("b_id"))
+    .values({name: bindparam(name) for name in _COLUMNS})
+)
+
+
+@dataclass
+class SweepReport:
+    probed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    duration_ms: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class _Target:
+    id: uuid.UUID
+    host: str
+    port: int
+
+
+async def _probe_all(targets: list[_Target]) -> list[Observation]:
+    overall = asyncio.Semaphore(settings.SSL_SWEEP_CONCURRENCY)
+    per_host: dict[str, asyncio.Semaphore] = {}
+
+    async def probe(target: _Target) -> Observation:
+        host_limit = per_host.setdefault(target.host.lower(), asyncio.Semaphore(settings.SSL_SWEEP_PER_HOST_CONCURRENCY))
+        async with host_limit, overall:
+            started = time.monotonic()
+            try:
+                info = await probe_host(target.host, target.port, settings.SSL_PROBE_TIMEOUT_SECONDS)
+            except Exception as e:
+                return Observation(
+                    target.id, target.host, target.port, error=str(e) or type(e).__name__,
+                    latency_ms=int((time.monotonic() - started) * 1000),
+                )
+            return Observation(target.id, target.host, target.port, info=info, latency_ms=info["latency_ms"])
+
+    return await asyncio.gather(*(probe(t) for t in targets))
+
+
+async def sweep(db: AsyncSession, organization_id: uuid.UUID | None = None) -> SweepReport:
+    started = time.monotonic()
+    report = SweepReport()
+    query = select(SSLCertificate.id, SSLCertificate.host, SSLCertificate.port, SSLCertificate.common_name).where(
+        SSLCertificate.archived_at.is_(None)
+    )
+    if organization_id is not None:
+        query = query.where(SSLCertificate.organization_id == organization_id)
+
+    targets = []
+    for cert_id, host, port, common_name in await db.execute(query):
+        host = (host or derive_host_from_common_name(common_name) or "").strip()
+        if host:
+            targets.append(_Target(cert_id, host, port or 443))
+        else:
+            report.skipped += 1
+    # Do not hold a transaction (and its snapshot and connection) open
+    # for the length of the probes.
+    await db.commit()
+
+    observations = await _probe_all(targets)
+
+    # Lock what is still unarchived (in id order, so concurrent sweeps
+    # cannot deadlock) and drop the rest.
+    current: set[uuid.UUID] = set()
+    ids = sorted(t.id for t in targets)
+    for i in range(0, len(ids), _LOCK_BATCH):
+        result = await db.execute(
+            select(SSLCertificate.id)
+            .where(SSLCertificate.id.in_(ids[i:i + _LOCK_BATCH]), SSLCertificate.archived_at.is_(None))
+            .order_by(SSLCertificate.id)
+            .with_for_update()
+        )
+        current.update(result.scalars())
+    observations = [o for o in observations if o.certificate_id in current]
+    rows = []
+    for o in observations:
+        if o.info is None:
+            report.failed += 1
+            if len(report.errors) < _MAX_ERRORS:
+                report.errors.append(f"{o.host}:{o.port}: {o.error}")
+            continue
+        rows.append({"b_id": o.certificate_id, **probe_fields(o.info)})
+    report.probed = len(rows)
+
+    if rows:
+        await db.execute(_update, rows)
+        await search_index.reindex(db, SSLCertificate, [row["b_id"] for row in rows])
+    await ssl_history.record(db, observations)
+    await db.commit()
+    report.duration_ms = int((time.monotonic() - started) * 1000)
+    logger.info(
+        "SSL sweep: probed=%d failed=%d skipped=%d in %d ms",
+        report.probed, report.failed, report.skipped, report.duration_ms,
+    )
+    return report
@@ -0,0 +1,99 @@
+"""Flatten stored rich content into plain text for the search index.
+
+Documents store TipTap/ProseMirror JSON (``{"type": "doc", "content":
+[...]}``) and flexible assets store arbitrary JSON field values. Both are
+reduced to whitespace-separated text once, when the row is written, so
+queries never have to walk JSONB.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Any
+
+# Upper bound on extracted text per row. to_tsvector caps out at 1 MB and
+# nobody needs a 50-page runbook's tail to find it.
+MAX_TEXT_CHARS = 200_000
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+# Reserved for search-snippet highlighting (see api/v1/search.py).
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# ProseMirror node types whose text starts on a new line.
+_BLOCK_NODES = {
+    "paragraph", "heading", "blockquote", "codeBlock", "listItem", "taskItem",
+    "tableRow", "tableCell", "tableHeader", "horizontalRule", "hardBreak",
+}
+
+
+def _clean(text: str) -> str:
+    text = _CONTROL_RE.sub(" ", text)
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)[:MAX_TEXT_CHARS]
+
+
+def _walk_rich_text(node: Any, out: list[str]) -> None:
+    if isinstance(node, list):
+        for child in node:
+            _walk_rich_text(child, out)
+        return
+    if not isinstance(node, dict):
+        return
+    node_type = node.get("type")
+    if node_type in _BLOCK_NODES:
+        out.append("\n")
+    if node_type == "text" and isinstance(node.get("text"), str):
+        out.append(node["text"])
+    for mark in node.get("marks") or []:
+        # Keep link targets searchable ("the wiki link to sharepoint...").
+        href = (mark.get("attrs") or {}).get("href") if isinstance(mark, dict) else None
+        if href:
+            out.append(f" {href} ")
+    _walk_rich_text(node.get("content"), out)
+
+
+def rich_text_to_plain(content: Any) -> str:
+    """Plain text of a document body. Accepts the editor's JSON tree, or a
+    legacy HTML/plain string."""
+    if not content:
+        return ""
+    if isinstance(content, str):
+        return _clean(html.unescape(_TAG_RE.sub(" ", content)))
+    out: list[str] = []
+    _walk_rich_text(content, out)
+    return _clean("".join(out))
+
+
+def _is_rich_text(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("type") == "doc"
+
+
+def _flatten_value(value: Any, out: list[str]) -> None:
+    if value is None or isinstance(value, bool):
+        return
+    if _is_rich_text(value):
+        out.append(rich_text_to_plain(value))
+    elif isinstance(value, dict):
+        for v in value.values():
+            _flatten_value(v, out)
+    elif isinstance(value, list):
+        for v in value:
+            _flatten_value(v, out)
+    else:
+        out.append(str(value))
+
+
+def field_values_to_plain(field_values: dict | None, hidden_keys: set[str] | None = None) -> str:
+    """Plain text of a flexible asset's field values. `hidden_keys` are the
+    field ids/names whose values must never be indexed (password fields)."""
+    if not field_values:
+        return ""
+    hidden_keys = hidden_keys or set()
+    out: list[str] = []
+    for key, value in field_values.items():
+        if key in hidden_keys:
+            continue
+        _flatten_value(value, out)
+    return _clean("\n".join(out))
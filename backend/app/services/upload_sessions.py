@@ -0,0 +1,316 @@
+"""Resumable, chunked attachment uploads.
+
+A session is a directory under ``UPLOAD_DIR/.uploads/<id>/`` holding:
+
+- ``meta.json``: what the finished Attachment will be (written once);
+- ``data``: a sparse file of the declared size that chunks are written
+  into at their offset, so chunks can arrive in any order and in
+  parallel;
+- ``ranges/<start>-<end>``: an empty marker per chunk, created only after
+  the chunk's bytes are fsynced. Received ranges are the union of the
+  markers, which needs no locking across requests or workers.
+
+Finalizing creates a ``finalizing`` marker, after which chunks are
+refused, checks the ranges cover the whole file, hashes it and links it
+into the blob store; the session and its ``data`` are only removed once
+the attachment has committed, so a failed finalize can simply be retried. Everything lives
+on disk, so any worker can serve any chunk and sessions survive restarts;
+sessions untouched for ATTACHMENT_UPLOAD_SESSION_TTL_HOURS are removed by
+`expire()`.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from app.config import settings
+from app.services.attachment_storage import StoredFile
+
+_RANGE_RE = re.compile(r"^(\d+)-(\d+)$")
+
+
+class SessionNotFound(Exception):
+    pass
+
+
+class SessionBusy(Exception):
+    """Another request is finalizing this session."""
+
+
+class InvalidChunk(Exception):
+    pass
+
+
+@dataclass
+class SessionMeta:
+    id: str
+    file_name: str
+    content_type: str | None
+    size: int
+    attachable_type: str
+    attachable_id: str
+    sha256: str | None
+    user_id: str
+    created_at: str
+
+
+def _root() -> str:
+    return os.path.join(settings.UPLOAD_DIR, ".uploads")
+
+
+def _dir(session_id: uuid.UUID) -> str:
+    return os.path.join(_root(), str(session_id))
+
+
+def _expires_at(last_activity: float) -> datetime:
+    return datetime.fromtimestamp(last_activity, timezone.utc) + timedelta(
+        hours=settings.ATTACHMENT_UPLOAD_SESSION_TTL_HOURS
+    )
+
+
+def expires_from_now() -> datetime:
+    return _expires_at(time.time())
+
+
+def _last_activity(path: str) -> float:
+    # Every chunk touches the session directory via its marker file.
+    return max(os.path.getmtime(path), os.path.getmtime(os.path.join(path, "ranges")))
+
+
+def _create(meta: SessionMeta) -> None:
+    path = _dir(uuid.UUID(meta.id))
+    os.makedirs(os.path.join(path, "ranges"))
+    with open(os.path.join(path, "data"), "wb") as f:
+        f.truncate(meta.size)
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(asdict(meta), f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+def _load(session_id: uuid.UUID) -> tuple[SessionMeta, float]:
+    path = _dir(session_id)
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = SessionMeta(**json.load(f))
+        last = _last_activity(path)
+    except FileNotFoundError:
+        raise SessionNotFound(str(session_id))
+    if time.time() - last > settings.ATTACHMENT_UPLOAD_SESSION_TTL_HOURS * 3600:
+        shutil.rmtree(path, ignore_errors=True)
+        raise SessionNotFound(str(session_id))
+    return meta, last
+
+
+def _received(session_id: uuid.UUID) -> list[tuple[int, int]]:
+    """Merged [start, end) ranges written so far."""
+    spans = []
+    for name in os.listdir(os.path.join(_dir(session_id), "ranges")):
+        m = _RANGE_RE.match(name)
+        if m:
+            spans.append((int(m.group(1)), int(m.group(2))))
+    spans.sort()
+    merged: list[tuple[int, int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+async def create(
+    *, file_name: str, content_type: str | None, size: int, attachable_type: str,
+    attachable_id: uuid.UUID, sha256: str | None, user_id: uuid.UUID,
+) -> SessionMeta:
+    meta = SessionMeta(
+        id=str(uuid.uuid4()), file_name=file_name, content_type=content_type, size=size,
+        attachable_type=attachable_type, attachable_id=str(attachable_id),
+        sha256=sha256.lower() if sha256 else None, user_id=str(user_id),
+        created_at=datetime.now(timezone.utc).isoformat(),
+    )
+    await asyncio.to_thread(_create, meta)
+    return meta
+
+
+async def status(session_id: uuid.UUID) -> tuple[SessionMeta, list[tuple[int, int]], datetime]:
+    def read():
+        meta, last = _load(session_id)
+        return meta, _received(session_id), _expires_at(last)
+    return await asyncio.to_thread(read)
+
+
+def _finalizing(session_id: uuid.UUID) -> str:
+    return os.path.join(_dir(session_id), "finalizing")
+
+
+def _open_data(session_id: uuid.UUID) -> int:
+    """Open the data file for writing, holding a shared lock on it until
+    closed. `_claim()` takes the lock exclusively, so no chunk is being
+    written once a session is finalizing."""
+    fd = os.open(os.path.join(_dir(session_id), "data"), os.O_WRONLY)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    if os.path.exists(_finalizing(session_id)):
+        os.close(fd)
+        raise SessionBusy(str(session_id))
+    return fd
+
+
+def _write_at(fd: int, buf: bytes, offset: int) -> None:
+    view = memoryview(buf)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        view, offset = view[n:], offset + n
+
+
+def _finish_chunk(fd: int, session_id: uuid.UUID, start: int, end: int) -> None:
+    os.fsync(fd)
+    os.close(fd)
+    marker = os.path.join(_dir(session_id), "ranges", f"{start}-{end}")
+    open(marker, "w").close()
+
+
+async def write_chunk(session_id: uuid.UUID, offset: int, body: AsyncIterator[bytes]) -> int:
+    """Write a request body into the session at `offset`; returns its length."""
+    meta, _last = await asyncio.to_thread(_load, session_id)
+    if offset < 0 or offset >= meta.size:
+        raise InvalidChunk("offset outside the file")
+    fd = await asyncio.to_thread(_open_data, session_id)
+    position = offset
+    buffer = bytearray()
+    try:
+        async for piece in body:
+            if position + len(buffer) + len(piece) > meta.size:
+                raise InvalidChunk("chunk runs past the declared size")
+            if position + len(buffer) + len(piece) - offset > settings.ATTACHMENT_UPLOAD_MAX_CHUNK_BYTES:
+                raise InvalidChunk("chunk too large")
+            buffer += piece
+            if len(buffer) >= settings.ATTACHMENT_CHUNK_BYTES:
+                await asyncio.to_thread(_write_at, fd, bytes(buffer), position)
+                position += len(buffer)
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(_write_at, fd, bytes(buffer), position)
+            position += len(buffer)
+    except BaseException:
+        await asyncio.to_thread(os.close, fd)
+        raise
+    if position == offset:
+        await asyncio.to_thread(os.close, fd)
+        raise InvalidChunk("empty chunk")
+    await asyncio.to_thread(_finish_chunk, fd, session_id, offset, position)
+    return position - offset
+
+
+def _hash_data(session_id: uuid.UUID, size: int) -> StoredFile:
+    path = os.path.join(_dir(session_id), "data")
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.ATTACHMENT_CHUNK_BYTES):
+            digest.update(chunk)
+    return StoredFile(path, size, digest.hexdigest())
+
+
+def _claim(session_id: uuid.UUID) -> None:
+    try:
+        fd = os.open(_finalizing(session_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise SessionBusy(str(session_id))
+    os.close(fd)
+    # Chunks opened from now on see the marker; wait for none in flight.
+    fd = os.open(os.path.join(_dir(session_id), "data"), os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        _unclaim(session_id)
+        raise SessionBusy(str(session_id))
+    finally:
+        os.close(fd)
+
+
+def _unclaim(session_id: uuid.UUID) -> None:
+    try:
+        os.remove(_finalizing(session_id))
+    except FileNotFoundError:
+        pass
+
+
+def _unshare_data(session_id: uuid.UUID) -> None:
+    # If a failed finalize left `data` hard-linked into the blob store,
+    # give the session its own copy before chunks may be written again.
+    path = os.path.join(_dir(session_id), "data")
+    try:
+        if os.stat(path).st_nlink == 1:
+            return
+    except FileNotFoundError:
+        return
+    tmp = path + ".tmp"
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, path)
+
+
+async def begin_finalize(session_id: uuid.UUID) -> tuple[SessionMeta, StoredFile]:
+    """Check the upload is complete and hash it. The returned file is the
+    session's data file, for attachment_storage.store(keep_source=True);
+    call `cleanup()` after the attachment is committed or
+    `abort_finalize()`. Raises SessionBusy if the session is already
+    finalizing or a chunk is still being written."""
+    meta, _last = await asyncio.to_thread(_load, session_id)
+    await asyncio.to_thread(_claim, session_id)
+    try:
+        received = await asyncio.to_thread(_received, session_id)
+        if received != [(0, meta.size)]:
+            missing = meta.size - sum(end - start for start, end in received)
+            raise InvalidChunk(f"upload incomplete: {missing} bytes missing")
+        stored = await asyncio.to_thread(_hash_data, session_id, meta.size)
+        if meta.sha256 and stored.sha256 != meta.sha256:
+            raise InvalidChunk("content does not match the declared sha256")
+    except BaseException:
+        await asyncio.to_thread(_unclaim, session_id)
+        raise
+    return meta, stored
+
+
+async def abort_finalize(session_id: uuid.UUID) -> None:
+    def abort():
+        _unshare_data(session_id)
+        _unclaim(session_id)
+    await asyncio.to_thread(abort)
+
+
+async def cleanup(session_id: uuid.UUID) -> None:
+    await asyncio.to_thread(shutil.rmtree, _dir(session_id), True)
+
+
+def _expire() -> int:
+    root = _root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - settings.ATTACHMENT_UPLOAD_SESSION_TTL_HOURS * 3600
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if _last_activity(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            # Half-created or already removed
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+    return removed
+
+
+async def expire() -> int:
+    """Remove abandoned sessions; returns how many."""
+    return await asyncio.to_thread(_expire)
@@ -0,0 +1,139 @@
+"""Per-process cache of authenticated users for `get_current_user`.
+
+Entries are detached snapshots of the `users` row. A hit is merged into
+the request's session with ``load=False``, which attaches a fresh copy
+without any SQL, so handlers can still modify ``current_user`` (MFA
+setup, ...) and have it flushed normally while the cached snapshot stays
+clean.
+
+A session-level ``after_flush`` hook records the users a flush wrote or
+deleted; once the transaction commits they are dropped from the cache.
+The same hook issues ``pg_notify(USER_CACHE_CHANNEL, id)`` in that
+transaction, which Postgres delivers only on commit, and `listen()` drops
+the ids announced by other workers. Without the listener, a change made
+on another worker is picked up when the entry expires after
+USER_CACHE_TTL_SECONDS. Bulk ``UPDATE`` statements bypass the hook;
+code issuing them calls `invalidate()` instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any
+
+import asyncpg
+from sqlalchemy import String, bindparam, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_CHANNEL = "docuvault_user_changed"
+
+# user id -> detached User snapshot
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+_CHANGED_KEY = "user_cache_changed"
+
+_RECONNECT_SECONDS = 5
+
+
+def snapshot(user: User) -> User:
+    """A detached copy of `user`'s column values, safe to share across sessions."""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get(user_id: uuid.UUID) -> User | None:
+    return user_cache.get(user_id)
+
+
+def put(user: User) -> None:
+    user_cache.set(user.id, snapshot(user))
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:
+    changed = {
+        obj.id for obj in session.dirty
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False)
+    }
+    changed |= {obj.id for obj in session.deleted if isinstance(obj, User)}
+    if not changed:
+        return
+    session.info.setdefault(_CHANGED_KEY, set()).update(changed)
+    if settings.USER_CACHE_NOTIFY:
+        conn = session.connection()
+        for user_id in changed:
+            conn.execute(select(func.pg_notify(USER_CACHE_CHANNEL, str(user_id))))
+
+
+async def invalidate(db: AsyncSession, user_ids: list[uuid.UUID]) -> None:
+    """Drop `user_ids` from every worker's cache once `db` commits."""
+    if not user_ids:
+        return
+    db.sync_session.info.setdefault(_CHANGED_KEY, set()).update(user_ids)
+    if settings.USER_CACHE_NOTIFY:
+        ids = bindparam("ids", [str(user_id) for user_id in user_ids], type_=ARRAY(String))
+        await db.execute(select(func.pg_notify(USER_CACHE_CHANNEL, func.unnest(ids))))
+
+
+def _after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        user_cache.pop(user_id)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def install() -> None:
+    """Register the session hooks. Idempotent."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
+
+
+def _on_notify(connection: Any, pid: int, channel: str, payload: str) -> None:
+    try:
+        user_cache.pop(uuid.UUID(payload))
+    except ValueError:
+        logger.warning("Ignoring malformed %s payload %r", channel, payload)
+
+
+async def listen() -> None:
+    """LISTEN for changes committed by other workers until cancelled,
+    reconnecting if the connection drops."""
+    dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("User cache listener cannot connect (%s); retrying", e)
+            await asyncio.sleep(_RECONNECT_SECONDS)
+            continue
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        try:
+            await conn.add_listener(USER_CACHE_CHANNEL, _on_notify)
+            # Notifications sent while we were not listening are gone.
+            user_cache.clear()
+            await lost.wait()
+            logger.warning("User cache listener connection lost; reconnecting")
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("User cache listener failed (%s); reconnecting", e)
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+        user_cache.clear()
+        await asyncio.sleep(_RECONNECT_SECONDS)
@@ -0,0 +1,545 @@
+"""Delivers webhook events from the outbox.
+
+A background task on every worker repeats two steps:
+
+1. fan-out: claims a batch of ``webhook_outbox`` rows (``FOR UPDATE SKIP
+   LOCKED``, so workers never take the same rows), creates one
+   `WebhookDelivery` per subscribed active webhook and deletes the rows;
+2. delivery: claims due pending deliveries by pushing their
+   `next_attempt_at` a lease into the future and counting the attempt,
+   commits, POSTs them concurrently through one pooled
+   ``httpx.AsyncClient`` (at most WEBHOOK_PER_HOST_CONCURRENCY requests
+   per host), then records the outcomes with one bulk UPDATE.
+
+New deliveries wait WEBHOOK_COALESCE_SECONDS before their first attempt.
+Until then, further events about the same entity for the same webhook are
+merged into them (field changes keep the first old and the last new
+value; create + update stays a create), so a sync touching a row many
+times sends one event. A webhook with `batch_events` receives its due
+deliveries as one POST of up to WEBHOOK_BATCH_MAX_EVENTS payloads,
+``{"deliveries": [...]}``, each with its ``delivery_id``.
+
+A failed attempt is retried with exponential backoff and jitter until
+WEBHOOK_MAX_ATTEMPTS, after which the delivery is marked failed. Each
+request is cut off after WEBHOOK_TIMEOUT_SECONDS, and the lease covers a
+whole claimed batch queueing behind the per-host limit, so a live worker
+always records its outcomes first. If a worker dies mid-delivery its
+lease runs out and another worker retries; outcomes are recorded only if
+the delivery has not been claimed again meanwhile. Delivery is thus
+at-least-once; receivers should dedupe on the
+``X-DocuVault-Delivery`` header (the payloads' ``delivery_id`` in a
+batch).
+
+Each worker keeps a circuit breaker per URL: after
+WEBHOOK_BREAKER_THRESHOLD consecutive connection errors, timeouts, 429s or
+5xx responses it opens for WEBHOOK_BREAKER_COOLDOWN_SECONDS, during which
+the URL's deliveries are put back, due when it closes, without using up an
+attempt. Then a single probe request decides whether it closes again.
+`metrics()` reports queue depth, lag, breaker states and counters.
+
+With a secret, requests carry ``X-DocuVault-Signature: sha256=<hex>``, the
+HMAC-SHA256 of ``"<X-DocuVault-Timestamp>." + body`` keyed by the
+webhook's secret.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import async_session
+from app.models.webhook import Webhook
+from app.models.webhook_delivery import WebhookDelivery
+from app.models.webhook_event import WebhookOutboxEvent
+from app.services import webhook_events
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "DocuVault-Webhooks/1.0"
+_FANOUT_BATCH = 1000
+_INSERT_BATCH = 1000
+_ERROR_CHARS = 1000
+
+_task: asyncio.Task | None = None
+_host_limits: dict[str, asyncio.Semaphore] = {}
+_breakers: dict[str, _Breaker] = {}
+# Since process start: requests, succeeded, retried, failed, deferred
+# (put back by an open breaker), coalesced
+_counters: Counter[str] = Counter()
+_lag = {"count": 0, "total": 0.0, "max": 0.0}
+
+
+@dataclass(frozen=True)
+class _Claimed:
+    id: uuid.UUID
+    webhook_id: uuid.UUID
+    event: str
+    payload: dict
+    attempts: int  # including the one being made
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class _Target:
+    url: str
+    secret: str | None
+    is_active: bool
+    batch_events: bool
+
+
+class _Breaker:
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if not self.open_until:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.failures = 0
+            self.open_until = 0.0
+        else:
+            self.failures += 1
+            if self.probing or self.failures >= settings.WEBHOOK_BREAKER_THRESHOLD:
+                self.opened_at = time.monotonic()
+                self.open_until = self.opened_at + settings.WEBHOOK_BREAKER_COOLDOWN_SECONDS
+        self.probing = False
+
+    def reopens_in(self) -> float:
+        return max(self.open_until - time.monotonic(), 0.0)
+
+
+def _breaker(url: str) -> _Breaker:
+    breaker = _breakers.get(url)
+    if breaker is None:
+        breaker = _breakers[url] = _Breaker()
+    return breaker
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    mac = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256)
+    return f"sha256={mac.hexdigest()}"
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before the attempt after `attempts` failed ones."""
+    seconds = min(settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def _merge(first_event: str, first: dict, later_event: str, later: dict) -> tuple[str, dict]:
+    """One event with the effect of `first` followed by `later`."""
+    coalesced = first.get("coalesced", 0) + later.get("coalesced", 0) + 1
+    if later_event.endswith(".deleted"):
+        return later_event, {**later, "coalesced": coalesced}
+    changes = dict(first.get("changes") or {})
+    for key, change in (later.get("changes") or {}).items():
+        changes[key] = {**changes[key], "new": change.get("new")} if key in changes else change
+    event = first_event if first_event.endswith(".created") else later_event
+    return event, {**later, "event": event, "changes": changes or None, "coalesced": coalesced}
+
+
+def _coalesce_key(payload: dict) -> str | None:
+    if settings.WEBHOOK_COALESCE_SECONDS <= 0 or not payload.get("entity_id"):
+        return None
+    return f"{payload['entity_type']}:{payload['entity_id']}"
+
+
+async def fan_out(db: AsyncSession) -> int:
+    """Turn one batch of outbox rows into deliveries; returns rows taken."""
+    rows = (
+        await db.execute(
+            select(WebhookOutboxEvent.id, WebhookOutboxEvent.event, WebhookOutboxEvent.payload)
+            .order_by(WebhookOutboxEvent.id)
+            .limit(_FANOUT_BATCH)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    if not rows:
+        return 0
+    hooks = (await db.execute(select(Webhook.id, Webhook.events).where(Webhook.is_active.is_(True)))).all()
+
+    # (webhook_id, coalesce_key or a unique placeholder) -> [event, payload]
+    fresh: dict[tuple, list] = {}
+    for row in rows:
+        key = _coalesce_key(row.payload)
+        for hook_id, events in hooks:
+            if not webhook_events.matches(events, row.event):
+                continue
+            slot = (hook_id, key if key is not None else object())
+            if slot in fresh:
+                fresh[slot] = list(_merge(*fresh[slot], row.event, row.payload))
+                _counters["coalesced"] += 1
+            else:
+                fresh[slot] = [row.event, row.payload]
+
+    # Merge into deliveries that have not been attempted yet. The row locks
+    # keep _claim (SKIP LOCKED) off them until this commits.
+    keyed = {slot for slot in fresh if isinstance(slot[1], str)}
+    merged = []
+    if keyed:
+        existing = (
+            await db.execute(
+                select(WebhookDelivery.id, WebhookDelivery.webhook_id, WebhookDelivery.coalesce_key,
+                       WebhookDelivery.event, WebhookDelivery.payload)
+                .where(
+                    WebhookDelivery.status == "pending",
+                    WebhookDelivery.attempts == 0,
+                    WebhookDelivery.webhook_id.in_({hook_id for hook_id, _ in keyed}),
+                    WebhookDelivery.coalesce_key.in_({key for _, key in keyed}),
+                )
+                .with_for_update()
+            )
+        ).all()
+        for delivery_id, hook_id, key, event, payload in existing:
+            slot = (hook_id, key)
+            if slot not in fresh:
+                continue
+            event, payload = _merge(event, payload, *fresh.pop(slot))
+            merged.append({
+                "b_id": delivery_id, "event": event, "payload": payload, "coalesced": payload["coalesced"],
+            })
+        if merged:
+            await db.execute(_merge_into, merged)
+            _counters["coalesced"] += len(merged)
+
+    due = datetime.now(timezone.utc) + timedelta(seconds=max(settings.WEBHOOK_COALESCE_SECONDS, 0))
+    deliveries = [
+        {
+            "id": uuid.uuid4(), "webhook_id": hook_id, "event": event, "payload": payload,
+            "coalesce_key": key if isinstance(key, str) else None, "coalesced": payload.get("coalesced", 0),
+            "status": "pending", "attempts": 0, "next_attempt_at": due,
+        }
+        for (hook_id, key), (event, payload) in fresh.items()
+    ]
+    for i in range(0, len(deliveries), _INSERT_BATCH):
+        await db.execute(insert(WebhookDelivery).values(deliveries[i:i + _INSERT_BATCH]))
+    await db.execute(delete(WebhookOutboxEvent).where(WebhookOutboxEvent.id.in_([r.id for r in rows])))
+    await db.commit()
+    return len(rows)
+
+
+def _lease() -> timedelta:
+    # Worst case: every claimed delivery is a request to the same host,
+    # WEBHOOK_PER_HOST_CONCURRENCY at a time, each taking the full timeout;
+    # plus one more timeout of slack for claiming and recording.
+    rounds = -(-settings.WEBHOOK_BATCH // settings.WEBHOOK_PER_HOST_CONCURRENCY)
+    return timedelta(seconds=(rounds + 1) * settings.WEBHOOK_TIMEOUT_SECONDS)
+
+
+async def _claim(db: AsyncSession) -> tuple[list[_Claimed], dict[uuid.UUID, _Target]]:
+    lease = _lease()
+    due = (
+        select(WebhookDelivery.id)
+        .where(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= func.now())
+        .order_by(WebhookDelivery.next_attempt_at)
+        .limit(settings.WEBHOOK_BATCH)
+        .with_for_update(skip_locked=True)
+    )
+    rows = (
+        await db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.id.in_(due.scalar_subquery()))
+            .values(next_attempt_at=func.now() + lease, attempts=WebhookDelivery.attempts + 1)
+            .returning(
+                WebhookDelivery.id, WebhookDelivery.webhook_id, WebhookDelivery.event,
+                WebhookDelivery.payload, WebhookDelivery.attempts, WebhookDelivery.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    claimed = [_Claimed(*row) for row in rows]
+    targets: dict[uuid.UUID, _Target] = {}
+    if claimed:
+        result = await db.execute(
+            select(Webhook.id, Webhook.url, Webhook.secret, Webhook.is_active, Webhook.batch_events)
+            .where(Webhook.id.in_({c.webhook_id for c in claimed}))
+        )
+        targets = {hook_id: _Target(*rest) for hook_id, *rest in result}
+    await db.commit()
+    return claimed, targets
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(settings.WEBHOOK_PER_HOST_CONCURRENCY)
+    return limit
+
+
+async def _head(response: httpx.Response) -> str:
+    """The start of the body, for the error message; the rest is never
+    read, so a receiver cannot make us buffer a huge reply."""
+    head = b""
+    async for chunk in response.aiter_bytes():
+        head += chunk
+        if len(head) >= _ERROR_CHARS:
+            break
+    return head[:_ERROR_CHARS].decode(response.encoding or "utf-8", errors="replace")
+
+
+def _outcome(delivery: _Claimed, **fields: Any) -> dict[str, Any]:
+    return {
+        "b_id": delivery.id, "b_claimed": delivery.attempts, "attempts": delivery.attempts, "last_status_code": None, "last_error": None,
+        "duration_ms": None, "delivered_at": None, "next_attempt_at": None, **fields,
+    }
+
+
+def _deferred(deliveries: list[_Claimed], breaker: _Breaker) -> list[dict[str, Any]]:
+    """Put deliveries back, due when `breaker` lets requests through again,
+    without counting the attempt."""
+    due = datetime.now(timezone.utc) + timedelta(seconds=breaker.reopens_in())
+    _counters["deferred"] += len(deliveries)
+    return [
+        _outcome(d, status="pending", attempts=d.attempts - 1, next_attempt_at=due, last_error="circuit open")
+        for d in deliveries
+    ]
+
+
+async def _send(client: httpx.AsyncClient, deliveries: list[_Claimed], target: _Target | None) -> list[dict[str, Any]]:
+    """One request carrying `deliveries` (several only for batching
+    webhooks); returns their outcomes."""
+    if target is None or not target.is_active:
+        return [
+            _outcome(d, status="failed", attempts=d.attempts - 1, last_error="webhook disabled") for d in deliveries
+        ]
+    breaker = _breaker(target.url)
+    if breaker.state == "open":
+        return _deferred(deliveries, breaker)
+
+    first = deliveries[0]
+    if target.batch_events:
+        payload: dict = {"deliveries": [{**d.payload, "delivery_id": str(d.id)} for d in deliveries]}
+        event = "batch"
+    else:
+        payload, event = first.payload, first.event
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+        "X-DocuVault-Event": event,
+        "X-DocuVault-Delivery": str(first.id),
+        "X-DocuVault-Timestamp": timestamp,
+    }
+    if target.secret:
+        headers["X-DocuVault-Signature"] = sign(target.secret, timestamp, body)
+
+    status_code = error = None
+    async with _host_limit(target.url):
+        # Decided only now: requests queued here may have seen the breaker
+        # open meanwhile, and a half-open one lets exactly one through.
+        if not breaker.allow():
+            return _deferred(deliveries, breaker)
+        started = time.monotonic()
+        try:
+            # httpx's timeout is per phase; this bounds the whole request.
+            async with asyncio.timeout(settings.WEBHOOK_TIMEOUT_SECONDS):
+                async with client.stream("POST", target.url, content=body, headers=headers) as response:
+                    status_code = response.status_code
+                    ok = response.is_success
+                    if not ok:
+                        error = f"HTTP {status_code}: {await _head(response)}"
+        except httpx.HTTPError as e:
+            ok = False
+            error = f"{type(e).__name__}: {e}"[:_ERROR_CHARS]
+        except TimeoutError:
+            ok = False
+            error = f"Timed out after {settings.WEBHOOK_TIMEOUT_SECONDS:g} s"
+    duration_ms = int((time.monotonic() - started) * 1000)
+    _counters["requests"] += 1
+    # A 4xx other than 429 means the endpoint is up and said no.
+    breaker.record(ok or (status_code is not None and status_code < 500 and status_code != 429))
+
+    now = datetime.now(timezone.utc)
+    results = []
+    for d in deliveries:
+        fields = {"last_status_code": status_code, "last_error": error, "duration_ms": duration_ms}
+        if ok:
+            _counters["succeeded"] += 1
+            lag = (now - d.created_at).total_seconds()
+            _lag["count"] += 1
+            _lag["total"] += lag
+            _lag["max"] = max(_lag["max"], lag)
+            results.append(_outcome(d, status="succeeded", delivered_at=now, **fields))
+        elif d.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            _counters["failed"] += 1
+            results.append(_outcome(d, status="failed", **fields))
+        else:
+            _counters["retried"] += 1
+            results.append(_outcome(d, status="pending", next_attempt_at=now + backoff(d.attempts), **fields))
+    return results
+
+
+def _requests(claimed: list[_Claimed], targets: dict[uuid.UUID, _Target]) -> list[tuple[list[_Claimed], _Target | None]]:
+    by_webhook: dict[uuid.UUID, list[_Claimed]] = {}
+    for d in claimed:
+        by_webhook.setdefault(d.webhook_id, []).append(d)
+    out = []
+    for webhook_id, deliveries in by_webhook.items():
+        target = targets.get(webhook_id)
+        size = settings.WEBHOOK_BATCH_MAX_EVENTS if target is not None and target.batch_events else 1
+        out.extend((deliveries[i:i + size], target) for i in range(0, len(deliveries), size))
+    return out
+
+
+_merge_into = (
+    update(WebhookDelivery.__table__)
+    .where(WebhookDelivery.__table__.c.id == bindparam("b_id"))
+    .values(event=bindparam("event"), payload=bindparam("payload"), coalesced=bindparam("coalesced"))
+)
+
+# Skipped if the lease ran out and another worker claimed the delivery again.
+_record = (
+    update(WebhookDelivery.__table__)
+    .where(
+        WebhookDelivery.__table__.c.id == bindparam("b_id"),
+        WebhookDelivery.__table__.c.attempts == bindparam("b_claimed"),
+    )
+    .values(
+        status=bindparam("status"), attempts=bindparam("attempts"), next_attempt_at=bindparam("next_attempt_at"),
+        last_status_code=bindparam("last_status_code"), last_error=bindparam("last_error"),
+        duration_ms=bindparam("duration_ms"), delivered_at=bindparam("delivered_at"),
+    )
+)
+
+
+async def deliver_due(client: httpx.AsyncClient) -> int:
+    """Attempt one batch of due deliveries; returns how many."""
+    async with async_session() as db:
+        claimed, targets = await _claim(db)
+    if not claimed:
+        return 0
+    sent = await asyncio.gather(*(_send(client, batch, target) for batch, target in _requests(claimed, targets)))
+    async with async_session() as db:
+        await db.execute(_record, [outcome for outcomes in sent for outcome in outcomes])
+        await db.commit()
+    return len(claimed)
+
+
+async def purge(db: AsyncSession) -> int:
+    """Delete finished deliveries older than WEBHOOK_DELIVERY_RETENTION_DAYS."""
+    result = await db.execute(
+        delete(WebhookDelivery)
+        .where(
+            WebhookDelivery.status != "pending",
+            WebhookDelivery.created_at < func.now() - timedelta(days=settings.WEBHOOK_DELIVERY_RETENTION_DAYS),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def metrics(db: AsyncSession) -> dict[str, Any]:
+    """Queue depth and lag from the database; breakers, counters and
+    delivery lag of this worker since it started."""
+    now = datetime.now(timezone.utc)
+    outbox, oldest_event = (
+        await db.execute(select(func.count(), func.min(WebhookOutboxEvent.created_at)))
+    ).one()
+    pending, due, oldest_due = (
+        await db.execute(
+            select(
+                func.count(),
+                func.count().filter(WebhookDelivery.next_attempt_at <= now),
+                func.min(WebhookDelivery.next_attempt_at),
+            ).where(WebhookDelivery.status == "pending")
+        )
+    ).one()
+    return {
+        "outbox_depth": outbox,
+        "oldest_outbox_event_seconds": (now - oldest_event).total_seconds() if oldest_event else None,
+        "pending_deliveries": pending,
+        "due_deliveries": due,
+        "dispatch_lag_seconds": max((now - oldest_due).total_seconds(), 0.0) if due else 0.0,
+        "delivery_lag_avg_seconds": _lag["total"] / _lag["count"] if _lag["count"] else None,
+        "delivery_lag_max_seconds": _lag["max"] if _lag["count"] else None,
+        "counters": dict(_counters),
+        "breakers": [
+            {"url": url, "state": b.state, "failures": b.failures, "reopens_in_seconds": b.reopens_in()}
+            for url, b in sorted(_breakers.items())
+            if b.state != "closed" or b.failures
+        ],
+    }
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        ),
+        follow_redirects=False,
+    )
+
+
+async def _run() -> None:
+    async with _client() as client:
+        while True:
+            busy = False
+            try:
+                async with async_session() as db:
+                    busy = await fan_out(db) >= _FANOUT_BATCH
+                busy = await deliver_due(client) >= settings.WEBHOOK_BATCH or busy
+            except Exception:
+                logger.exception("Webhook dispatch failed; retrying")
+            if busy:
+                continue
+            try:
+                await asyncio.wait_for(webhook_events.pending.wait(), settings.WEBHOOK_POLL_SECONDS)
+            except TimeoutError:
+                pass
+            webhook_events.pending.clear()
+
+
+def start() -> None:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    """Stop dispatching. Claimed but unsent deliveries are retried once
+    their lease expires."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
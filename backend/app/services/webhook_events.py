@@ -0,0 +1,127 @@
+"""Transactional outbox for webhook events.
+
+A session-level ``after_flush`` hook turns the audited changes of the
+flush (see `app.services.audit.collect`) into ``<entity_type>.<action>``
+events such as ``password.updated`` and writes the ones some active
+webhook subscribes to into ``webhook_outbox``, with one multi-row INSERT
+on the flush's connection. The events therefore exist if and only if the
+change commits; app.services.webhook_dispatcher delivers them.
+
+Active subscriptions are cached per process for
+WEBHOOK_SUBSCRIPTION_CACHE_SECONDS (and dropped when this process commits
+a webhook change), so without webhooks the write path costs nothing.
+
+A webhook's `events` is a list of event names, ``<entity_type>.*`` or
+``*``; an empty list subscribes to everything.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.webhook import Webhook
+from app.models.webhook_event import WebhookOutboxEvent
+from app.services import audit
+
+_ACTIONS = {"create": "created", "update": "updated", "delete": "deleted"}
+_ENQUEUED_KEY = "webhook_events_enqueued"
+_WEBHOOKS_CHANGED_KEY = "webhook_events_webhooks_changed"
+_BATCH = 1000
+
+# "active" -> list of the active webhooks' `events`
+_subscriptions = TTLCache(1, settings.WEBHOOK_SUBSCRIPTION_CACHE_SECONDS)
+
+# Set when this process commits new outbox rows; the dispatcher waits on it.
+pending = asyncio.Event()
+
+
+def event_name(entity_type: str, action: str) -> str:
+    return f"{entity_type}.{_ACTIONS.get(action, action)}"
+
+
+def matches(patterns: list | None, name: str) -> bool:
+    if not patterns:
+        return True
+    for pattern in patterns:
+        if pattern == "*" or pattern == name:
+            return True
+        if isinstance(pattern, str) and pattern.endswith(".*") and name.startswith(pattern[:-1]):
+            return True
+    return False
+
+
+def _active_subscriptions(session: Session) -> list[list | None]:
+    subs = _subscriptions.get("active")
+    if subs is None:
+        rows = session.connection().execute(select(Webhook.events).where(Webhook.is_active.is_(True)))
+        subs = [events for (events,) in rows]
+        _subscriptions.set("active", subs)
+    return subs
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:
+    if any(isinstance(obj, Webhook) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_WEBHOOKS_CHANGED_KEY] = True
+        _subscriptions.clear()
+    changes = audit.collect(session)
+    if not changes:
+        return
+    subs = _active_subscriptions(session)
+    if not subs:
+        return
+    user_id, _ip = audit.actor(session)
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for change in changes:
+        name = event_name(change.entity_type, change.action)
+        if not any(matches(events, name) for events in subs):
+            continue
+        rows.append({
+            "event": name,
+            "payload": {
+                "id": str(uuid.uuid4()),
+                "event": name,
+                "entity_type": change.entity_type,
+                "entity_id": str(change.entity_id),
+                "changes": change.changes or None,
+                "user_id": str(user_id) if user_id else None,
+                "occurred_at": now,
+            },
+        })
+    if not rows:
+        return
+    conn = session.connection()
+    for i in range(0, len(rows), _BATCH):
+        conn.execute(insert(WebhookOutboxEvent).values(rows[i:i + _BATCH]))
+    session.info[_ENQUEUED_KEY] = True
+
+
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_WEBHOOKS_CHANGED_KEY, False):
+        _subscriptions.clear()
+    if session.info.pop(_ENQUEUED_KEY, False):
+        pending.set()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_ENQUEUED_KEY, None)
+    session.info.pop(_WEBHOOKS_CHANGED_KEY, None)
+
+
+def install() -> None:
+    """Register the session hooks. Idempotent."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
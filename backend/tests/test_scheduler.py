@@ -0,0 +1,62 @@
+"""Placement of scheduled runs: `_due_after` and the first run `start()` gives each job."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import scheduler
+
+JOB = next(iter(scheduler.JOBS))
+
+
+@pytest.fixture
+def interval():
+    return timedelta(minutes=scheduler.interval_minutes(JOB))
+
+
+def test_due_after_recent_run_returns_next_due(interval):
+    last = datetime.now(timezone.utc) - interval / 2
+    assert scheduler._due_after(JOB, last) == last + interval
+
+
+def test_due_after_run_an_interval_ago_is_due(interval):
+    assert scheduler._due_after(JOB, datetime.now(timezone.utc) - interval) is None
+
+
+def test_due_after_tolerates_early_timer(interval):
+    # A timer firing a few seconds before the run is due still runs it.
+    last = datetime.now(timezone.utc) - interval + timedelta(seconds=5)
+    assert scheduler._due_after(JOB, last) is None
+
+
+def _next_runs(monkeypatch, last_started):
+    async def fake_last_started(job_ids):
+        return {job_id: last_started for job_id in job_ids} if last_started else {}
+
+    async def placed():
+        await scheduler.start()
+        try:
+            return {job.id: job.next_run_time for job in scheduler._scheduler.get_jobs()}
+        finally:
+            await scheduler.stop()
+
+    monkeypatch.setattr(scheduler, "_last_started", fake_last_started)
+    before = datetime.now(timezone.utc)
+    return before, asyncio.run(placed()), datetime.now(timezone.utc)
+
+
+def test_start_runs_overdue_job_now(monkeypatch, interval):
+    before, runs, after = _next_runs(monkeypatch, datetime.now(timezone.utc) - 3 * interval)
+    assert before <= runs[JOB] <= after
+
+
+def test_start_keeps_recent_job_on_schedule(monkeypatch, interval):
+    last = datetime.now(timezone.utc) - interval / 2
+    _, runs, _ = _next_runs(monkeypatch, last)
+    assert abs(runs[JOB] - (last + interval)) < timedelta(seconds=1)
+
+
+def test_start_waits_an_interval_for_a_job_that_never_ran(monkeypatch, interval):
+    before, runs, after = _next_runs(monkeypatch, None)
+    assert before + interval <= runs[JOB] <= after + interval
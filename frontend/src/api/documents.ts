@@ -1,5 +1,5 @@
 import client from './client'
-import type { Document, DocumentFolder, DocumentVersion, DocumentTemplate } from '@/types'
+import type { Document, DocumentFolder, DocumentVersion, DocumentVersionSummary, DocumentDiff, DocumentTemplate } from '@/types'
 
 export const getDocuments = async (params?: Record<string, unknown>) => {
   const { data } = await client.get<Document[]>('/documents', { params })
@@ -26,7 +26,19 @@ export const deleteDocument = async (id: string) => {
 }
 
 export const getDocumentVersions = async (id: string) => {
-  const { data } = await client.get<DocumentVersion[]>(`/documents/${id}/versions`)
+  const { data } = await client.get<DocumentVersionSummary[]>(`/documents/${id}/versions`)
+  return data
+}
+
+export const getDocumentVersion = async (id: string, version: number) => {
+  const { data } = await client.get<DocumentVersion>(`/documents/${id}/versions/${version}`)
+  return data
+}
+
+export const getDocumentDiff = async (id: string, fromVersion: number, toVersion: number) => {
+  const { data } = await client.get<DocumentDiff>(`/documents/${id}/diff`, {
+    params: { from_version: fromVersion, to_version: toVersion },
+  })
   return data
 }
 
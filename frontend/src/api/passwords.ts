@@ -30,6 +30,52 @@ export const revealPassword = async (id: string) => {
   return data.password
 }
 
+export const revealPasswords = async (ids: string[]) => {
+  const { data } = await client.post<{ passwords: { id: string; password: string }[]; not_found: string[] }>(
+    '/passwords/reveal',
+    { ids },
+  )
+  return data
+}
+
+export const exportPasswords = async (organizationId: string, passphrase: string) => {
+  const { data } = await client.post<Blob>(
+    '/passwords/export',
+    { organization_id: organizationId, passphrase },
+    { responseType: 'blob' },
+  )
+  return data
+}
+
+export interface PasswordShareLink {
+  id: string
+  password_id: string
+  expires_at: string | null
+  max_views: number | null
+  view_count: number
+  is_active: boolean
+  created_by: string | null
+  created_at: string
+  token?: string
+}
+
+export const createPasswordShareLink = async (
+  id: string,
+  body: { expires_in_hours?: number | null; max_views?: number | null },
+) => {
+  const { data } = await client.post<PasswordShareLink>(`/passwords/${id}/share-links`, body)
+  return data
+}
+
+export const getPasswordShareLinks = async (id: string) => {
+  const { data } = await client.get<PasswordShareLink[]>(`/passwords/${id}/share-links`)
+  return data
+}
+
+export const revokePasswordShareLink = async (id: string, linkId: string) => {
+  await client.delete(`/passwords/${id}/share-links/${linkId}`)
+}
+
 export const getPasswordAudit = async (id: string) => {
   const { data } = await client.get(`/passwords/${id}/audit`)
   return data
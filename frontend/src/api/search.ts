@@ -4,14 +4,27 @@ export interface SearchResult {
   entity_type: string
   entity_id: string
   name: string
+  /** HTML-escaped excerpt with matches wrapped in <mark>; built server-side. */
+  snippet?: string | null
 }
 
 export interface SearchResponse {
   results: SearchResult[]
   total: number
+  counts: Record<string, number>
 }
 
 export const globalSearch = async (query: string) => {
   const { data } = await client.get<SearchResponse>('/search', { params: { q: query } })
   return data
 }
+
+export interface SuggestResponse {
+  q: string
+  results: SearchResult[]
+}
+
+export const suggestSearch = async (query: string, limit = 5) => {
+  const { data } = await client.get<SuggestResponse>('/search/suggest', { params: { q: query, limit } })
+  return data
+}
@@ -1,5 +1,7 @@
 import client from './client'
-import type { SSLCertificate, SSLProbeResult } from '@/types'
+import type {
+  SSLCertificate, SSLCertificateChange, SSLProbeHistoryEntry, SSLProbeResult, SSLSweepResult,
+} from '@/types'
 
 export const getSSLCertificates = async (params?: Record<string, unknown>) => {
   const { data } = await client.get<SSLCertificate[]>('/ssl-certificates', { params })
@@ -29,3 +31,19 @@ export const probeSSLCertificate = async (id: string, body?: { host?: string; po
   const { data } = await client.post<SSLProbeResult>(`/ssl-certificates/${id}/probe`, body || {})
   return data
 }
+
+export const probeSSLCertificates = async (organizationId?: string) => {
+  const params = organizationId ? { organization_id: organizationId } : undefined
+  const { data } = await client.post<SSLSweepResult>('/ssl-certificates/probe', null, { params })
+  return data
+}
+
+export const getSSLProbeHistory = async (id: string, params?: Record<string, unknown>) => {
+  const { data } = await client.get<SSLProbeHistoryEntry[]>(`/ssl-certificates/${id}/probe-history`, { params })
+  return data
+}
+
+export const getSSLCertificateChanges = async (params?: { days?: number; organization_id?: string }) => {
+  const { data } = await client.get<SSLCertificateChange[]>('/ssl-certificates/changes', { params })
+  return data
+}
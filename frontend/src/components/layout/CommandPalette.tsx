@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { globalSearch, type SearchResult } from '@/api/search'
+import { suggestSearch, type SearchResult } from '@/api/search'
 import { Badge } from '@/components/ui/Badge'
 import { Search, Building2, Server, KeyRound, FileText, Globe, ShieldCheck, Users, MapPin } from 'lucide-react'
 
@@ -37,7 +37,7 @@ export function CommandPalette() {
   const doSearch = useCallback(async (q: string) => {
     if (!q.trim()) { setResults([]); return }
     try {
-      const data = await globalSearch(q)
+      const data = await suggestSearch(q, 3)
       setResults(data.results.slice(0, 10))
       setSelectedIdx(0)
     } catch { setResults([]) }
@@ -4,17 +4,18 @@ import { globalSearch, type SearchResult } from '@/api/search'
 import { Input } from '@/components/ui/Input'
 import { Spinner } from '@/components/ui/Spinner'
 import { Badge } from '@/components/ui/Badge'
-import { Search, Building2, Server, KeyRound, FileText, Globe, ShieldCheck, Users, MapPin } from 'lucide-react'
+import { Search, Building2, Server, KeyRound, FileText, Globe, ShieldCheck, Users, MapPin, Boxes, Layers } from 'lucide-react'
 
 const entityIcons: Record<string, typeof Building2> = {
   organization: Building2, configuration: Server, password: KeyRound, document: FileText,
   domain: Globe, ssl_certificate: ShieldCheck, contact: Users, location: MapPin,
+  system: Boxes, flexible_asset: Layers,
 }
 
 const entityRoutes: Record<string, string> = {
   organization: '/organizations', configuration: '/configurations', password: '/passwords',
   document: '/documents', domain: '/domains', ssl_certificate: '/ssl-certificates',
-  contact: '/contacts', location: '/locations',
+  contact: '/contacts', location: '/locations', system: '/systems', flexible_asset: '/flexible-assets',
 }
 
 export default function SearchResultsPage() {
@@ -74,7 +75,15 @@ export default function SearchResultsPage() {
               className="card p-4 cursor-pointer hover:shadow-md transition-shadow flex items-center gap-3"
             >
               <Icon className="h-5 w-5 text-primary-500 shrink-0" />
-              <span className="font-medium text-gray-900 dark:text-white">{r.name}</span>
+              <div className="min-w-0">
+                <span className="font-medium text-gray-900 dark:text-white">{r.name}</span>
+                {r.snippet && (
+                  <p
+                    className="text-sm text-gray-500 dark:text-gray-400 truncate [&_mark]:bg-yellow-200 dark:[&_mark]:bg-yellow-700"
+                    dangerouslySetInnerHTML={{ __html: r.snippet }}
+                  />
+                )}
+              </div>
               <Badge>{r.entity_type.replace('_', ' ')}</Badge>
             </div>
           )
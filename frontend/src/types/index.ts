@@ -179,6 +179,49 @@ export interface SSLProbeResult {
   days_until_expiry: number
 }
 
+export interface SSLProbeHistoryEntry {
+  id: string
+  certificate_id: string
+  probed_at: string
+  last_seen_at: string
+  seen_count: number
+  host: string
+  port: number
+  fingerprint: string | null
+  serial_number: string | null
+  subject_cn: string | null
+  issuer: string | null
+  not_before: string | null
+  not_after: string | null
+  key_algorithm: string | null
+  key_size: number | null
+  signature_algorithm: string | null
+  tls_version: string | null
+  cipher: string | null
+  latency_ms: number | null
+  error: string | null
+  changed: boolean
+}
+
+export interface SSLCertificateChange {
+  certificate_id: string
+  organization_id: string
+  common_name: string
+  changed_at: string
+  current: SSLProbeHistoryEntry
+  previous: SSLProbeHistoryEntry | null
+  issuer_changed: boolean
+  key_downgraded: boolean
+}
+
+export interface SSLSweepResult {
+  probed: number
+  failed: number
+  skipped: number
+  duration_ms: number
+  errors: string[]
+}
+
 export interface DnsLookupResult {
   hostname: string
   a: string[]
@@ -246,6 +289,15 @@ export interface DocumentFolder {
   children?: DocumentFolder[]
 }
 
+export interface DocumentVersionSummary {
+  id: string
+  document_id: string
+  version: number
+  change_summary: string | null
+  content_size: number | null
+  created_at: string
+}
+
 export interface DocumentVersion {
   id: string
   document_id: string
@@ -255,6 +307,12 @@ export interface DocumentVersion {
   created_at: string
 }
 
+export interface DocumentDiff {
+  from_version: number
+  to_version: number
+  ops: { op: 'equal' | 'insert' | 'delete'; text: string }[]
+}
+
 export interface DocumentTemplate {
   id: string
   name: string
@@ -339,6 +397,7 @@ export interface Webhook {
   events: string[]
   is_active: boolean
   secret: string | null
+  batch_events: boolean
   created_at: string
   updated_at: string
 }
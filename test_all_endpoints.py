@@ -202,7 +202,27 @@ def test_passwords():
         api("GET", f"/passwords/{pw['id']}")
         api("PUT", f"/passwords/{pw['id']}", {"name": "Root SSH Key Updated", "username": "admin"})
         api("POST", f"/passwords/{pw['id']}/reveal")
+        api("POST", "/passwords/reveal", {"ids": [pw["id"]]})
+        api("POST", "/passwords/export", {"organization_id": org_id, "passphrase": "integration-test-pass"})
         api("GET", f"/passwords/{pw['id']}/audit")
+        test_share_links(pw["id"])
+
+
+def test_share_links(password_id):
+    print("\n=== SHARE LINKS (create, open, view limit, revoke) ===")
+    link = api("POST", f"/passwords/{password_id}/share-links", {"expires_in_hours": 1, "max_views": 1},
+               expect_status=201)
+    if link:
+        api("POST", f"/share/{link['token']}")
+        # The single view is used up
+        api("POST", f"/share/{link['token']}", expect_status=404)
+
+    link = api("POST", f"/passwords/{password_id}/share-links", {"expires_in_hours": 1, "max_views": 5},
+               expect_status=201)
+    if link:
+        api("GET", f"/passwords/{password_id}/share-links")
+        api("DELETE", f"/passwords/{password_id}/share-links/{link['id']}", expect_status=204)
+        api("POST", f"/share/{link['token']}", expect_status=404)
 
 
 def test_domains():
@@ -253,6 +273,8 @@ def test_ssl_certificates():
         CREATED_IDS["ssl_cert"] = cert["id"]
         api("GET", f"/ssl-certificates/{cert['id']}")
         api("PUT", f"/ssl-certificates/{cert['id']}", {"issuer": "DigiCert", "notes": "Upgraded CA"})
+        api("GET", f"/ssl-certificates/{cert['id']}/probe-history")
+    api("GET", "/ssl-certificates/changes", params={"organization_id": org_id, "days": 30})
 
 
 def test_documents():
@@ -302,6 +324,8 @@ def test_documents():
             "change_summary": "Updated to v2"
         })
         api("GET", f"/documents/{doc['id']}/versions")
+        api("GET", f"/documents/{doc['id']}/versions/1")
+        api("GET", f"/documents/{doc['id']}/diff", params={"from_version": 1, "to_version": 2})
 
 
 def test_flexible_assets():
@@ -428,6 +452,7 @@ def test_search():
     api("GET", "/search", params={"q": "Test", "page": 1, "page_size": 10})
     api("GET", "/search", params={"q": "Server", "page": 1, "page_size": 10})
     api("GET", "/search", params={"q": "testorg.com", "page": 1, "page_size": 10})
+    api("GET", "/search/suggest", params={"q": "Ser", "limit": 5})
 
 
 def test_reports():
@@ -506,6 +531,30 @@ def test_attachments():
     except Exception as e:
         log("POST", "/attachments (upload)", 0, False, str(e))
 
+    # Resumable upload: session, two chunks out of order, complete
+    content = b"0123456789" * 10
+    upload = api("POST", "/attachments/uploads", {
+        "file_name": "chunked.txt",
+        "content_type": "text/plain",
+        "size": len(content),
+        "attachable_type": "organization",
+        "attachable_id": org_id,
+    }, expect_status=201)
+    if upload:
+        path = f"/attachments/uploads/{upload['id']}"
+        for offset in (50, 0):
+            try:
+                resp = SESSION.put(f"{BASE}{path}", params={"offset": offset}, data=content[offset:offset + 50],
+                                   timeout=10)
+                log("PUT", f"{path}?offset={offset}", resp.status_code, resp.status_code == 204,
+                    "" if resp.status_code == 204 else resp.text[:300])
+            except Exception as e:
+                log("PUT", f"{path}?offset={offset}", 0, False, str(e))
+        api("GET", path)
+        att = api("POST", f"{path}/complete", expect_status=201)
+        if att:
+            CREATED_IDS["chunked_attachment"] = att["id"]
+
 
 def test_webhooks():
     print("\n=== WEBHOOKS (list, create, get, update, delete) ===")
@@ -522,6 +571,14 @@ def test_webhooks():
         CREATED_IDS["webhook"] = wh["id"]
         api("GET", f"/webhooks/{wh['id']}")
         api("PUT", f"/webhooks/{wh['id']}", {"name": "Slack Notifier Updated", "is_active": False})
+        api("GET", f"/webhooks/{wh['id']}/deliveries")
+    api("GET", "/webhooks/metrics")
+
+
+def test_scheduler():
+    print("\n=== SCHEDULER (jobs, runs) ===")
+    api("GET", "/scheduler/jobs")
+    api("GET", "/scheduler/runs", params={"page": 1, "page_size": 10})
 
 
 def test_settings():
@@ -570,6 +627,7 @@ def cleanup():
         ("relationship", "/relationships"),
         ("flag", "/flags"),
         ("attachment", "/attachments"),
+        ("chunked_attachment", "/attachments"),
         ("runbook_step2", None),  # deleted with runbook
         ("runbook_step", None),
         ("runbook", "/runbooks"),
@@ -646,6 +704,7 @@ if __name__ == "__main__":
     test_relationships()
     test_attachments()
     test_webhooks()
+    test_scheduler()
     test_settings()
     test_audit_logs()
     cleanup()